@@ -2,26 +2,49 @@
 Multi-Agent Graph using LangGraph for orchestrating Receptionist and Clinical agents.
 """
 
-from typing import TypedDict, Annotated, Literal
+from typing import TypedDict, Annotated, Literal, AsyncIterator
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage
-import uuid
+from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_openai import ChatOpenAI
+import asyncio
+import operator
+import secrets
 
 from .receptionist_agent import create_receptionist_agent
 from .clinical_agent import create_clinical_agent
+from ..config import get_settings, openai_client_kwargs
 from ..utils.logger import system_logger
 
 
+# Routing instruction emitted by the Receptionist Agent
+ROUTE_MARKER = "ROUTE_TO_CLINICAL:"
+
+
+def _normalize_query(text: str) -> str:
+    """Normalize a query for comparison: case, whitespace and trailing punctuation."""
+    return " ".join(text.casefold().split()).strip(" ?.!")
+
+
+def _prefetch_answers(clinical_query: str, message: str) -> bool:
+    """Check whether a speculative clinical run on `message` also answers `clinical_query`."""
+    return not clinical_query or _normalize_query(clinical_query) == _normalize_query(message)
+
+
 class AgentState(TypedDict):
     """State for the multi-agent system."""
-    messages: list
+    # Extended in place so each turn appends without copying the whole history
+    messages: Annotated[list, operator.iadd]
     current_agent: str
     patient_name: str
     patient_context: dict
     session_id: str
     should_route: bool
     clinical_query: str
+    clinical_prefetch: dict
     response: str
+    summary: str
+    summarized_count: int
 
 
 class MultiAgentSystem:
@@ -30,31 +53,50 @@ class MultiAgentSystem:
     Uses LangGraph for state management and agent routing.
     """
     
+    # Initial values of the per-session state fields
+    _DEFAULT_STATE = {
+        "current_agent": "receptionist",
+        "patient_name": None,
+        "patient_context": None,
+        "session_id": None,
+        "should_route": False,
+        "clinical_query": None,
+        "clinical_prefetch": None,
+        "response": "",
+        "summary": "",
+        "summarized_count": 0
+    }
+    
     def __init__(self):
         """Initialize the multi-agent system."""
-        self.session_id = str(uuid.uuid4())
+        self.session_id = secrets.token_hex(16)
         
         # Initialize agents
         self.receptionist_agent = create_receptionist_agent()
         self.clinical_agent = create_clinical_agent()
         
-        # Build graph
+        # Cheap model used to summarize turns that fall out of the history window
+        settings = get_settings()
+        self.window_turns = settings.conversation_window_turns
+        self.summary_llm = ChatOpenAI(
+            model=settings.summary_model,
+            temperature=0,
+            api_key=settings.openai_api_key,
+            **openai_client_kwargs()
+        )
+        
+        # Build graph; conversation state is kept per session by the checkpointer
         self.graph = self._build_graph()
-        self.app = self.graph.compile()
-        
-        # State
-        self.state = {
-            "messages": [],
-            "current_agent": "receptionist",
-            "patient_name": None,
-            "patient_context": None,
-            "session_id": self.session_id,
-            "should_route": False,
-            "clinical_query": None,
-            "response": ""
-        }
+        self.checkpointer = MemorySaver()
+        self.app = self.graph.compile(checkpointer=self.checkpointer)
+        
+        # State fields written into the session thread on its next turn
+        self._pending_state = self._DEFAULT_STATE | {"session_id": self.session_id}
+        
+        # Serializes turns so concurrent requests don't interleave on the session thread
+        self._turn_lock = asyncio.Lock()
         
-        system_logger.info(f"Multi-Agent System initialized with session: {self.session_id}")
+        system_logger.info("Multi-Agent System initialized with session: {}", self.session_id)
     
     def _build_graph(self) -> StateGraph:
         """Build the agent graph."""
@@ -83,43 +125,74 @@ class MultiAgentSystem:
         
         return workflow
     
-    def _receptionist_node(self, state: AgentState) -> AgentState:
+    async def _receptionist_node(self, state: AgentState) -> dict:
         """Process message with Receptionist Agent."""
         try:
             # Get last message
             last_message = state["messages"][-1] if state["messages"] else None
             if not last_message:
-                return state
+                return {}
             
             user_message = last_message.content if hasattr(last_message, 'content') else str(last_message)
             
+            # Fold turns that left the window into the running summary
+            summary_update = await self._update_summary(state)
+            state = {**state, **summary_update}
+            
             # Get chat history
-            chat_history = state["messages"][:-1] if len(state["messages"]) > 1 else []
+            chat_history = self._chat_history(state)
             
-            # Process with receptionist
-            result = self.receptionist_agent.process_message(
-                message=user_message,
-                chat_history=chat_history
+            receptionist_task = asyncio.create_task(
+                self.receptionist_agent.aprocess_message(
+                    message=user_message,
+                    chat_history=chat_history
+                )
             )
             
-            # Update state
-            state["response"] = result["response"]
-            state["should_route"] = result["should_route_to_clinical"]
-            state["clinical_query"] = result["clinical_query"]
-            state["current_agent"] = "receptionist"
+            # Likely medical question: run the clinical agent speculatively
+            # alongside the receptionist instead of after it
+            if self.receptionist_agent.should_route_to_clinical(user_message):
+                clinical_task = asyncio.create_task(
+                    self.clinical_agent.aprocess_message(
+                        message=user_message,
+                        patient_context=state.get("patient_context"),
+                        chat_history=chat_history,
+                        log=False  # Logged by the clinical node if the answer is used
+                    )
+                )
+                result, clinical_result = await asyncio.gather(receptionist_task, clinical_task)
+            else:
+                result = await receptionist_task
+                clinical_result = None
+            
+            should_route = result["should_route_to_clinical"]
             
-            # Add response to messages
-            state["messages"].append(AIMessage(content=result["response"]))
+            # The speculative run answered the raw message; keep it only if
+            # the receptionist routed that same question
+            use_prefetch = (
+                should_route
+                and clinical_result is not None
+                and _prefetch_answers(result["clinical_query"], user_message)
+            )
             
-            return state
+            return {
+                **summary_update,
+                "response": result["response"],
+                "should_route": should_route,
+                "clinical_query": result["clinical_query"],
+                "current_agent": "receptionist",
+                "clinical_prefetch": clinical_result if use_prefetch else None,
+                "messages": [AIMessage(content=result["response"])]
+            }
             
         except Exception as e:
             system_logger.log_error("GraphError", f"Error in receptionist node: {str(e)}")
-            state["response"] = "I apologize for the error. Please try again."
-            state["should_route"] = False
-            return state
+            return {
+                "response": "I apologize for the error. Please try again.",
+                "should_route": False
+            }
     
-    def _clinical_node(self, state: AgentState) -> AgentState:
+    async def _clinical_node(self, state: AgentState) -> dict:
         """Process message with Clinical Agent."""
         try:
             # Log handoff
@@ -130,34 +203,100 @@ class MultiAgentSystem:
                 context={"query": state.get("clinical_query")}
             )
             
-            # Get the clinical query or last message
-            query = state.get("clinical_query") or (
-                state["messages"][-1].content if state["messages"] else ""
+            user_message = next(
+                (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)),
+                ""
             )
             
-            # Get chat history
-            chat_history = state["messages"][:-1] if len(state["messages"]) > 1 else []
+            result = state.get("clinical_prefetch")
+            if result is not None:
+                # The speculative run skipped logging in case it was discarded
+                self.clinical_agent.log_exchange(user_message, result, state.get("patient_context"))
+            else:
+                # Get the clinical query or last user message
+                query = state.get("clinical_query") or user_message
+                
+                # Get chat history
+                chat_history = self._chat_history(state)
+                
+                # Process with clinical agent
+                result = await self.clinical_agent.aprocess_message(
+                    message=query,
+                    patient_context=state.get("patient_context"),
+                    chat_history=chat_history
+                )
             
-            # Process with clinical agent
-            result = self.clinical_agent.process_message(
-                message=query,
-                patient_context=state.get("patient_context"),
-                chat_history=chat_history
-            )
+            return {
+                "response": result["response"],
+                "current_agent": "clinical",
+                "clinical_prefetch": None,
+                "messages": [AIMessage(content=result["response"])]
+            }
             
-            # Update state
-            state["response"] = result["response"]
-            state["current_agent"] = "clinical"
+        except Exception as e:
+            system_logger.log_error("GraphError", f"Error in clinical node: {str(e)}")
+            return {"response": "I apologize for the error. Please consult your healthcare provider."}
+    
+    def _chat_history(self, state: AgentState) -> list:
+        """
+        Get the chat history passed to the agents.
+        
+        The last `window_turns` turns are sent verbatim; older turns are
+        represented by the running summary. Older messages that have not been
+        summarized yet are sent verbatim too, so none are dropped between
+        summary batches.
+        
+        Args:
+            state: Current graph state
             
-            # Add response to messages
-            state["messages"].append(AIMessage(content=result["response"]))
+        Returns:
+            List of messages preceding the current user message
+        """
+        messages = state["messages"]
+        window_start = max(len(messages) - 1 - 2 * self.window_turns, 0)
+        start = min(state.get("summarized_count") or 0, window_start)
+        chat_history = messages[start:-1]
+        if state.get("summary"):
+            chat_history = [
+                SystemMessage(content=f"Earlier conversation summary: {state['summary']}")
+            ] + chat_history
+        return chat_history
+    
+    async def _update_summary(self, state: AgentState) -> dict:
+        """
+        Summarize the messages that have fallen out of the history window.
+        
+        Args:
+            state: Current graph state
             
-            return state
+        Returns:
+            State update with the new summary, or an empty dict if not needed
+        """
+        messages = state["messages"]
+        window_start = len(messages) - 1 - 2 * self.window_turns
+        summarized_count = state.get("summarized_count") or 0
+        
+        # Summarize in batches of a few turns rather than on every message
+        if window_start - summarized_count < 4:
+            return {}
+        
+        try:
+            transcript = "\n".join(
+                f"{'Patient' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}"
+                for m in messages[summarized_count:window_start]
+            )
+            prompt = (
+                "Summarize this post-discharge care conversation in a few sentences. "
+                "Keep the patient's name, symptoms, medications and any advice given.\n\n"
+                f"Existing summary: {state.get('summary') or 'None'}\n\n"
+                f"New messages:\n{transcript}"
+            )
+            result = await self.summary_llm.ainvoke(prompt)
+            return {"summary": result.content, "summarized_count": window_start}
             
         except Exception as e:
-            system_logger.log_error("GraphError", f"Error in clinical node: {str(e)}")
-            state["response"] = "I apologize for the error. Please consult your healthcare provider."
-            return state
+            system_logger.log_error("GraphError", f"Error summarizing conversation: {str(e)}")
+            return {}
     
     def _route_from_receptionist(self, state: AgentState) -> Literal["clinical", "end"]:
         """Determine routing from receptionist agent."""
@@ -165,7 +304,7 @@ class MultiAgentSystem:
             return "clinical"
         return "end"
     
-    def process_message(self, message: str) -> str:
+    async def process_message(self, message: str) -> str:
         """
         Process a user message through the multi-agent system.
         
@@ -176,14 +315,14 @@ class MultiAgentSystem:
             Agent's response
         """
         try:
-            # Add user message to state
-            self.state["messages"].append(HumanMessage(content=message))
-            
-            # Run graph
-            result = self.app.invoke(self.state)
-            
-            # Update state
-            self.state = result
+            # Only the new message (plus pending fields) is sent; the
+            # checkpointer restores the rest of the session state
+            async with self._turn_lock:
+                inputs = {**self._pending_state, "messages": [HumanMessage(content=message)]}
+                
+                # Run graph
+                result = await self.app.ainvoke(inputs, config=self._thread_config())
+                self._pending_state = {}
             
             # Return response
             return result.get("response", "I apologize, but I couldn't process your message.")
@@ -192,31 +331,152 @@ class MultiAgentSystem:
             system_logger.log_error("MultiAgentError", f"Error processing message: {str(e)}")
             return "I apologize for the error. Please try again."
     
+    async def stream_message(self, message: str) -> AsyncIterator[str]:
+        """
+        Process a user message and yield the response as it is generated.
+        
+        Receptionist tokens are streamed until the routing marker appears.
+        Tokens from the speculative clinical run are held back and only
+        released once the receptionist has routed the same question to the
+        Clinical Agent; otherwise the clinical re-run is streamed instead.
+        
+        Args:
+            message: User's message
+            
+        Yields:
+            Response text chunks
+        """
+        try:
+            async with self._turn_lock:
+                inputs = {**self._pending_state, "messages": [HumanMessage(content=message)]}
+                
+                run_agents = {}  # astream_log run key -> agent tag
+                discarded = set()  # Run keys of a speculative clinical run that was not used
+                held = ""  # Receptionist text that may be the start of the routing marker
+                clinical_text = ""
+                emitted = ""
+                routed = False
+                released = False
+                
+                async for patch in self.app.astream_log(
+                    inputs,
+                    config=self._thread_config(),
+                    include_tags=["receptionist", "clinical"]
+                ):
+                    for op in patch.ops:
+                        path = op["path"].split("/")
+                        if len(path) == 3 and path[1] == "logs" and op["op"] == "add":
+                            run_agents[path[2]] = "clinical" if "clinical" in op["value"]["tags"] else "receptionist"
+                            continue
+                        if (
+                            routed and not released
+                            and len(path) == 4 and path[3] == "end_time"
+                            and run_agents.get(path[2]) == "receptionist"
+                        ):
+                            # The routed query is complete: keep the speculative
+                            # clinical answer only if it answers that query, as
+                            # the receptionist node does
+                            if not _prefetch_answers(query.strip(), message):
+                                discarded.update(k for k, agent in run_agents.items() if agent == "clinical")
+                                clinical_text = ""
+                            released = True
+                            if intro + clinical_text:
+                                yield intro + clinical_text
+                            continue
+                        if len(path) != 5 or path[3] != "streamed_output_str":
+                            continue
+                        
+                        token = op["value"]
+                        if not token:
+                            continue
+                        if run_agents.get(path[2]) == "clinical":
+                            if path[2] in discarded:
+                                continue
+                            clinical_text += token
+                            if released:
+                                yield token
+                            continue
+                        
+                        if routed:
+                            query += token
+                            continue
+                        held += token
+                        if ROUTE_MARKER in held:
+                            # Show any reply before the marker once the clinical answer can follow it
+                            routed = True
+                            intro, query = held.split(ROUTE_MARKER, 1)
+                            intro = intro.rstrip()
+                            intro = f"{intro}\n\n" if (emitted + intro).strip() else ""
+                            continue
+                        
+                        # Hold back the longest suffix that could still become the marker
+                        keep = next(
+                            (n for n in range(min(len(held), len(ROUTE_MARKER) - 1), 0, -1)
+                             if ROUTE_MARKER.startswith(held[-n:])),
+                            0
+                        )
+                        chunk, held = held[:len(held) - keep], held[len(held) - keep:]
+                        # Trailing whitespace too, so it can be trimmed before a routed answer
+                        text = chunk.rstrip()
+                        chunk, held = text, chunk[len(text):] + held
+                        if chunk:
+                            emitted += chunk
+                            yield chunk
+                
+                self._pending_state = {}
+                
+                # Emit whatever wasn't streamed (cached answers, appended disclaimers)
+                state = self.get_state()
+                response = state.get("response", "")
+                if state.get("current_agent") == "clinical":
+                    streamed = clinical_text if released else ""
+                else:
+                    streamed = emitted
+                if response.startswith(streamed):
+                    remainder = response[len(streamed):]
+                else:
+                    remainder = f"\n\n{response}" if streamed else response
+                if remainder:
+                    yield remainder
+                
+        except Exception as e:
+            system_logger.log_error("MultiAgentError", f"Error streaming message: {str(e)}")
+            yield "I apologize for the error. Please try again."
+    
+    def _thread_config(self) -> dict:
+        """Get the checkpointer config for the current session."""
+        return {"configurable": {"thread_id": self.session_id}}
+    
+    def get_state(self) -> dict:
+        """Get the current session state."""
+        checkpoint = self.checkpointer.get(self._thread_config())
+        channel_values = checkpoint["channel_values"] if checkpoint else {}
+        state = {
+            key: value for key, value in channel_values.items()
+            if key in AgentState.__annotations__
+        }
+        state.update(self._pending_state)
+        return state
+    
     def reset_session(self):
         """Reset the session."""
-        self.session_id = str(uuid.uuid4())
-        self.state = {
-            "messages": [],
-            "current_agent": "receptionist",
-            "patient_name": None,
-            "patient_context": None,
-            "session_id": self.session_id,
-            "should_route": False,
-            "clinical_query": None,
-            "response": ""
-        }
-        system_logger.info(f"Session reset: {self.session_id}")
+        # Drop the finished thread so old sessions don't accumulate in memory
+        self.checkpointer.storage.pop(self.session_id, None)
+        
+        self.session_id = secrets.token_hex(16)
+        self._pending_state = self._DEFAULT_STATE | {"session_id": self.session_id}
+        system_logger.info("Session reset: {}", self.session_id)
     
     def get_conversation_history(self) -> list:
         """Get the conversation history."""
-        return self.state.get("messages", [])
+        return list(self.get_state().get("messages", []))
     
     def set_patient_context(self, patient_context: dict):
         """Set patient context for the session."""
-        self.state["patient_context"] = patient_context
-        self.state["patient_name"] = patient_context.get("patient_name")
-        system_logger.info(f"Patient context set: {patient_context.get('patient_name')}")
-
+        self._pending_state["patient_context"] = patient_context
+        self._pending_state["patient_name"] = patient_context.get("patient_name")
+        self.clinical_agent.set_patient_context(patient_context)
+        system_logger.info("Patient context set: {}", patient_context.get("patient_name"))
 
 def create_multi_agent_system() -> MultiAgentSystem:
     """
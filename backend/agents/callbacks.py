@@ -0,0 +1,48 @@
+"""
+Callback handlers for agent executors.
+Route intermediate agent steps to the system log instead of stdout.
+"""
+
+from typing import Any, Dict
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.callbacks import BaseCallbackHandler
+
+from ..utils.logger import system_logger
+
+
+class AgentStepLogger(BaseCallbackHandler):
+    """
+    Logs agent tool calls and results at DEBUG level.
+    Replaces AgentExecutor's verbose stdout output.
+    """
+
+    def __init__(self, agent_name: str, max_chars: int = 500):
+        """
+        Initialize the step logger.
+
+        Args:
+            agent_name: Name of the agent whose steps are logged
+            max_chars: Maximum characters of tool output to log
+        """
+        self.agent_name = agent_name
+        self.max_chars = max_chars
+
+    def on_agent_action(self, action: AgentAction, **kwargs: Any) -> Any:
+        """Log a tool call chosen by the agent."""
+        system_logger.debug(
+            "[agent_step] {}: tool={} input={!s:.{}}",
+            self.agent_name, action.tool, action.tool_input, self.max_chars
+        )
+
+    def on_tool_end(self, output: str, **kwargs: Any) -> Any:
+        """Log the output of a tool call."""
+        system_logger.debug("[tool_result] {}: {!s:.{}}", self.agent_name, output, self.max_chars)
+
+    def on_tool_error(self, error: BaseException, **kwargs: Any) -> Any:
+        """Log a failed tool call."""
+        system_logger.debug("[tool_error] {}: {}", self.agent_name, error)
+
+    def on_agent_finish(self, finish: AgentFinish, **kwargs: Any) -> Any:
+        """Log the agent's final answer."""
+        output = finish.return_values.get("output", "")
+        system_logger.debug("[agent_finish] {}: {!s:.{}}", self.agent_name, output, self.max_chars)
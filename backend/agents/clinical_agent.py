@@ -3,15 +3,45 @@ Clinical AI Agent - Handles medical questions using RAG and web search.
 """
 
 from typing import List, Dict, Any
+from functools import lru_cache
+from threading import Lock
+import asyncio
+import re
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-from ..tools.rag_tool import create_rag_tool
-from ..tools.web_search import create_web_search_tool
+from ..tools.rag_tool import RAGTool
+from ..tools.web_search import WebSearchTool
+from ..tools.knowledge_lookup import create_knowledge_lookup_tool
 from ..utils.logger import system_logger
-from ..config import settings
+from .callbacks import AgentStepLogger
+from ..utils.response_cache import response_cache
+from ..config import get_settings, openai_client_kwargs
+
+
+# Questions about recent research need both the reference materials and the web
+_RECENT_RESEARCH_RE = re.compile(
+    r"\b(recent|new|latest|2024|2025|trials?|guidelines?)\b",
+    re.IGNORECASE
+)
+
+# Tools are expensive to build (vector store, search client), so every
+# ClinicalAgent shares one instance of each
+_tools_lock = Lock()
+
+
+@lru_cache(maxsize=1)
+def _rag() -> RAGTool:
+    """Get the shared RAG tool."""
+    return RAGTool(top_k=get_settings().top_k_results)
+
+
+@lru_cache(maxsize=1)
+def _web_search() -> WebSearchTool:
+    """Get the shared web search tool."""
+    return WebSearchTool()
 
 
 class ClinicalAgent:
@@ -27,20 +57,42 @@ class ClinicalAgent:
     def __init__(self):
         """Initialize the Clinical Agent."""
         self.name = "Clinical AI Agent"
+        settings = get_settings()
         
         # Initialize LLM with lower temperature for medical accuracy
         self.llm = ChatOpenAI(
             model=settings.llm_model,
             temperature=0.3,  # Lower temperature for more consistent medical responses
-            api_key=settings.openai_api_key
+            api_key=settings.openai_api_key,
+            streaming=True,
+            tags=["clinical"],  # Identifies this agent's tokens when streaming
+            **openai_client_kwargs()  # Shared connection pool across agents
         )
         
         # Initialize tools
-        self.tools = [
-            create_rag_tool(top_k=5),
-            create_web_search_tool()
-        ]
+        with _tools_lock:
+            self.rag = _rag()
+            self.web_search = _web_search()
+        self.rag_tool = self.rag.as_langchain_tool()
+        self.web_search_tool = self.web_search.as_langchain_tool()
+        self.web_search_batch_tool = self.web_search.as_batch_langchain_tool()
+        self.knowledge_lookup_tool = create_knowledge_lookup_tool(self.rag, self.web_search)
+        self.tools = [self.rag_tool, self.web_search_tool, self.web_search_batch_tool, self.knowledge_lookup_tool]
+        
+        # Log intermediate agent steps only when debugging
+        debug = settings.log_level.upper() == "DEBUG"
+        self.callbacks = [AgentStepLogger(self.name)] if debug else None
+        
+        # Patient context pinned into the system prompt
+        self.patient_context = None
+        
+        # Create prompt, agent and executor
+        self._build_agent()
         
+        system_logger.info("Clinical AI Agent initialized")
+    
+    def _build_agent(self):
+        """Create the prompt, agent and agent executor."""
         # Create prompt
         self.prompt = self._create_prompt()
         
@@ -55,12 +107,25 @@ class ClinicalAgent:
         self.agent_executor = AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            verbose=True,
+            verbose=False,
+            callbacks=self.callbacks,
             handle_parsing_errors=True,
             max_iterations=5
         )
+    
+    def set_patient_context(self, patient_context: Dict[str, Any] = None):
+        """
+        Pin the patient's discharge context into the system prompt.
         
-        system_logger.info("Clinical AI Agent initialized")
+        Keeping the context in the system block (instead of appending it to
+        every user message) gives each turn a stable prompt prefix that
+        OpenAI can serve from its prompt cache.
+        
+        Args:
+            patient_context: Patient's discharge information
+        """
+        self.patient_context = patient_context
+        self._build_agent()
     
     def _create_prompt(self) -> ChatPromptTemplate:
         """Create the agent prompt."""
@@ -81,6 +146,8 @@ Tool Usage Guidelines:
   * New medications or treatments
   * Information not covered in reference materials
   * Current guidelines or recommendations
+- Use web_search_batch instead of several web_search calls when you need multiple independent facts
+- Use knowledge_lookup instead of nephrology_knowledge_base followed by web_search when a question likely needs both
 - Clearly indicate the source of information (reference materials vs. web search)
 
 Response Guidelines:
@@ -105,6 +172,14 @@ Context Awareness:
 Medical Disclaimer: "⚕️ This is an AI assistant for educational purposes only. Always consult healthcare professionals for medical advice."
 """
         
+        if self.patient_context:
+            context_info = "\n\nPatient Context:\n"
+            context_info += f"- Diagnosis: {self.patient_context.get('primary_diagnosis', 'Unknown')}\n"
+            context_info += f"- Medications: {', '.join(self.patient_context.get('medications', []))}\n"
+            context_info += f"- Dietary Restrictions: {self.patient_context.get('dietary_restrictions', 'None specified')}\n"
+            # Escape braces so patient data is not parsed as template variables
+            system_message += context_info.replace("{", "{{").replace("}", "}}")
+        
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_message),
             MessagesPlaceholder(variable_name="chat_history", optional=True),
@@ -132,57 +207,204 @@ Medical Disclaimer: "⚕️ This is an AI assistant for educational purposes onl
             Dictionary with response and metadata
         """
         try:
-            system_logger.log_interaction(
-                interaction_type="user_input",
-                agent=self.name,
-                message=message,
-                metadata={"has_patient_context": patient_context is not None}
-            )
+            agent_input = self._prepare_input(message, patient_context, chat_history)
             
-            # Enhance message with patient context if available
-            enhanced_message = message
-            if patient_context:
-                context_info = f"\n\nPatient Context:\n"
-                context_info += f"- Diagnosis: {patient_context.get('primary_diagnosis', 'Unknown')}\n"
-                context_info += f"- Medications: {', '.join(patient_context.get('medications', []))}\n"
-                context_info += f"- Dietary Restrictions: {patient_context.get('dietary_restrictions', 'None specified')}\n"
-                enhanced_message = message + context_info
+            # Serve repeated questions from the response cache
+            cache_key = self._cache_key(message, patient_context, chat_history)
+            output = response_cache.get(cache_key)
+            if output is None:
+                # Embed the message and patient context in one batch for the RAG tool
+                self.rag.prime(self._rag_queries(message, patient_context))
+                
+                # Execute agent
+                result = self.agent_executor.invoke(agent_input)
+                output = result.get("output", "")
+                response_cache.put(cache_key, output)
             
-            # Prepare input
-            agent_input = {
-                "input": enhanced_message,
-                "chat_history": chat_history or []
-            }
+            return self._build_result(output, patient_context)
             
-            # Execute agent
-            result = self.agent_executor.invoke(agent_input)
-            response = result.get("output", "")
+        except Exception as e:
+            return self._error_result(e)
+    
+    async def aprocess_message(
+        self,
+        message: str,
+        patient_context: Dict[str, Any] = None,
+        chat_history: list = None,
+        log: bool = True
+    ) -> dict:
+        """
+        Process a medical query without blocking the event loop.
+        
+        Args:
+            message: User's medical question
+            patient_context: Patient's discharge information for context
+            chat_history: Previous conversation history
+            log: Write the query and response to the interaction log; speculative
+                runs pass False and call log_exchange if their answer is used
             
-            # Ensure medical disclaimer is included
-            if "⚕️" not in response and "medical advice" not in response.lower():
-                response += "\n\n⚕️ This is an AI assistant for educational purposes only. Always consult healthcare professionals for medical advice."
+        Returns:
+            Dictionary with response and metadata
+        """
+        try:
+            agent_input = self._prepare_input(message, patient_context, chat_history, log=log)
             
-            system_logger.log_interaction(
-                interaction_type="agent_response",
-                agent=self.name,
-                message=response,
-                metadata={"patient_context_used": patient_context is not None}
-            )
+            # Serve repeated questions from the response cache
+            cache_key = self._cache_key(message, patient_context, chat_history)
+            output = response_cache.get(cache_key)
+            if output is None:
+                # Embed the message and patient context in one batch for the RAG tool
+                await self.rag.aprime(self._rag_queries(message, patient_context))
+                
+                if _RECENT_RESEARCH_RE.search(message):
+                    # Query both sources at once instead of one agent turn each
+                    output = await self._aresearch(agent_input)
+                else:
+                    # Execute agent
+                    result = await self.agent_executor.ainvoke(agent_input)
+                    output = result.get("output", "")
+                response_cache.put(cache_key, output)
             
-            return {
-                "response": response,
-                "agent": "clinical",
-                "used_patient_context": patient_context is not None
-            }
+            return self._build_result(output, patient_context, log=log)
             
         except Exception as e:
-            error_msg = f"Error in Clinical Agent: {str(e)}"
-            system_logger.log_error("ClinicalAgentError", error_msg)
-            return {
-                "response": "I apologize, but I encountered an error while processing your medical question. Please consult your healthcare provider directly.",
-                "agent": "clinical",
-                "error": str(e)
+            return self._error_result(e)
+    
+    def log_exchange(self, message: str, result: dict, patient_context: Dict[str, Any] = None):
+        """
+        Log the query and response of a run made with logging disabled.
+        
+        Args:
+            message: User's medical question
+            result: Result returned by aprocess_message
+            patient_context: Patient context the run used
+        """
+        self._log_query(message, patient_context)
+        if "error" not in result:
+            self._log_response(result["response"], patient_context)
+    
+    async def _aresearch(self, agent_input: dict) -> str:
+        """
+        Answer a recent-research question from both sources in one LLM call.
+        
+        Runs the knowledge base lookup and the web search concurrently and
+        lets the LLM synthesize the results, bypassing the agent loop.
+        
+        Args:
+            agent_input: Agent executor input with the message and chat history
+            
+        Returns:
+            Synthesized response
+        """
+        message = agent_input["input"]
+        rag_context, web_context = await asyncio.gather(
+            self.rag_tool.arun(message),
+            self.web_search_tool.arun(message)
+        )
+        
+        messages = self.prompt.format_messages(
+            input=(
+                f"{message}\n\n"
+                f"Results from nephrology_knowledge_base:\n{rag_context}\n\n"
+                f"Results from web_search:\n{web_context}"
+            ),
+            chat_history=agent_input["chat_history"],
+            agent_scratchpad=[]
+        )
+        result = await self.llm.ainvoke(messages)
+        return result.content
+    
+    def _prepare_input(
+        self,
+        message: str,
+        patient_context: Dict[str, Any] = None,
+        chat_history: list = None,
+        log: bool = True
+    ) -> dict:
+        """Log the query and build the agent executor input."""
+        if log:
+            self._log_query(message, patient_context)
+        
+        # Patient context lives in the system prompt; rebuild it only when it changes
+        if patient_context != self.patient_context:
+            self.set_patient_context(patient_context)
+        
+        return {
+            "input": message,
+            "chat_history": chat_history or []
+        }
+    
+    def _rag_queries(self, message: str, patient_context: Dict[str, Any] = None) -> List[str]:
+        """Get the knowledge base queries likely to be made for this message."""
+        queries = [message]
+        if patient_context:
+            queries.append(patient_context.get("primary_diagnosis"))
+            queries.extend(patient_context.get("medications", []))
+        return queries
+    
+    def _cache_key(
+        self,
+        message: str,
+        patient_context: Dict[str, Any] = None,
+        chat_history: list = None
+    ) -> str:
+        """Build the response cache key, personalized by diagnosis and medications."""
+        context = None
+        if patient_context:
+            context = {
+                "primary_diagnosis": patient_context.get("primary_diagnosis"),
+                "medications": patient_context.get("medications", []),
+                "dietary_restrictions": patient_context.get("dietary_restrictions")
             }
+        return response_cache.make_key(self.name, message, context, chat_history)
+    
+    def _build_result(
+        self,
+        response: str,
+        patient_context: Dict[str, Any] = None,
+        log: bool = True
+    ) -> dict:
+        """Append the medical disclaimer if missing and log the response."""
+        # Ensure medical disclaimer is included
+        if "⚕️" not in response and "medical advice" not in response.lower():
+            response += "\n\n⚕️ This is an AI assistant for educational purposes only. Always consult healthcare professionals for medical advice."
+        
+        if log:
+            self._log_response(response, patient_context)
+        
+        return {
+            "response": response,
+            "agent": "clinical",
+            "used_patient_context": patient_context is not None
+        }
+    
+    def _log_query(self, message: str, patient_context: Dict[str, Any] = None):
+        """Write a user_input record to the interaction log."""
+        system_logger.log_interaction(
+            interaction_type="user_input",
+            agent=self.name,
+            message=message,
+            metadata={"has_patient_context": patient_context is not None}
+        )
+    
+    def _log_response(self, response: str, patient_context: Dict[str, Any] = None):
+        """Write an agent_response record to the interaction log."""
+        system_logger.log_interaction(
+            interaction_type="agent_response",
+            agent=self.name,
+            message=response,
+            metadata={"patient_context_used": patient_context is not None}
+        )
+    
+    def _error_result(self, e: Exception) -> dict:
+        """Log an agent failure and build the fallback result."""
+        error_msg = f"Error in Clinical Agent: {str(e)}"
+        system_logger.log_error("ClinicalAgentError", error_msg)
+        return {
+            "response": "I apologize, but I encountered an error while processing your medical question. Please consult your healthcare provider directly.",
+            "agent": "clinical",
+            "error": str(e)
+        }
     
     def get_emergency_response(self, symptoms: List[str]) -> str:
         """
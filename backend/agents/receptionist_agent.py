@@ -3,6 +3,7 @@ Receptionist Agent - Handles patient identification and initial interactions.
 """
 
 from typing import TypedDict, Annotated, Sequence
+import re
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_openai import ChatOpenAI
 from langchain.agents import AgentExecutor, create_openai_functions_agent
@@ -10,7 +11,26 @@ from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ..tools.patient_retrieval import create_patient_retrieval_tool
 from ..utils.logger import system_logger
-from ..config import settings
+from .callbacks import AgentStepLogger
+from ..utils.response_cache import response_cache
+from ..config import get_settings, openai_client_kwargs
+
+
+# Keywords that indicate medical questions
+MEDICAL_KEYWORDS = [
+    "pain", "swelling", "symptom", "medication", "side effect",
+    "treatment", "diagnosis", "test", "result", "worried",
+    "concerned", "should i", "what if", "is it normal",
+    "blood pressure", "kidney", "urine", "breathing",
+    "chest", "heart", "fever", "infection"
+]
+
+# Single alternation scanned once per message; no word boundaries so that
+# plurals and inflections ("symptoms", "tested") still match
+_MED_RE = re.compile("|".join(map(re.escape, MEDICAL_KEYWORDS)), re.IGNORECASE)
+
+# Detects the routing instruction and splits it from the reply in one pass
+_ROUTE_RE = re.compile(r"(?s)^(?P<pre>.*?)ROUTE_TO_CLINICAL:\s*(?P<q>.*)$")
 
 
 class ReceptionistAgent:
@@ -26,17 +46,25 @@ class ReceptionistAgent:
     def __init__(self):
         """Initialize the Receptionist Agent."""
         self.name = "Receptionist Agent"
+        settings = get_settings()
         
         # Initialize LLM
         self.llm = ChatOpenAI(
             model=settings.llm_model,
             temperature=0.7,
-            api_key=settings.openai_api_key
+            api_key=settings.openai_api_key,
+            streaming=True,
+            tags=["receptionist"],  # Identifies this agent's tokens when streaming
+            **openai_client_kwargs()  # Shared connection pool across agents
         )
         
         # Initialize tools
         self.tools = [create_patient_retrieval_tool()]
         
+        # Log intermediate agent steps only when debugging
+        debug = settings.log_level.upper() == "DEBUG"
+        self.callbacks = [AgentStepLogger(self.name)] if debug else None
+        
         # Create prompt
         self.prompt = self._create_prompt()
         
@@ -51,7 +79,8 @@ class ReceptionistAgent:
         self.agent_executor = AgentExecutor(
             agent=self.agent,
             tools=self.tools,
-            verbose=True,
+            verbose=False,
+            callbacks=self.callbacks,
             handle_parsing_errors=True,
             max_iterations=3
         )
@@ -114,59 +143,105 @@ When you determine a medical question needs clinical expertise, respond with:
             Dictionary with response and routing information
         """
         try:
-            system_logger.log_interaction(
-                interaction_type="user_input",
-                agent=self.name,
-                message=message
-            )
+            agent_input = self._prepare_input(message, chat_history)
             
-            # Prepare input
-            agent_input = {
-                "input": message,
-                "chat_history": chat_history or []
-            }
+            # Serve repeated questions from the response cache
+            cache_key = response_cache.make_key(self.name, message, chat_history=chat_history)
+            output = response_cache.get(cache_key)
+            if output is None:
+                # Execute agent
+                result = self.agent_executor.invoke(agent_input)
+                output = result.get("output", "")
+                response_cache.put(cache_key, output)
             
-            # Execute agent
-            result = self.agent_executor.invoke(agent_input)
-            response = result.get("output", "")
+            return self._build_result(output)
             
-            # Check if routing to clinical agent
-            should_route = "ROUTE_TO_CLINICAL:" in response
-            clinical_query = None
+        except Exception as e:
+            return self._error_result(e)
+    
+    async def aprocess_message(
+        self,
+        message: str,
+        chat_history: list = None
+    ) -> dict:
+        """
+        Process a user message without blocking the event loop.
+        
+        Args:
+            message: User's message
+            chat_history: Previous conversation history
             
-            if should_route:
-                # Extract the clinical query
-                parts = response.split("ROUTE_TO_CLINICAL:")
-                if len(parts) > 1:
-                    clinical_query = parts[1].strip()
-                    # Remove routing instruction from response
-                    response = parts[0].strip()
-                    if not response:
-                        response = "Let me connect you with our Clinical AI Agent who can better address your medical question."
+        Returns:
+            Dictionary with response and routing information
+        """
+        try:
+            agent_input = self._prepare_input(message, chat_history)
             
-            system_logger.log_interaction(
-                interaction_type="agent_response",
-                agent=self.name,
-                message=response,
-                metadata={"should_route": should_route, "clinical_query": clinical_query}
-            )
+            # Serve repeated questions from the response cache
+            cache_key = response_cache.make_key(self.name, message, chat_history=chat_history)
+            output = response_cache.get(cache_key)
+            if output is None:
+                # Execute agent
+                result = await self.agent_executor.ainvoke(agent_input)
+                output = result.get("output", "")
+                response_cache.put(cache_key, output)
             
-            return {
-                "response": response,
-                "should_route_to_clinical": should_route,
-                "clinical_query": clinical_query,
-                "agent": "receptionist"
-            }
+            return self._build_result(output)
             
         except Exception as e:
-            error_msg = f"Error in Receptionist Agent: {str(e)}"
-            system_logger.log_error("ReceptionistAgentError", error_msg)
-            return {
-                "response": "I apologize, but I encountered an error. Please try again.",
-                "should_route_to_clinical": False,
-                "clinical_query": None,
-                "agent": "receptionist"
-            }
+            return self._error_result(e)
+    
+    def _prepare_input(self, message: str, chat_history: list = None) -> dict:
+        """Log the user message and build the agent executor input."""
+        system_logger.log_interaction(
+            interaction_type="user_input",
+            agent=self.name,
+            message=message
+        )
+        
+        return {
+            "input": message,
+            "chat_history": chat_history or []
+        }
+    
+    def _build_result(self, response: str) -> dict:
+        """Extract routing information from the agent output and log the response."""
+        # Check if routing to clinical agent
+        match = _ROUTE_RE.match(response)
+        should_route = match is not None
+        clinical_query = None
+        
+        if should_route:
+            # Extract the clinical query and remove the routing instruction from the response
+            clinical_query = match.group("q").strip()
+            response = match.group("pre").strip()
+            if not response:
+                response = "Let me connect you with our Clinical AI Agent who can better address your medical question."
+        
+        system_logger.log_interaction(
+            interaction_type="agent_response",
+            agent=self.name,
+            message=response,
+            metadata={"should_route": should_route, "clinical_query": clinical_query}
+        )
+        
+        return {
+            "response": response,
+            "should_route_to_clinical": should_route,
+            "clinical_query": clinical_query,
+            "agent": "receptionist"
+        }
+    
+    def _error_result(self, e: Exception) -> dict:
+        """Log an agent failure and build the fallback result."""
+        error_msg = f"Error in Receptionist Agent: {str(e)}"
+        system_logger.log_error("ReceptionistAgentError", error_msg)
+        return {
+            "response": "I apologize, but I encountered an error. Please try again.",
+            "should_route_to_clinical": False,
+            "clinical_query": None,
+            "agent": "receptionist"
+        }
     
     def should_route_to_clinical(self, message: str) -> bool:
         """
@@ -178,18 +253,7 @@ When you determine a medical question needs clinical expertise, respond with:
         Returns:
             True if should route to clinical agent
         """
-        # Keywords that indicate medical questions
-        medical_keywords = [
-            "pain", "swelling", "symptom", "medication", "side effect",
-            "treatment", "diagnosis", "test", "result", "worried",
-            "concerned", "should i", "what if", "is it normal",
-            "blood pressure", "kidney", "urine", "breathing",
-            "chest", "heart", "fever", "infection"
-        ]
-        
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in medical_keywords)
-
+        return _MED_RE.search(message) is not None
 
 def create_receptionist_agent() -> ReceptionistAgent:
     """
@@ -4,10 +4,19 @@ Handles environment variables and application settings.
 """
 
 from pydantic_settings import BaseSettings
+from functools import lru_cache
 from typing import Optional
 import os
 from pathlib import Path
 
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
@@ -28,8 +37,15 @@ class Settings(BaseSettings):
     
     # Model Configuration
     llm_model: str = "gpt-4-turbo-preview"
+    embedding_backend: str = "openai"  # "openai" or "huggingface"
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_device: str = "auto"  # "auto" picks CUDA when available
+    embedding_batch_size: int = 128
     temperature: float = 0.7
+    summary_model: str = "gpt-4o-mini"
+    
+    # Conversation Memory
+    conversation_window_turns: int = 10
     
     # RAG Configuration
     chunk_size: int = 1000
@@ -44,16 +60,61 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# Initialize settings
-settings = Settings()
-
-# Create necessary directories
+# Necessary directories
 BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 LOGS_DIR = BASE_DIR / "logs"
 VECTOR_DB_DIR = BASE_DIR / "data" / "vector_db"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-LOGS_DIR.mkdir(exist_ok=True)
-VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+
+def _ensure_dirs():
+    """Create the data, logs and vector database directories if missing."""
+    DATA_DIR.mkdir(exist_ok=True)
+    LOGS_DIR.mkdir(exist_ok=True)
+    VECTOR_DB_DIR.mkdir(parents=True, exist_ok=True)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Load the application settings on first use.
+    
+    Returns:
+        Cached Settings instance
+    """
+    _ensure_dirs()
+    return Settings()
+
+
+def __getattr__(name: str):
+    """Resolve `settings` lazily so importing this module doesn't parse the environment."""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Shared HTTP connection pools so both agents reuse warm keep-alive/TLS sessions
+_http_limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+shared_http_client = httpx.Client(http2=HTTP2_AVAILABLE, limits=_http_limits, timeout=60)
+shared_async_http_client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=_http_limits, timeout=60)
+
+
+def openai_client_kwargs() -> dict:
+    """
+    Build ChatOpenAI client arguments backed by the shared connection pools.
+    
+    Returns:
+        Dictionary with sync and async OpenAI chat completion clients
+    """
+    import openai
+    
+    settings = get_settings()
+    return {
+        "client": openai.OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=shared_http_client
+        ).chat.completions,
+        "async_client": openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=shared_async_http_client
+        ).chat.completions
+    }
@@ -2,17 +2,144 @@
 Database connection and operations.
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import create_engine, event, func, select, text, column, bindparam, lambda_stmt, or_
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
 from sqlalchemy.pool import StaticPool
-from typing import Optional, List
+from typing import Optional, List, Dict, Iterator, Tuple, NamedTuple
+from threading import Lock, Thread
+from datetime import datetime
+from cachetools import TTLCache, cachedmethod
+from cachetools.keys import hashkey
+from bisect import bisect_left
+from itertools import islice
+import atexit
 import json
+import msgpack
+import orjson
+import queue
+import unicodedata
 from pathlib import Path
 
 from .models import Base, Patient, Interaction
 from ..utils.logger import system_logger
 
 
+# Patient columns populated from the discharge report JSON
+PATIENT_COLUMNS = (
+    "patient_id",
+    "patient_name",
+    "discharge_date",
+    "primary_diagnosis",
+    "medications",
+    "dietary_restrictions",
+    "follow_up",
+    "warning_signs",
+    "discharge_instructions"
+)
+
+# Full-text index over patient names and diagnoses (SQLite only). The trigram
+# tokenizer matches any substring of 3+ characters case-insensitively, the
+# same results as `ilike '%term%'` without a full table scan.
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+        patient_name, primary_diagnosis,
+        content='patients', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+        INSERT INTO patients_fts(rowid, patient_name, primary_diagnosis)
+        VALUES (new.id, new.patient_name, new.primary_diagnosis);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, patient_name, primary_diagnosis)
+        VALUES ('delete', old.id, old.patient_name, old.primary_diagnosis);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE ON patients BEGIN
+        INSERT INTO patients_fts(patients_fts, rowid, patient_name, primary_diagnosis)
+        VALUES ('delete', old.id, old.patient_name, old.primary_diagnosis);
+        INSERT INTO patients_fts(rowid, patient_name, primary_diagnosis)
+        VALUES (new.id, new.patient_name, new.primary_diagnosis);
+    END"""
+]
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# interaction writer, and a larger page cache plus mmap keep patient pages hot
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "temp_store=MEMORY"
+)
+
+# Columns returned for patients and interactions, labelled with their dict keys
+_PATIENT_FIELDS = tuple(Patient.__table__.c[name] for name in PATIENT_COLUMNS)
+
+_INTERACTION_FIELDS = (
+    Interaction.id,
+    Interaction.session_id,
+    Interaction.patient_name,
+    Interaction.timestamp,
+    Interaction.agent,
+    Interaction.message_type,
+    Interaction.message,
+    Interaction.meta_data.label("metadata")
+)
+
+# Hot queries built as lambda statements: SQLAlchemy caches each one after
+# the first call, skipping expression construction on every request. Rows
+# are read as mappings, so no ORM objects are hydrated.
+_ALL_PATIENTS = lambda_stmt(lambda: select(*_PATIENT_FIELDS).order_by(Patient.id))
+
+_PATIENT_SUMMARIES = lambda_stmt(
+    lambda: select(Patient.patient_id, Patient.patient_name, Patient.primary_diagnosis)
+    .order_by(Patient.id)
+)
+
+_COUNT_PATIENTS = lambda_stmt(lambda: select(func.count(Patient.id)))
+
+_SEARCH_PATIENTS_LIKE = lambda_stmt(
+    lambda: select(*_PATIENT_FIELDS).where(or_(
+        Patient.patient_name.ilike(bindparam("pattern")),
+        Patient.primary_diagnosis.ilike(bindparam("pattern"))
+    )).order_by(Patient.id)
+)
+
+_SEARCH_PATIENTS_FTS = lambda_stmt(
+    lambda: select(*_PATIENT_FIELDS).where(Patient.id.in_(
+        text("SELECT rowid FROM patients_fts WHERE patients_fts MATCH :query")
+        .columns(column("rowid"))
+    )).order_by(Patient.id)
+)
+
+_SESSION_HISTORY = lambda_stmt(
+    lambda: select(*_INTERACTION_FIELDS)
+    .where(Interaction.session_id == bindparam("session_id"))
+    .order_by(Interaction.timestamp)
+)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a patient name for matching.
+    
+    Args:
+        name: Name as stored or as typed by the user
+        
+    Returns:
+        Lowercase ASCII name with accents stripped and whitespace collapsed
+    """
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    return " ".join(ascii_name.lower().split())
+
+
+class PatientNameIndex(NamedTuple):
+    """Normalized patient names for fast lookups."""
+    exact: Dict[str, int]  # Normalized name -> patient_id
+    sorted_names: List[str]  # Normalized names in sorted order
+    sorted_ids: List[int]  # patient_ids matching sorted_names
+    pairs: List[Tuple[str, int]]  # (normalized name, patient_id) in snapshot order
+
+
 class DatabaseManager:
     """Manages database connections and operations."""
     
@@ -25,23 +152,138 @@ class DatabaseManager:
         """
         self.database_url = database_url
         
+        # In-memory SQLite must share its single connection; file databases
+        # get a pool of warm connections for concurrent requests
+        if database_url in ("sqlite://", "sqlite:///:memory:"):
+            pool_args = {"poolclass": StaticPool}
+        else:
+            pool_args = {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True}
+        
         # Create engine
         self.engine = create_engine(
             database_url,
             connect_args={"check_same_thread": False},
-            poolclass=StaticPool
+            insertmanyvalues_page_size=1000,
+            **pool_args
         )
+        if self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", self._set_sqlite_pragmas)
         
         # Create tables
         Base.metadata.create_all(bind=self.engine)
+        self._migrate()
+        self.fts_enabled = self._create_search_index()
+        
+        # Create session registry; each thread reuses its own Session object
+        self.SessionLocal = scoped_session(
+            sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        )
         
-        # Create session factory
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Patient rows are read-mostly: keep a snapshot of all patient dicts
+        # (by patient_id) and cache searches briefly in process
+        self._cache_lock = Lock()
+        self._patient_records: Optional[Dict[int, dict]] = None
+        self._name_index: Optional[PatientNameIndex] = None
+        self._patients_json: Optional[bytes] = None
+        self._search_cache = TTLCache(maxsize=256, ttl=300)
+        self._lookup_cache = TTLCache(maxsize=512, ttl=300)
+        self._count_cache = TTLCache(maxsize=1, ttl=30)
+        
+        # Interactions are queued and written in batches by a background thread
+        self._interaction_queue: "queue.Queue[dict]" = queue.Queue()
+        self._interaction_writer = None
+        self._writer_lock = Lock()
+        self.interaction_batch_size = 50
         
         system_logger.info(f"Database initialized: {database_url}")
     
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Configure a new SQLite connection."""
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(f"PRAGMA {pragma}")
+        finally:
+            cursor.close()
+    
+    def _migrate(self):
+        """Bring indexes of databases created by older versions up to date."""
+        # create_all only creates indexes together with new tables
+        for index in Interaction.__table__.indexes:
+            index.create(bind=self.engine, checkfirst=True)
+        
+        # Superseded by the (session_id, timestamp) index
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_interactions_session_id"))
+            
+            if self.engine.dialect.name == "sqlite":
+                self._reencode_json_columns(conn)
+    
+    def _reencode_json_columns(self, conn):
+        """Re-encode JSON text values written by older versions as msgpack."""
+        for table, column_name in (("patients", "medications"), ("interactions", "meta_data")):
+            rows = conn.execute(text(
+                f"SELECT id, {column_name} FROM {table} WHERE typeof({column_name}) = 'text'"
+            )).all()
+            if not rows:
+                continue
+            conn.execute(
+                text(f"UPDATE {table} SET {column_name} = :value WHERE id = :id"),
+                [
+                    {"id": row_id, "value": msgpack.packb(json.loads(value), use_bin_type=True)}
+                    for row_id, value in rows
+                ]
+            )
+            system_logger.info(f"Re-encoded {len(rows)} {table}.{column_name} values as msgpack")
+    
+    def _create_search_index(self) -> bool:
+        """
+        Create the SQLite full-text index used for patient searches.
+        
+        Returns:
+            True if the index is available, False to fall back to `ilike` scans
+        """
+        if self.engine.dialect.name != "sqlite":
+            return False
+        
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = 'patients_fts'")
+                ).first()
+                for statement in FTS_DDL:
+                    conn.execute(text(statement))
+                if not exists:
+                    # Index rows that were loaded before the FTS table existed
+                    conn.execute(text("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')"))
+            return True
+        except Exception as e:
+            system_logger.warning(f"Full-text search unavailable, using LIKE scans: {e}")
+            return False
+    
+    def _fts_query(self, term: str, column_name: Optional[str] = None) -> str:
+        """
+        Build an FTS5 MATCH expression for a literal substring.
+        
+        Args:
+            term: Search term (at least 3 characters for the trigram index)
+            column_name: Restrict the match to this indexed column
+            
+        Returns:
+            MATCH expression string
+        """
+        query = '"' + term.replace('"', '""') + '"'
+        if column_name:
+            query = f"{column_name} : {query}"
+        return query
+    
+    def _use_fts(self, term: str) -> bool:
+        """Whether a substring search for the term can use the full-text index."""
+        return self.fts_enabled and len(term) >= 3
+    
     def get_session(self) -> Session:
-        """Get a new database session."""
+        """Get the current thread's database session."""
         return self.SessionLocal()
     
     def load_patient_data(self, json_file_path: str):
@@ -51,42 +293,160 @@ class DatabaseManager:
         Args:
             json_file_path: Path to JSON file with patient data
         """
-        session = self.get_session()
         try:
-            # Check if data already loaded
-            count = session.query(Patient).count()
-            if count > 0:
-                system_logger.info(f"Database already contains {count} patients. Skipping load.")
-                return
-            
-            # Load JSON data
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                patients_data = json.load(f)
-            
-            # Insert patients
-            for patient_data in patients_data:
-                patient = Patient(
-                    patient_id=patient_data['patient_id'],
-                    patient_name=patient_data['patient_name'],
-                    discharge_date=patient_data['discharge_date'],
-                    primary_diagnosis=patient_data['primary_diagnosis'],
-                    medications=patient_data['medications'],
-                    dietary_restrictions=patient_data['dietary_restrictions'],
-                    follow_up=patient_data['follow_up'],
-                    warning_signs=patient_data['warning_signs'],
-                    discharge_instructions=patient_data['discharge_instructions']
-                )
-                session.add(patient)
+            # Core insert on a single transaction; no session or unit of work needed
+            with self.engine.begin() as conn:
+                # Check if data already loaded
+                count = conn.execute(
+                    select(func.count()).select_from(Patient.__table__)
+                ).scalar()
+                if count > 0:
+                    system_logger.info(f"Database already contains {count} patients. Skipping load.")
+                    return
+                
+                # Load JSON data
+                patients_data = orjson.loads(Path(json_file_path).read_bytes())
+                
+                # Insert patients in batches of insertmanyvalues_page_size rows per statement
+                rows = [
+                    {column: patient_data[column] for column in PATIENT_COLUMNS}
+                    for patient_data in patients_data
+                ]
+                conn.execute(Patient.__table__.insert(), rows)
             
-            session.commit()
+            self.clear_cache()
             system_logger.info(f"Loaded {len(patients_data)} patients into database")
             
         except Exception as e:
-            session.rollback()
             system_logger.error(f"Error loading patient data: {str(e)}")
             raise
-        finally:
-            session.close()
+    
+    def clear_cache(self):
+        """Drop all cached patient lookups."""
+        with self._cache_lock:
+            self._patient_records = None
+            self._name_index = None
+            self._patients_json = None
+            self._search_cache.clear()
+            self._lookup_cache.clear()
+            self._count_cache.clear()
+    
+    def _patient_snapshot(self) -> Dict[int, dict]:
+        """Get all patient dicts keyed by patient_id, loading them on first use."""
+        records = self._patient_records
+        if records is None:
+            with self._cache_lock:
+                if self._patient_records is None:
+                    session = self.get_session()
+                    try:
+                        rows = session.execute(_ALL_PATIENTS).mappings()
+                        self._patient_records = {row["patient_id"]: dict(row) for row in rows}
+                    finally:
+                        session.close()
+                records = self._patient_records
+        return records
+    
+    def _patient_name_index(self) -> PatientNameIndex:
+        """
+        Get normalized patient names, built once per snapshot.
+        
+        Returns:
+            Name index over the current patient snapshot
+        """
+        index = self._name_index
+        if index is None:
+            records = self._patient_snapshot()
+            with self._cache_lock:
+                if self._name_index is None:
+                    pairs = [
+                        (normalize_name(p["patient_name"]), patient_id)
+                        for patient_id, p in records.items()
+                    ]
+                    exact = {}
+                    for name, patient_id in pairs:
+                        exact.setdefault(name, patient_id)
+                    ordered = sorted(pairs)
+                    self._name_index = PatientNameIndex(
+                        exact=exact,
+                        sorted_names=[name for name, _ in ordered],
+                        sorted_ids=[patient_id for _, patient_id in ordered],
+                        pairs=pairs
+                    )
+                index = self._name_index
+        return index
+    
+    @cachedmethod(lambda self: self._lookup_cache, lock=lambda self: self._cache_lock)
+    def _find_patient_id(self, name_key: str) -> Optional[int]:
+        """Resolve a normalized name to a patient_id."""
+        index = self._patient_name_index()
+        
+        # Exact full-name match first
+        patient_id = index.exact.get(name_key)
+        if patient_id is not None:
+            return patient_id
+        
+        # Then names starting with the query (binary search over the
+        # sorted names), then any name containing it
+        names = index.sorted_names
+        start = bisect_left(names, name_key)
+        end = start
+        while end < len(names) and names[end].startswith(name_key):
+            end += 1
+        if end > start:
+            return min(index.sorted_ids[start:end])
+        return next((pid for name, pid in index.pairs if name_key in name), None)
+    
+    @cachedmethod(
+        lambda self: self._lookup_cache,
+        key=lambda self, name_key, limit: hashkey("match", name_key, limit),
+        lock=lambda self: self._cache_lock
+    )
+    def _match_patient_ids(self, name_key: str, limit: int) -> Tuple[int, ...]:
+        """Resolve a normalized name to every patient_id it may refer to."""
+        if not name_key:
+            return ()
+        index = self._patient_name_index()
+        
+        patient_id = index.exact.get(name_key)
+        if patient_id is not None:
+            return (patient_id,)
+        
+        names = index.sorted_names
+        start = bisect_left(names, name_key)
+        end = start
+        while end < len(names) and names[end].startswith(name_key):
+            end += 1
+        if end > start:
+            return tuple(sorted(index.sorted_ids[start:end])[:limit])
+        return tuple(islice((pid for name, pid in index.pairs if name_key in name), limit))
+    
+    def find_patients_by_name(self, patient_name: str, limit: int = 5) -> List[dict]:
+        """
+        Find the patients a typed name may refer to.
+        
+        Args:
+            patient_name: Patient's name, possibly partial
+            limit: Maximum number of candidates returned
+            
+        Returns:
+            The exact match alone if there is one, otherwise up to `limit`
+            patients whose name starts with or contains the given name
+        """
+        try:
+            snapshot = self._patient_snapshot()
+            patients = [snapshot[pid] for pid in self._match_patient_ids(normalize_name(patient_name), limit)]
+            
+            system_logger.log_database_access(
+                operation="SELECT",
+                table="patients",
+                query=patient_name,
+                result=f"Found {len(patients)} matching patients",
+                success=bool(patients)
+            )
+            return patients
+        except Exception as e:
+            system_logger.log_error("DatabaseError", str(e), {"patient_name": patient_name})
+            return []
     
     def get_patient_by_name(self, patient_name: str) -> Optional[dict]:
         """
@@ -98,22 +458,19 @@ class DatabaseManager:
         Returns:
             Patient data dictionary or None
         """
-        session = self.get_session()
         try:
-            # Case-insensitive search
-            patient = session.query(Patient).filter(
-                Patient.patient_name.ilike(f"%{patient_name}%")
-            ).first()
+            patient_id = self._find_patient_id(normalize_name(patient_name))
+            patient = self._patient_snapshot().get(patient_id)
             
             if patient:
                 system_logger.log_database_access(
                     operation="SELECT",
                     table="patients",
                     query=patient_name,
-                    result=f"Found patient: {patient.patient_name}",
+                    result=f"Found patient: {patient['patient_name']}",
                     success=True
                 )
-                return patient.to_dict()
+                return patient
             else:
                 system_logger.log_database_access(
                     operation="SELECT",
@@ -127,8 +484,6 @@ class DatabaseManager:
         except Exception as e:
             system_logger.log_error("DatabaseError", str(e), {"patient_name": patient_name})
             return None
-        finally:
-            session.close()
     
     def get_all_patients(self) -> List[dict]:
         """
@@ -137,16 +492,65 @@ class DatabaseManager:
         Returns:
             List of patient dictionaries
         """
-        session = self.get_session()
         try:
-            patients = session.query(Patient).all()
-            return [p.to_dict() for p in patients]
+            return list(self._patient_snapshot().values())
+        except Exception as e:
+            system_logger.log_error("DatabaseError", str(e))
+            return []
+    
+    def list_patient_summaries(self) -> List[dict]:
+        """
+        Get the id, name and diagnosis of every patient.
+        
+        Returns:
+            List of summary dictionaries, without the long free-text fields
+        """
+        try:
+            records = self._patient_records
+            if records is not None:
+                return [
+                    {key: p[key] for key in ("patient_id", "patient_name", "primary_diagnosis")}
+                    for p in records.values()
+                ]
+            
+            # Project only the summary columns instead of hydrating full rows
+            session = self.get_session()
+            try:
+                return [dict(row) for row in session.execute(_PATIENT_SUMMARIES).mappings()]
+            finally:
+                session.close()
         except Exception as e:
             system_logger.log_error("DatabaseError", str(e))
             return []
+    
+    @cachedmethod(lambda self: self._count_cache, lock=lambda self: self._cache_lock)
+    def count_patients(self) -> int:
+        """
+        Count patients without loading them.
+        
+        Returns:
+            Number of patients (cached for 30 seconds)
+        """
+        session = self.get_session()
+        try:
+            return session.execute(_COUNT_PATIENTS).scalar()
         finally:
             session.close()
     
+    def get_all_patients_json(self) -> bytes:
+        """
+        Get all patients as a pre-encoded JSON document.
+        
+        Returns:
+            JSON bytes of `{"patients": [...], "count": n}`, encoded once per snapshot
+        """
+        patients_json = self._patients_json
+        if patients_json is None:
+            patients = self.get_all_patients()
+            patients_json = orjson.dumps({"patients": patients, "count": len(patients)})
+            self._patients_json = patients_json
+        return patients_json
+    
     def search_patients(self, search_term: str) -> List[dict]:
         """
         Search patients by name or diagnosis.
@@ -157,12 +561,8 @@ class DatabaseManager:
         Returns:
             List of matching patient dictionaries
         """
-        session = self.get_session()
         try:
-            patients = session.query(Patient).filter(
-                (Patient.patient_name.ilike(f"%{search_term}%")) |
-                (Patient.primary_diagnosis.ilike(f"%{search_term}%"))
-            ).all()
+            patients = self._search(search_term.lower())
             
             system_logger.log_database_access(
                 operation="SEARCH",
@@ -172,10 +572,21 @@ class DatabaseManager:
                 success=True
             )
             
-            return [p.to_dict() for p in patients]
+            return patients
         except Exception as e:
             system_logger.log_error("DatabaseError", str(e), {"search_term": search_term})
             return []
+    
+    @cachedmethod(lambda self: self._search_cache, lock=lambda self: self._cache_lock)
+    def _search(self, term_key: str) -> List[dict]:
+        """Query patients whose name or diagnosis contains the (lowercased) term."""
+        session = self.get_session()
+        try:
+            if self._use_fts(term_key):
+                result = session.execute(_SEARCH_PATIENTS_FTS, {"query": self._fts_query(term_key)})
+            else:
+                result = session.execute(_SEARCH_PATIENTS_LIKE, {"pattern": f"%{term_key}%"})
+            return [dict(row) for row in result.mappings()]
         finally:
             session.close()
     
@@ -189,7 +600,7 @@ class DatabaseManager:
         metadata: Optional[dict] = None
     ):
         """
-        Log a patient interaction.
+        Queue a patient interaction to be written by the background writer.
         
         Args:
             session_id: Session identifier
@@ -199,23 +610,57 @@ class DatabaseManager:
             message: Message content
             metadata: Additional metadata
         """
-        session = self.get_session()
-        try:
-            interaction = Interaction(
-                session_id=session_id,
-                patient_name=patient_name,
-                agent=agent,
-                message_type=message_type,
-                message=message,
-                metadata=metadata or {}
-            )
-            session.add(interaction)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            system_logger.log_error("DatabaseError", str(e))
-        finally:
-            session.close()
+        self._start_interaction_writer()
+        self._interaction_queue.put_nowait({
+            "session_id": session_id,
+            "patient_name": patient_name,
+            "timestamp": datetime.utcnow(),
+            "agent": agent,
+            "message_type": message_type,
+            "message": message,
+            "meta_data": metadata or {}
+        })
+    
+    def flush_interactions(self):
+        """Block until all queued interactions have been written."""
+        if self._interaction_writer is not None:
+            self._interaction_queue.join()
+    
+    def _start_interaction_writer(self):
+        """Start the background interaction writer on first use."""
+        if self._interaction_writer is not None:
+            return
+        with self._writer_lock:
+            if self._interaction_writer is None:
+                self._interaction_writer = Thread(
+                    target=self._write_interactions_loop,
+                    name="interaction-writer",
+                    daemon=True
+                )
+                self._interaction_writer.start()
+                atexit.register(self.flush_interactions)
+    
+    def _write_interactions_loop(self):
+        """Write queued interactions, batching whatever has accumulated."""
+        while True:
+            batch = [self._interaction_queue.get()]
+            while len(batch) < self.interaction_batch_size:
+                try:
+                    batch.append(self._interaction_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            session = self.get_session()
+            try:
+                session.bulk_insert_mappings(Interaction, batch)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                system_logger.log_error("DatabaseError", str(e), {"dropped_interactions": len(batch)})
+            finally:
+                session.close()
+                for _ in batch:
+                    self._interaction_queue.task_done()
     
     def get_session_history(self, session_id: str) -> List[dict]:
         """
@@ -227,26 +672,74 @@ class DatabaseManager:
         Returns:
             List of interaction dictionaries
         """
-        session = self.get_session()
         try:
-            interactions = session.query(Interaction).filter(
-                Interaction.session_id == session_id
-            ).order_by(Interaction.timestamp).all()
-            
-            return [i.to_dict() for i in interactions]
+            return list(self.iter_session_history(session_id))
         except Exception as e:
             system_logger.log_error("DatabaseError", str(e))
             return []
+    
+    def iter_session_history(self, session_id: str, batch_size: int = 200) -> Iterator[dict]:
+        """
+        Iterate over a session's interactions without loading them all at once.
+        
+        Args:
+            session_id: Session identifier
+            batch_size: Number of rows fetched from the database at a time
+            
+        Yields:
+            Interaction dictionaries in time order
+        """
+        # Make sure interactions still in the queue are included
+        self.flush_interactions()
+        
+        # Dedicated session: iteration may span threads and outlive the
+        # calling thread's scoped session
+        session = self.SessionLocal.session_factory()
+        try:
+            rows = session.execute(
+                _SESSION_HISTORY,
+                {"session_id": session_id},
+                execution_options={"yield_per": batch_size}
+            ).mappings()
+            
+            for row in rows:
+                interaction = dict(row)
+                interaction["timestamp"] = interaction["timestamp"].isoformat()
+                yield interaction
         finally:
             session.close()
+    
+    def stream_session_history_json(self, session_id: str) -> Iterator[bytes]:
+        """
+        Encode a session's interaction history as a stream of JSON chunks.
+        
+        Args:
+            session_id: Session identifier
+            
+        Yields:
+            Pieces of a `{"session_id": ..., "interactions": [...]}` JSON document
+        """
+        yield b'{"session_id":' + orjson.dumps(session_id) + b',"interactions":['
+        separator = b""
+        try:
+            for interaction in self.iter_session_history(session_id):
+                yield separator + orjson.dumps(interaction)
+                separator = b","
+        except Exception as e:
+            system_logger.log_error("DatabaseError", str(e), {"session_id": session_id})
+        yield b"]}"
 
 
 # Global database manager instance
 db_manager = None
+_db_manager_lock = Lock()
 
 def get_db_manager(database_url: str = "sqlite:///./data/patients.db") -> DatabaseManager:
     """Get or create database manager instance."""
     global db_manager
     if db_manager is None:
-        db_manager = DatabaseManager(database_url)
+        # Double-checked so concurrent first calls share one engine
+        with _db_manager_lock:
+            if db_manager is None:
+                db_manager = DatabaseManager(database_url)
     return db_manager
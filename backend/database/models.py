@@ -2,68 +2,82 @@
 Database models for patient records and interactions.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+import json
+import msgpack
 
 Base = declarative_base()
 
 
+class MsgpackType(TypeDecorator):
+    """
+    Stores JSON-compatible values as msgpack-encoded binary.
+    Values written by older versions as JSON text are still readable.
+    """
+    
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        """Encode a value for storage."""
+        if value is None:
+            return None
+        return msgpack.packb(value, use_bin_type=True)
+    
+    def process_result_value(self, value, dialect):
+        """Decode a stored value."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return json.loads(value)
+        return msgpack.unpackb(value, raw=False)
+
+
 class Patient(Base):
     """Patient discharge report model."""
     
     __tablename__ = "patients"
+    __table_args__ = (
+        # Trigram index for `ilike '%term%'` searches on PostgreSQL; SQLite
+        # uses the patients_fts table created by DatabaseManager instead
+        Index(
+            "ix_patient_name_trgm",
+            "patient_name",
+            postgresql_using="gin",
+            postgresql_ops={"patient_name": "gin_trgm_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, unique=True, index=True)
     patient_name = Column(String, index=True)
     discharge_date = Column(String)
     primary_diagnosis = Column(String)
-    medications = Column(JSON)  # List of medications
+    medications = Column(MsgpackType)  # List of medications
     dietary_restrictions = Column(Text)
     follow_up = Column(Text)
     warning_signs = Column(Text)
     discharge_instructions = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
-    
-    def to_dict(self):
-        """Convert patient record to dictionary."""
-        return {
-            "patient_id": self.patient_id,
-            "patient_name": self.patient_name,
-            "discharge_date": self.discharge_date,
-            "primary_diagnosis": self.primary_diagnosis,
-            "medications": self.medications,
-            "dietary_restrictions": self.dietary_restrictions,
-            "follow_up": self.follow_up,
-            "warning_signs": self.warning_signs,
-            "discharge_instructions": self.discharge_instructions
-        }
 
 
 class Interaction(Base):
     """Patient interaction log model."""
     
     __tablename__ = "interactions"
+    __table_args__ = (
+        # Session history is filtered by session and read in time order
+        Index("ix_interaction_session_timestamp", "session_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, index=True)
+    session_id = Column(String)
     patient_name = Column(String, index=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     agent = Column(String)  # receptionist or clinical
     message_type = Column(String)  # user_input, agent_response, handoff
     message = Column(Text)
-    meta_data = Column(JSON)  # Renamed from metadata to avoid SQLAlchemy reserved word
-    
-    def to_dict(self):
-        """Convert interaction to dictionary."""
-        return {
-            "id": self.id,
-            "session_id": self.session_id,
-            "patient_name": self.patient_name,
-            "timestamp": self.timestamp.isoformat(),
-            "agent": self.agent,
-            "message_type": self.message_type,
-            "message": self.message,
-            "metadata": self.meta_data
-        }
+    meta_data = Column(MsgpackType)  # Renamed from metadata to avoid SQLAlchemy reserved word
@@ -2,24 +2,46 @@
 FastAPI backend for Post Discharge Medical AI Assistant.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
-from datetime import datetime
+import asyncio
+import json
 
 from .agents.agent_graph import create_multi_agent_system
 from .database.database import get_db_manager
 from .rag.vector_store_openai import get_vector_store  # Using OpenAI embeddings
 from .utils.logger import system_logger
-from .config import settings
+from .utils.clock import now_iso
+from .config import get_settings
+
+class ResponseCompressionMiddleware(GZipMiddleware):
+    """
+    Gzip middleware that leaves Server-Sent Event streams uncompressed,
+    since the compressor would hold back tokens until its buffer fills.
+    """
+    
+    def __init__(self, app, exclude_paths: tuple = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = frozenset(exclude_paths)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Post Discharge Medical AI Assistant",
     description="Multi-agent AI system for post-discharge patient care",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -31,11 +53,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress patient and history payloads; their clinical text compresses well
+app.add_middleware(
+    ResponseCompressionMiddleware,
+    minimum_size=1024,
+    compresslevel=5,
+    exclude_paths=("/chat/stream", "/status/stream")
+)
+
 # Global instances
 multi_agent_system = None
 db_manager = None
 vector_store = None
 
+# Set once reference materials are indexed in the background
+app.state.rag_ready = False
+app.state.indexing_task = None
+
+# /status/stream checks for changes this often, and sends a comment line
+# when nothing changed for a while so proxies keep the connection open
+STATUS_STREAM_CHECK_INTERVAL = 5
+STATUS_STREAM_HEARTBEAT = 30
+
+# Reply sent while the knowledge base is still being indexed
+RAG_LOADING_MESSAGE = (
+    "The medical knowledge base is still loading. "
+    "Please try again in a few moments."
+)
+
 
 # Pydantic models
 class ChatMessage(BaseModel):
@@ -63,6 +108,41 @@ class SystemStatus(BaseModel):
     database_patients: int
     vector_store_documents: int
     environment: str
+    rag_ready: bool
+
+
+def index_reference_materials():
+    """Index the nephrology reference if the vector store is empty."""
+    try:
+        stats = vector_store.get_collection_stats()
+        if stats.get("count", 0) == 0:
+            system_logger.info("Indexing nephrology reference materials...")
+            
+            # Try PDF first, then fallback to text file
+            from pathlib import Path
+            pdf_file = Path("./knowledge base for RAG/comprehensive-clinical-nephrology.pdf")
+            txt_file = Path("./data/nephrology_reference.txt")
+            
+            if pdf_file.exists():
+                system_logger.info("Using PDF reference (comprehensive clinical nephrology)")
+                vector_store.index_document(
+                    str(pdf_file),
+                    metadata={"type": "reference", "subject": "nephrology", "format": "pdf"}
+                )
+            elif txt_file.exists():
+                system_logger.info("Using text reference")
+                vector_store.index_document(
+                    str(txt_file),
+                    metadata={"type": "reference", "subject": "nephrology", "format": "txt"}
+                )
+            else:
+                system_logger.warning("No reference materials found")
+            vector_store.flush()
+    except Exception as e:
+        system_logger.warning("Could not index reference materials: {}", e)
+    finally:
+        app.state.rag_ready = True
+        system_logger.info("Reference materials ready")
 
 
 @app.on_event("startup")
@@ -81,39 +161,14 @@ async def startup_event():
         try:
             db_manager.load_patient_data("./data/patient_reports.json")
         except Exception as e:
-            system_logger.warning(f"Could not load patient data: {e}")
+            system_logger.warning("Could not load patient data: {}", e)
         
         # Initialize vector store
         system_logger.info("Initializing vector store...")
         vector_store = get_vector_store()
         
-        # Index nephrology reference if not already indexed
-        try:
-            stats = vector_store.get_collection_stats()
-            if stats.get("count", 0) == 0:
-                system_logger.info("Indexing nephrology reference materials...")
-                
-                # Try PDF first, then fallback to text file
-                from pathlib import Path
-                pdf_file = Path("./knowledge base for RAG/comprehensive-clinical-nephrology.pdf")
-                txt_file = Path("./data/nephrology_reference.txt")
-                
-                if pdf_file.exists():
-                    system_logger.info("Using PDF reference (comprehensive clinical nephrology)")
-                    vector_store.index_document(
-                        str(pdf_file),
-                        metadata={"type": "reference", "subject": "nephrology", "format": "pdf"}
-                    )
-                elif txt_file.exists():
-                    system_logger.info("Using text reference")
-                    vector_store.index_document(
-                        str(txt_file),
-                        metadata={"type": "reference", "subject": "nephrology", "format": "txt"}
-                    )
-                else:
-                    system_logger.warning("No reference materials found")
-        except Exception as e:
-            system_logger.warning(f"Could not index reference materials: {e}")
+        # Index reference materials without holding up startup
+        app.state.indexing_task = asyncio.create_task(asyncio.to_thread(index_reference_materials))
         
         # Initialize multi-agent system
         system_logger.info("Initializing multi-agent system...")
@@ -139,33 +194,75 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": now_iso()}
+
+
+def get_status() -> Dict[str, Any]:
+    """
+    Collect the system status.
+    
+    Returns:
+        Status dictionary in the shape of SystemStatus
+    """
+    # Both counts are cached briefly by their managers
+    return {
+        "status": "operational",
+        "database_patients": db_manager.count_patients(),
+        "vector_store_documents": vector_store.count_documents(),
+        "environment": get_settings().environment,
+        "rag_ready": app.state.rag_ready
+    }
 
 
-@app.get("/status", response_model=SystemStatus)
-async def system_status():
+@app.get("/status", responses={200: {"model": SystemStatus}})
+def system_status():
     """Get system status."""
     try:
-        # Get database stats
-        patients = db_manager.get_all_patients()
-        patient_count = len(patients)
-        
-        # Get vector store stats
-        vs_stats = vector_store.get_collection_stats()
-        doc_count = vs_stats.get("count", 0)
-        
-        return SystemStatus(
-            status="operational",
-            database_patients=patient_count,
-            vector_store_documents=doc_count,
-            environment=settings.environment
-        )
+        return ORJSONResponse(get_status())
     except Exception as e:
         system_logger.log_error("StatusError", str(e))
         raise HTTPException(status_code=500, detail="Error getting system status")
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.get("/status/stream")
+async def system_status_stream(request: Request):
+    """
+    Stream system status as Server-Sent Events.
+    
+    The current status is sent on connect, then again only when it changes,
+    so clients can show live metrics without polling /status.
+    
+    Args:
+        request: Incoming request, checked for client disconnects
+        
+    Returns:
+        Streaming response of SSE events
+    """
+    async def event_stream():
+        last_status = None
+        idle = 0
+        while not await request.is_disconnected():
+            try:
+                status = await asyncio.to_thread(get_status)
+            except Exception as e:
+                system_logger.log_error("StatusError", str(e))
+                status = last_status
+            
+            if status != last_status:
+                yield f"data: {json.dumps(status)}\n\n"
+                last_status = status
+                idle = 0
+            elif idle >= STATUS_STREAM_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                idle = 0
+            
+            await asyncio.sleep(STATUS_STREAM_CHECK_INTERVAL)
+            idle += STATUS_STREAM_CHECK_INTERVAL
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.post("/chat", responses={200: {"model": ChatResponse}})
 async def chat(message: ChatMessage):
     """
     Process a chat message.
@@ -177,26 +274,77 @@ async def chat(message: ChatMessage):
         Chat response from agent
     """
     try:
-        system_logger.info(f"Received chat message: {message.message[:50]}...")
+        system_logger.info("Received chat message: {:.50}...", message.message)
+        
+        if not app.state.rag_ready:
+            return ORJSONResponse({
+                "response": RAG_LOADING_MESSAGE,
+                "session_id": multi_agent_system.session_id,
+                "agent": "system",
+                "timestamp": now_iso()
+            })
         
         # Process message through multi-agent system
-        response = multi_agent_system.process_message(message.message)
+        response = await multi_agent_system.process_message(message.message)
         
         # Get current agent
-        current_agent = multi_agent_system.state.get("current_agent", "receptionist")
+        current_agent = multi_agent_system.get_state().get("current_agent", "receptionist")
         
-        return ChatResponse(
-            response=response,
-            session_id=multi_agent_system.session_id,
-            agent=current_agent,
-            timestamp=datetime.now().isoformat()
-        )
+        return ORJSONResponse({
+            "response": response,
+            "session_id": multi_agent_system.session_id,
+            "agent": current_agent,
+            "timestamp": now_iso()
+        })
         
     except Exception as e:
         system_logger.log_error("ChatError", f"Error processing chat: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing message")
 
 
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """
+    Process a chat message and stream the response as Server-Sent Events.
+    
+    Each text chunk is sent as a `data` event; a final `done` event carries
+    the complete response in the same shape as /chat.
+    
+    Args:
+        message: Chat message from user
+        
+    Returns:
+        Streaming response of SSE events
+    """
+    system_logger.info("Received streaming chat message: {:.50}...", message.message)
+    
+    async def event_stream():
+        if not app.state.rag_ready:
+            final = ChatResponse(
+                response=RAG_LOADING_MESSAGE,
+                session_id=multi_agent_system.session_id,
+                agent="system",
+                timestamp=now_iso()
+            )
+            yield f"data: {json.dumps({'token': RAG_LOADING_MESSAGE})}\n\n"
+            yield f"event: done\ndata: {final.model_dump_json()}\n\n"
+            return
+        
+        async for chunk in multi_agent_system.stream_message(message.message):
+            yield f"data: {json.dumps({'token': chunk})}\n\n"
+        
+        state = multi_agent_system.get_state()
+        final = ChatResponse(
+            response=state.get("response", ""),
+            session_id=multi_agent_system.session_id,
+            agent=state.get("current_agent", "receptionist"),
+            timestamp=now_iso()
+        )
+        yield f"event: done\ndata: {final.model_dump_json()}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/reset")
 async def reset_session():
     """Reset the current session."""
@@ -212,10 +360,22 @@ async def reset_session():
 
 
 @app.get("/patients")
-async def get_patients():
+def get_patients():
     """Get all patients."""
     try:
-        patients = db_manager.get_all_patients()
+        # Encoded once per patient snapshot rather than on every request
+        patients_json = db_manager.get_all_patients_json()
+        return Response(content=patients_json, media_type="application/json")
+    except Exception as e:
+        system_logger.log_error("PatientsError", str(e))
+        raise HTTPException(status_code=500, detail="Error retrieving patients")
+
+
+@app.get("/patients/summaries")
+def get_patient_summaries():
+    """Get the id, name and diagnosis of all patients."""
+    try:
+        patients = db_manager.list_patient_summaries()
         return {"patients": patients, "count": len(patients)}
     except Exception as e:
         system_logger.log_error("PatientsError", str(e))
@@ -223,7 +383,7 @@ async def get_patients():
 
 
 @app.post("/patient")
-async def get_patient(query: PatientQuery):
+def get_patient(query: PatientQuery):
     """Get a specific patient by name."""
     try:
         patient = db_manager.get_patient_by_name(query.patient_name)
@@ -248,7 +408,7 @@ async def get_conversation_history():
             formatted_history.append({
                 "role": "user" if msg.type == "human" else "assistant",
                 "content": msg.content,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": now_iso()
             })
         
         return {
@@ -260,6 +420,15 @@ async def get_conversation_history():
         raise HTTPException(status_code=500, detail="Error retrieving history")
 
 
+@app.get("/sessions/{session_id}/interactions")
+def get_session_interactions(session_id: str):
+    """Stream the logged interactions of a session as JSON."""
+    return StreamingResponse(
+        db_manager.stream_session_history_json(session_id),
+        media_type="application/json"
+    )
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -5,21 +5,27 @@ This version works WITHOUT requiring OpenAI API key.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-import uuid
+from typing import Optional, Dict
+from cachetools import LRUCache
+import os
+import re
+import secrets
 
 from .database.database import get_db_manager
 from .utils.logger import system_logger
-from .utils.pdf_generator import generate_patient_pdf
+from .utils.clock import now_iso, today_stamp
+from .utils.session_store import create_session_store
+from .utils.pdf_generator import aget_patient_pdf_path
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Post Discharge Medical AI Assistant (Demo Mode)",
     description="Multi-agent AI system demo with simulated responses",
-    version="1.0.0-demo"
+    version="1.0.0-demo",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -31,9 +37,174 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Keywords that route a follow-up question to the Clinical AI Agent
+MEDICAL_KEYWORDS = [
+    "swelling", "pain", "worried", "symptom", "medication",
+    "treatment", "kidney", "disease", "research", "study"
+]
+
+# Clinical intent signalled by a keyword; other medical keywords get the
+# general answer. When several intents match, the earliest in
+# INTENT_PRIORITY wins.
+INTENT_FOR_KEYWORD = {
+    "swelling": "swelling",
+    "research": "research",
+    "study": "research",
+    "latest": "research"
+}
+INTENT_PRIORITY = ("swelling", "research", "general")
+
+# Single alternation scanned once per message (messages are lowercased)
+_KEYWORD_RE = re.compile("|".join(map(re.escape, [*MEDICAL_KEYWORDS, *INTENT_FOR_KEYWORD])))
+_MEDICAL_KEYWORD_SET = frozenset(MEDICAL_KEYWORDS)
+
+# Response templates, filled in with the patient's discharge report fields
+GREETING_RESPONSE = "👋 Hello! I'm your post-discharge care assistant. I'm here to help you with your recovery. What's your name?"
+
+WELCOME_TEMPLATE = (
+    "Great to see you, {patient_name}! 👋\n\n"
+    "I've pulled up your discharge report from {discharge_date}. I see you were treated for {primary_diagnosis}.\n\n"
+    "Let me share what's important for your recovery:\n\n"
+    "💊 **Your Medications:**\n"
+    "{medication_lines}"
+    "\n🥗 **Diet to Follow:** {dietary_restrictions}\n"
+    "\n📅 **Your Next Appointment:** {follow_up}\n\n"
+    "So, how have you been feeling since you got home? Any concerns about your medications or anything else I can help with?"
+)
+
+PATIENT_NOT_FOUND_TEMPLATE = (
+    "Hmm, I'm not finding '{patient_name}' in our records. Could you double-check the spelling for me?\n\n"
+    "Just to help, some of our patients include John Smith, Sarah Johnson, Michael Chen, and Emily Rodriguez. Does any of those sound right?"
+)
+
+SWELLING_TEMPLATE = (
+    "I understand your concern about the leg swelling. Let me help you understand what might be happening.\n\n"
+    "With {primary_diagnosis}, leg swelling is actually quite common. It usually happens when your body retains extra fluid and sodium. Think of it like water pooling in your legs because your kidneys aren't filtering as efficiently as they should.\n\n"
+    "📚 **Here's what the medical guidelines tell us:**\n"
+    "For patients like you, managing swelling involves a few key things:\n"
+    "   • Sticking to your fluid limits ({dietary_restrictions})\n"
+    "   • Keeping sodium intake low\n"
+    "   • Weighing yourself daily to track changes\n"
+    "   • Taking your diuretic medication as prescribed\n\n"
+    "💊 Speaking of which, I see you're taking {diuretic}. That's actually designed to help your body get rid of excess fluid, which should help with the swelling.\n\n"
+    "⚠️ **When to call your doctor right away:**\n{warning_signs}\n\n"
+    "If your swelling is new, getting worse, or you're having trouble breathing, don't wait—call your healthcare provider immediately.\n\n"
+    "💙 *Remember, I'm here to provide information, but your doctor knows your specific situation best. Always reach out to them with concerns.*"
+)
+
+RESEARCH_TEMPLATE = (
+    "Great question! SGLT2 inhibitors are actually one of the most exciting developments in kidney disease treatment. Let me find the latest research for you...\n\n"
+    "🔬 **Here's what recent studies are showing:**\n\n"
+    "The research is really promising! There have been some major clinical trials:\n\n"
+    "**DAPA-CKD Trial (2020):** This study found that dapagliflozin significantly slowed down kidney disease progression. Patients taking it had better outcomes compared to those who didn't.\n\n"
+    "**CREDENCE Study:** Another big one—canagliflozin reduced the risk of kidney failure by about 30%. That's a substantial improvement!\n\n"
+    "**Current Medical Guidelines:** Because of these results, SGLT2 inhibitors are now recommended for CKD patients, especially those with diabetes.\n\n"
+    "💭 **What this means for you:**\n"
+    "Given your {primary_diagnosis}, these medications could potentially be beneficial. However, every patient is different, and your nephrologist will need to evaluate if they're right for your specific situation.\n\n"
+    "I'd suggest bringing this up at your next appointment on {follow_up}. Your doctor can discuss whether adding an SGLT2 inhibitor to your treatment plan makes sense.\n\n"
+    "🌐 *Based on recent medical literature and clinical trials*\n\n"
+    "💙 *This is educational information to help you have informed conversations with your healthcare team.*"
+)
+
+GENERAL_MEDICAL_TEMPLATE = (
+    "I'm glad you're asking about this! Let me share some guidance based on your condition.\n\n"
+    "For managing {primary_diagnosis}, here are the key things to focus on:\n\n"
+    "   • **Stay consistent with your medications** - They're working behind the scenes to protect your kidneys\n"
+    "   • **Follow your diet plan** - What you eat really does make a difference\n"
+    "   • **Keep track of how you're feeling** - Notice any changes and report them\n"
+    "   • **Make healthy lifestyle choices** - Small changes add up over time\n\n"
+    "Your doctor specifically mentioned: {discharge_instructions}\n\n"
+    "Is there anything specific you'd like to know more about? I'm here to help! 💙"
+)
+
+FOLLOW_UP_TEMPLATE = (
+    "That's wonderful to hear! 😊\n\n"
+    "Just a friendly reminder of the important things:\n\n"
+    "   • {discharge_instructions}\n"
+    "   • Keep an eye out for: {warning_signs}\n"
+    "   • Don't forget your appointment: {follow_up}\n\n"
+    "If you have any medical questions or something's worrying you, just let me know. I'm here to help!"
+)
+
+FALLBACK_RESPONSE = "I'm here to help! How can I assist you today?"
+
+# Rendered replies per patient report, keyed by (patient_id, discharge_date)
+_patient_responses_cache = LRUCache(maxsize=1024)
+
+
+def patient_responses(patient: dict) -> Dict[str, str]:
+    """
+    Get the demo replies for a patient, rendering them on first use.
+    
+    Args:
+        patient: Patient discharge report
+        
+    Returns:
+        Reply text keyed by intent: welcome, swelling, research, general, follow_up
+    """
+    key = (patient["patient_id"], patient["discharge_date"])
+    responses = _patient_responses_cache.get(key)
+    if responses is None:
+        medications = patient["medications"]
+        responses = {
+            "welcome": WELCOME_TEMPLATE.format(
+                **patient,
+                medication_lines="".join(f"   • {med}\n" for med in medications)
+            ),
+            "swelling": SWELLING_TEMPLATE.format(
+                **patient,
+                diuretic=medications[1] if len(medications) > 1 else "diuretic medication"
+            ),
+            "research": RESEARCH_TEMPLATE.format(**patient),
+            "general": GENERAL_MEDICAL_TEMPLATE.format(**patient),
+            "follow_up": FOLLOW_UP_TEMPLATE.format(**patient)
+        }
+        _patient_responses_cache[key] = responses
+    return responses
+
+
+
+def _symptom_events(message: str) -> list:
+    """Events for the simulated handoff and retrieval of a symptom question."""
+    return [
+        {
+            "type": "agent_handoff",
+            "from_agent": "Receptionist Agent",
+            "to_agent": "Clinical AI Agent",
+            "reason": "Medical query about symptoms"
+        },
+        {
+            "type": "rag_retrieval",
+            "query": message,
+            "num_results": 3,
+            "sources": ["nephrology_reference.txt"],
+            "success": True
+        }
+    ]
+
+
+def _research_events(message: str) -> list:
+    """Events for the simulated web search of a research question."""
+    return [
+        {
+            "type": "web_search",
+            "query": message,
+            "search_engine": "simulated",
+            "num_results": 3,
+            "success": True
+        }
+    ]
+
+
+# Events recorded for intents that simulate a tool call
+INTENT_EVENTS = {
+    "swelling": _symptom_events,
+    "research": _research_events
+}
+
 # Global instances
 db_manager = None
-conversation_state = {}
+session_store = None
 
 
 # Pydantic models
@@ -67,7 +238,7 @@ class SystemStatus(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize system on startup."""
-    global db_manager
+    global db_manager, session_store
     
     try:
         system_logger.info("Starting Post Discharge Medical AI Assistant (Demo Mode)...")
@@ -82,6 +253,10 @@ async def startup_event():
         except Exception as e:
             system_logger.warning(f"Could not load patient data: {e}")
         
+        # Conversation state lives in Redis when REDIS_URL is set, so the
+        # app can run with several workers
+        session_store = create_session_store(os.getenv("REDIS_URL"))
+        
         system_logger.info("✅ System startup complete (Demo Mode)!")
         system_logger.info("Note: Using simulated AI responses - no API key required")
         
@@ -90,6 +265,13 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release resources on shutdown."""
+    if session_store is not None:
+        await session_store.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -104,188 +286,131 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": now_iso()}
 
 
-@app.get("/status", response_model=SystemStatus)
-async def system_status():
+@app.get("/status", responses={200: {"model": SystemStatus}})
+def system_status():
     """Get system status."""
     try:
-        patients = db_manager.get_all_patients()
-        patient_count = len(patients)
+        patient_count = db_manager.count_patients()
         
-        return SystemStatus(
-            status="operational (demo mode)",
-            database_patients=patient_count,
-            vector_store_documents=150,  # Simulated
-            environment="demo"
-        )
+        return ORJSONResponse({
+            "status": "operational (demo mode)",
+            "database_patients": patient_count,
+            "vector_store_documents": 150,  # Simulated
+            "environment": "demo"
+        })
     except Exception as e:
         system_logger.log_error("StatusError", str(e))
         raise HTTPException(status_code=500, detail="Error getting system status")
 
 
-@app.post("/chat", response_model=ChatResponse)
+@app.post("/chat", responses={200: {"model": ChatResponse}})
 async def chat(message: ChatMessage):
     """
     Process a chat message with simulated multi-agent workflow.
     """
     try:
         # Create or get session
-        session_id = message.session_id or str(uuid.uuid4())
-        if session_id not in conversation_state:
-            conversation_state[session_id] = {
+        session_id = message.session_id or secrets.token_hex(16)
+        state = await session_store.get(session_id)
+        if state is None:
+            state = {
                 "stage": "greeting",
                 "patient_name": None,
                 "patient_data": None
             }
         
-        state = conversation_state[session_id]
-        user_message = message.message.lower().strip()
+        # Normalize the message once; the raw text is kept for logging
+        raw_message = message.message
+        stripped_message = raw_message.strip()
+        lower_message = stripped_message.lower()
         
-        system_logger.info(f"[Session {session_id[:8]}] User: {message.message}")
+        # Everything that happens in this turn is logged as one record
+        events = []
         
         # STAGE 1: Greeting (Receptionist Agent)
         if state["stage"] == "greeting":
-            response = "👋 Hello! I'm your post-discharge care assistant. I'm here to help you with your recovery. What's your name?"
+            response = GREETING_RESPONSE
             agent = "Receptionist Agent"
             state["stage"] = "awaiting_name"
         
         # STAGE 2: Get patient name and retrieve data (Receptionist Agent)
         elif state["stage"] == "awaiting_name":
             # Extract potential name from message
-            patient_name = message.message.strip()
+            patient_name = stripped_message
             
             # Try to find patient in database
-            patient = db_manager.get_patient_by_name(patient_name)
+            patient = await run_in_threadpool(db_manager.get_patient_by_name, patient_name)
             
             if patient:
                 state["patient_name"] = patient["patient_name"]
                 state["patient_data"] = patient
                 state["stage"] = "patient_identified"
                 
-                response = f"Great to see you, {patient['patient_name']}! 👋\n\n"
-                response += f"I've pulled up your discharge report from {patient['discharge_date']}. I see you were treated for {patient['primary_diagnosis']}.\n\n"
-                response += f"Let me share what's important for your recovery:\n\n"
-                response += f"💊 **Your Medications:**\n"
-                for med in patient['medications']:
-                    response += f"   • {med}\n"
-                response += f"\n🥗 **Diet to Follow:** {patient['dietary_restrictions']}\n"
-                response += f"\n📅 **Your Next Appointment:** {patient['follow_up']}\n\n"
-                response += "So, how have you been feeling since you got home? Any concerns about your medications or anything else I can help with?"
+                response = patient_responses(patient)["welcome"]
                 agent = "Receptionist Agent"
                 
-                system_logger.log_database_access(
-                    operation="SELECT",
-                    table="patients",
-                    query=patient_name,
-                    result=f"Found patient: {patient_name}",
-                    success=True
-                )
+                events.append({
+                    "type": "database_access",
+                    "operation": "SELECT",
+                    "table": "patients",
+                    "query": patient_name,
+                    "result": f"Found patient: {patient_name}",
+                    "success": True
+                })
             else:
-                response = f"Hmm, I'm not finding '{patient_name}' in our records. Could you double-check the spelling for me?\n\nJust to help, some of our patients include John Smith, Sarah Johnson, Michael Chen, and Emily Rodriguez. Does any of those sound right?"
+                response = PATIENT_NOT_FOUND_TEMPLATE.format(patient_name=patient_name)
                 agent = "Receptionist Agent"
                 state["stage"] = "awaiting_name"  # Stay in same stage
         
         # STAGE 3: Handle follow-up questions (Route to Clinical Agent for medical queries)
         elif state["stage"] == "patient_identified":
             patient = state["patient_data"]
+            responses = patient_responses(patient)
             
-            # Check if it's a medical question
-            medical_keywords = ["swelling", "pain", "worried", "symptom", "medication", "treatment", "kidney", "disease", "research", "study"]
-            is_medical_query = any(keyword in user_message for keyword in medical_keywords)
+            # Keywords found in one scan decide both routing and intent
+            keywords = set(_KEYWORD_RE.findall(lower_message))
             
-            if is_medical_query:
-                # Route to Clinical Agent
+            if keywords & _MEDICAL_KEYWORD_SET:
+                # Route to Clinical Agent with a simulated RAG or web search answer
                 agent = "Clinical AI Agent"
-                
-                # Simulate RAG response based on patient condition
-                if "swelling" in user_message:
-                    response = f"I understand your concern about the leg swelling. Let me help you understand what might be happening.\n\n"
-                    response += f"With {patient['primary_diagnosis']}, leg swelling is actually quite common. It usually happens when your body retains extra fluid and sodium. Think of it like water pooling in your legs because your kidneys aren't filtering as efficiently as they should.\n\n"
-                    response += f"📚 **Here's what the medical guidelines tell us:**\n"
-                    response += f"For patients like you, managing swelling involves a few key things:\n"
-                    response += f"   • Sticking to your fluid limits ({patient['dietary_restrictions']})\n"
-                    response += f"   • Keeping sodium intake low\n"
-                    response += f"   • Weighing yourself daily to track changes\n"
-                    response += f"   • Taking your diuretic medication as prescribed\n\n"
-                    response += f"💊 Speaking of which, I see you're taking {patient['medications'][1] if len(patient['medications']) > 1 else 'diuretic medication'}. That's actually designed to help your body get rid of excess fluid, which should help with the swelling.\n\n"
-                    response += f"⚠️ **When to call your doctor right away:**\n{patient['warning_signs']}\n\n"
-                    response += f"If your swelling is new, getting worse, or you're having trouble breathing, don't wait—call your healthcare provider immediately.\n\n"
-                    response += f"💙 *Remember, I'm here to provide information, but your doctor knows your specific situation best. Always reach out to them with concerns.*"
-                    
-                    system_logger.log_agent_handoff(
-                        from_agent="Receptionist Agent",
-                        to_agent="Clinical AI Agent",
-                        reason="Medical query about symptoms"
-                    )
-                    system_logger.log_rag_retrieval(
-                        query=message.message,
-                        num_results=3,
-                        sources=["nephrology_reference.txt"],
-                        success=True
-                    )
-                
-                elif "research" in user_message or "study" in user_message or "latest" in user_message:
-                    # Simulate web search
-                    response = f"Great question! SGLT2 inhibitors are actually one of the most exciting developments in kidney disease treatment. Let me find the latest research for you...\n\n"
-                    response += f"🔬 **Here's what recent studies are showing:**\n\n"
-                    response += f"The research is really promising! There have been some major clinical trials:\n\n"
-                    response += f"**DAPA-CKD Trial (2020):** This study found that dapagliflozin significantly slowed down kidney disease progression. Patients taking it had better outcomes compared to those who didn't.\n\n"
-                    response += f"**CREDENCE Study:** Another big one—canagliflozin reduced the risk of kidney failure by about 30%. That's a substantial improvement!\n\n"
-                    response += f"**Current Medical Guidelines:** Because of these results, SGLT2 inhibitors are now recommended for CKD patients, especially those with diabetes.\n\n"
-                    response += f"💭 **What this means for you:**\n"
-                    response += f"Given your {patient['primary_diagnosis']}, these medications could potentially be beneficial. However, every patient is different, and your nephrologist will need to evaluate if they're right for your specific situation.\n\n"
-                    response += f"I'd suggest bringing this up at your next appointment on {patient['follow_up']}. Your doctor can discuss whether adding an SGLT2 inhibitor to your treatment plan makes sense.\n\n"
-                    response += f"🌐 *Based on recent medical literature and clinical trials*\n\n"
-                    response += f"💙 *This is educational information to help you have informed conversations with your healthcare team.*"
-                    
-                    system_logger.log_web_search(
-                        query=message.message,
-                        search_engine="simulated",
-                        num_results=3,
-                        success=True
-                    )
-                
-                else:
-                    # General medical response
-                    response = f"I'm glad you're asking about this! Let me share some guidance based on your condition.\n\n"
-                    response += f"For managing {patient['primary_diagnosis']}, here are the key things to focus on:\n\n"
-                    response += f"   • **Stay consistent with your medications** - They're working behind the scenes to protect your kidneys\n"
-                    response += f"   • **Follow your diet plan** - What you eat really does make a difference\n"
-                    response += f"   • **Keep track of how you're feeling** - Notice any changes and report them\n"
-                    response += f"   • **Make healthy lifestyle choices** - Small changes add up over time\n\n"
-                    response += f"Your doctor specifically mentioned: {patient['discharge_instructions']}\n\n"
-                    response += f"Is there anything specific you'd like to know more about? I'm here to help! 💙"
-            
+                intent = min(
+                    (INTENT_FOR_KEYWORD.get(keyword, "general") for keyword in keywords),
+                    key=INTENT_PRIORITY.index
+                )
+                intent_events = INTENT_EVENTS.get(intent)
+                if intent_events:
+                    events.extend(intent_events(raw_message))
             else:
                 # General follow-up from Receptionist
                 agent = "Receptionist Agent"
-                response = f"That's wonderful to hear! 😊\n\n"
-                response += f"Just a friendly reminder of the important things:\n\n"
-                response += f"   • {patient['discharge_instructions']}\n"
-                response += f"   • Keep an eye out for: {patient['warning_signs']}\n"
-                response += f"   • Don't forget your appointment: {patient['follow_up']}\n\n"
-                response += f"If you have any medical questions or something's worrying you, just let me know. I'm here to help!"
+                intent = "follow_up"
+            
+            response = responses[intent]
         
         else:
-            response = "I'm here to help! How can I assist you today?"
+            response = FALLBACK_RESPONSE
             agent = "Receptionist Agent"
         
-        system_logger.log_interaction(
-            interaction_type="agent_response",
-            agent=agent,
-            message=response,
-            metadata={"session_id": session_id}
-        )
+        await session_store.set(session_id, state)
         
-        return ChatResponse(
-            response=response,
+        system_logger.log_chat_turn(
             session_id=session_id,
+            user_message=raw_message,
             agent=agent,
-            timestamp=datetime.now().isoformat()
+            response=response,
+            events=events
         )
         
+        return ORJSONResponse({
+            "response": response,
+            "session_id": session_id,
+            "agent": agent,
+            "timestamp": now_iso()
+        })
+        
     except Exception as e:
         system_logger.log_error("ChatError", f"Error processing chat: {str(e)}")
         raise HTTPException(status_code=500, detail="Error processing message")
@@ -294,24 +419,24 @@ async def chat(message: ChatMessage):
 @app.post("/reset")
 async def reset_session(session_id: str):
     """Reset a conversation session."""
-    if session_id in conversation_state:
-        del conversation_state[session_id]
+    await session_store.delete(session_id)
     return {"message": "Session reset successfully"}
 
 
 @app.get("/patients")
-async def get_patients():
+def get_patients():
     """Get all patients."""
     try:
-        patients = db_manager.get_all_patients()
-        return {"patients": patients, "count": len(patients)}
+        # Encoded once per patient snapshot rather than on every request
+        patients_json = db_manager.get_all_patients_json()
+        return Response(content=patients_json, media_type="application/json")
     except Exception as e:
         system_logger.log_error("PatientsError", str(e))
         raise HTTPException(status_code=500, detail="Error retrieving patients")
 
 
 @app.post("/patient")
-async def get_patient(query: PatientQuery):
+def get_patient(query: PatientQuery):
     """Get a specific patient by name."""
     try:
         patient = db_manager.get_patient_by_name(query.patient_name)
@@ -330,23 +455,23 @@ async def download_patient_report(query: PatientQuery):
     """Generate and download patient discharge report as PDF."""
     try:
         # Get patient data
-        patient = db_manager.get_patient_by_name(query.patient_name)
+        patient = await run_in_threadpool(db_manager.get_patient_by_name, query.patient_name)
         if patient is None:
             raise HTTPException(status_code=404, detail="Patient not found")
         
-        # Generate PDF
-        pdf_bytes = generate_patient_pdf(patient)
+        # Generate PDF in a worker process (or reuse today's cached copy)
+        pdf_path = await aget_patient_pdf_path(patient)
         
         # Create filename
         safe_name = patient['patient_name'].replace(' ', '_')
-        filename = f"discharge_report_{safe_name}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        filename = f"discharge_report_{safe_name}_{today_stamp()}.pdf"
         
         # Log the action
         system_logger.info(f"Generated PDF report for patient: {patient['patient_name']}")
         
-        # Return PDF as response
-        return Response(
-            content=pdf_bytes,
+        # Stream the PDF file from disk
+        return FileResponse(
+            pdf_path,
             media_type="application/pdf",
             headers={
                 "Content-Disposition": f"attachment; filename={filename}"
@@ -5,9 +5,9 @@ This version starts without requiring vector store initialization.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
 import os
 
 # Set environment variable to skip vector store initialization
@@ -15,12 +15,14 @@ os.environ['SKIP_VECTOR_INIT'] = '1'
 
 from .database.database import get_db_manager
 from .utils.logger import system_logger
+from .utils.clock import now_iso
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Post Discharge Medical AI Assistant",
     description="Multi-agent AI system for post-discharge patient care",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -104,30 +106,29 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": now_iso()}
 
 
-@app.get("/status", response_model=SystemStatus)
-async def system_status():
+@app.get("/status", responses={200: {"model": SystemStatus}})
+def system_status():
     """Get system status."""
     try:
         # Get database stats
-        patients = db_manager.get_all_patients()
-        patient_count = len(patients)
+        patient_count = db_manager.count_patients()
         
-        return SystemStatus(
-            status="operational (simplified mode)",
-            database_patients=patient_count,
-            vector_store_documents=0,
-            environment="development"
-        )
+        return ORJSONResponse({
+            "status": "operational (simplified mode)",
+            "database_patients": patient_count,
+            "vector_store_documents": 0,
+            "environment": "development"
+        })
     except Exception as e:
         system_logger.log_error("StatusError", str(e))
         raise HTTPException(status_code=500, detail="Error getting system status")
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(message: ChatMessage):
+@app.post("/chat", responses={200: {"model": ChatResponse}})
+def chat(message: ChatMessage):
     """
     Process a chat message (simplified - returns demo response).
     """
@@ -139,12 +140,12 @@ async def chat(message: ChatMessage):
         response += "The full AI system with agents and RAG is initializing. "
         response += "For now, you can test the patient database using the /patient endpoint."
         
-        return ChatResponse(
-            response=response,
-            session_id="demo-session",
-            agent="demo",
-            timestamp=datetime.now().isoformat()
-        )
+        return ORJSONResponse({
+            "response": response,
+            "session_id": "demo-session",
+            "agent": "demo",
+            "timestamp": now_iso()
+        })
         
     except Exception as e:
         system_logger.log_error("ChatError", f"Error processing chat: {str(e)}")
@@ -152,18 +153,19 @@ async def chat(message: ChatMessage):
 
 
 @app.get("/patients")
-async def get_patients():
+def get_patients():
     """Get all patients."""
     try:
-        patients = db_manager.get_all_patients()
-        return {"patients": patients, "count": len(patients)}
+        # Encoded once per patient snapshot rather than on every request
+        patients_json = db_manager.get_all_patients_json()
+        return Response(content=patients_json, media_type="application/json")
     except Exception as e:
         system_logger.log_error("PatientsError", str(e))
         raise HTTPException(status_code=500, detail="Error retrieving patients")
 
 
 @app.post("/patient")
-async def get_patient(query: PatientQuery):
+def get_patient(query: PatientQuery):
     """Get a specific patient by name."""
     try:
         patient = db_manager.get_patient_by_name(query.patient_name)
@@ -0,0 +1,96 @@
+"""
+Process-wide embedding models shared by every vector store manager.
+Each backend is loaded once, wrapped in the persistent embedding cache.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+import openai
+
+from langchain_openai import OpenAIEmbeddings
+
+from .embedding_cache import EmbeddingCache
+from ..utils.logger import system_logger
+from ..config import get_settings, shared_http_client, shared_async_http_client
+
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"  # Latest, efficient model
+
+
+def get_embedder(backend: Optional[str] = None) -> EmbeddingCache:
+    """
+    Get the shared embedding model for a backend.
+
+    Args:
+        backend: "openai" or "huggingface"; defaults to settings.embedding_backend
+
+    Returns:
+        Cached embeddings instance, created on first use
+    """
+    return _create_embedder(backend or get_settings().embedding_backend)
+
+
+@lru_cache(maxsize=None)
+def _create_embedder(backend: str) -> EmbeddingCache:
+    """Create the embedding model for a backend (once per process)."""
+    settings = get_settings()
+    if backend == "openai":
+        model = _create_openai_embeddings()
+        namespace = f"openai:{OPENAI_EMBEDDING_MODEL}"
+    elif backend == "huggingface":
+        model = _create_huggingface_embeddings()
+        namespace = f"hf:{settings.embedding_model}"
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+
+    cache_dir = Path(settings.vector_db_path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return EmbeddingCache(
+        model,
+        db_path=cache_dir / "embedding_cache.sqlite3",
+        namespace=namespace
+    )
+
+
+def _create_openai_embeddings() -> OpenAIEmbeddings:
+    """Create OpenAI embeddings on the connection pools shared with the chat models."""
+    settings = get_settings()
+    system_logger.info("Initializing OpenAI embeddings...")
+    return OpenAIEmbeddings(
+        model=OPENAI_EMBEDDING_MODEL,
+        openai_api_key=settings.openai_api_key,
+        client=openai.OpenAI(
+            api_key=settings.openai_api_key,
+            http_client=shared_http_client
+        ).embeddings,
+        async_client=openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=shared_async_http_client
+        ).embeddings
+    )
+
+
+def _create_huggingface_embeddings():
+    """Create local sentence-transformer embeddings on the configured device."""
+    # Imported here so OpenAI-only deployments never load torch
+    import torch
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    system_logger.info("Initializing embeddings model...")
+    settings = get_settings()
+    device = settings.embedding_device
+    if device == "auto":
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = HuggingFaceEmbeddings(
+        model_name=settings.embedding_model,
+        model_kwargs={'device': device},
+        encode_kwargs={
+            'normalize_embeddings': True,
+            'batch_size': settings.embedding_batch_size
+        }
+    )
+    if device.startswith("cuda"):
+        # Half precision roughly doubles GPU throughput for sentence-transformers
+        model.client.half()
+    system_logger.info(f"Embeddings running on {device}")
+    return model
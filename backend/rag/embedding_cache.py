@@ -0,0 +1,160 @@
+"""
+Persistent cache for text embeddings.
+Texts that were embedded before (repeated queries, re-indexed chunks) are
+served from memory or a local SQLite table instead of the embedding model.
+"""
+
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+import hashlib
+import sqlite3
+
+import numpy as np
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+from ..utils.logger import system_logger
+
+
+class EmbeddingCache(Embeddings):
+    """
+    Embeddings wrapper that memoizes vectors by a hash of model and text.
+    Vectors are scalar-quantized to int8 with a per-vector scale, a quarter
+    of their float32 size. Recently used vectors stay in memory; all of them
+    are kept in SQLite so restarts start with a warm cache.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        db_path: Path,
+        namespace: str,
+        max_memory_items: int = 10000
+    ):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            embeddings: Embedding model to delegate cache misses to
+            db_path: SQLite file holding cached vectors
+            namespace: Model identifier mixed into the keys so models never share vectors
+            max_memory_items: Maximum number of vectors kept in memory
+        """
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self._memory = LRUCache(maxsize=max_memory_items)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Earlier float32 entries are dropped in favor of the quantized table
+        self._conn.execute("DROP TABLE IF EXISTS embeddings")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings_i8 (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the model only for texts not cached yet."""
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(missing)
+            found.update(self._store(missing, vectors))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, calling the model only on a cache miss."""
+        keys, found, missing = self._lookup([text])
+        if missing:
+            found.update(self._store(missing, [self.embeddings.embed_query(text)]))
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts asynchronously, calling the model only for texts not cached yet."""
+        keys, found, missing = self._lookup(texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(missing)
+            found.update(self._store(missing, vectors))
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query asynchronously, calling the model only on a cache miss."""
+        keys, found, missing = self._lookup([text])
+        if missing:
+            found.update(self._store(missing, [await self.embeddings.aembed_query(text)]))
+        return found[keys[0]]
+
+    def _key(self, text: str) -> str:
+        """Build the cache key of a text."""
+        return hashlib.sha1(f"{self.namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, texts: List[str]):
+        """
+        Split texts into cached vectors and texts that still need embedding.
+
+        Returns:
+            Tuple of (key per text, vectors found by key, distinct missing texts)
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                blob = self._memory.get(key)
+                if blob is not None:
+                    found[key] = self._dequantize(blob)
+
+            unresolved = list(dict.fromkeys(key for key in keys if key not in found))
+            if unresolved:
+                try:
+                    placeholders = ",".join("?" * len(unresolved))
+                    rows = self._conn.execute(
+                        f"SELECT hash, vec FROM embeddings_i8 WHERE hash IN ({placeholders})",
+                        unresolved
+                    ).fetchall()
+                    for key, blob in rows:
+                        self._memory[key] = blob
+                        found[key] = self._dequantize(blob)
+                except sqlite3.Error as e:
+                    system_logger.log_error("EmbeddingCacheError", f"Error reading cached embeddings: {str(e)}")
+
+        missing = list(dict.fromkeys(
+            text for key, text in zip(keys, texts) if key not in found
+        ))
+        return keys, found, missing
+
+    def _store(self, texts: List[str], vectors: List[List[float]]) -> Dict[str, List[float]]:
+        """Cache freshly computed vectors and return them by key."""
+        # Fresh vectors are returned dequantized too, so hits and misses are identical
+        blobs = {self._key(text): self._quantize(vector) for text, vector in zip(texts, vectors)}
+        with self._lock:
+            self._memory.update(blobs)
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings_i8 (hash, vec) VALUES (?, ?)",
+                    list(blobs.items())
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                system_logger.log_error("EmbeddingCacheError", f"Error writing cached embeddings: {str(e)}")
+        return {key: self._dequantize(blob) for key, blob in blobs.items()}
+
+    @staticmethod
+    def _quantize(vector: List[float]) -> bytes:
+        """Encode a vector as a float32 scale followed by int8 codes."""
+        array = np.asarray(vector, dtype=np.float32)
+        max_abs = float(np.abs(array).max()) if array.size else 0.0
+        scale = np.float32(max_abs / 127.0 if max_abs else 1.0)
+        codes = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+        return scale.tobytes() + codes.tobytes()
+
+    @staticmethod
+    def _dequantize(blob: bytes) -> List[float]:
+        """Decode a vector produced by _quantize."""
+        scale = np.frombuffer(blob, dtype=np.float32, count=1)[0]
+        return (np.frombuffer(blob, dtype=np.int8, offset=4).astype(np.float32) * scale).tolist()
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,54 @@
+"""
+Parallel PDF text extraction for indexing.
+Kept free of heavy imports so spawned worker processes start quickly.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Optional
+import multiprocessing
+import os
+
+import pypdf
+
+# Pages extracted per worker task; each task opens the PDF on its own
+PAGES_PER_TASK = 16
+
+
+def iter_pdf_pages(file_path: str, max_workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF, in page order.
+
+    Text extraction is CPU-bound, so page ranges are extracted in parallel
+    worker processes when the document spans more than one task.
+
+    Args:
+        file_path: Path to the PDF file
+        max_workers: Maximum number of worker processes (defaults to the CPU count)
+
+    Yields:
+        Text of each page, as extracted by pypdf
+    """
+    page_count = len(pypdf.PdfReader(file_path).pages)
+    starts = range(0, page_count, PAGES_PER_TASK)
+    stops = [min(start + PAGES_PER_TASK, page_count) for start in starts]
+    workers = min(max_workers or os.cpu_count() or 1, len(starts))
+
+    if workers <= 1:
+        yield from _extract_pages(file_path, 0, page_count)
+        return
+
+    # Spawned rather than forked, like the PDF report pool: the indexing
+    # process may be running logger and HTTP pool threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        for texts in pool.map(_extract_pages, repeat(file_path), starts, stops):
+            yield from texts
+
+
+def _extract_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF."""
+    reader = pypdf.PdfReader(file_path)
+    return [reader.pages[i].extract_text() for i in range(start, stop)]
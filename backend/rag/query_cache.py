@@ -0,0 +1,115 @@
+"""
+Cache of search results (vector store and web search).
+Repeated questions skip the search entirely, and near-identical rephrasings
+are served from the results of the earlier query.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+import numpy as np
+
+
+class SemanticQueryCache:
+    """
+    LRU cache of search results.
+    Entries are found by exact query text, or by the cosine similarity
+    of their query embedding to a new one.
+    """
+
+    def __init__(self, max_size: int = 1024, threshold: float = 0.95):
+        """
+        Initialize the query cache.
+
+        Args:
+            max_size: Maximum number of cached queries
+            threshold: Minimum cosine similarity for a semantic hit
+        """
+        self.max_size = max_size
+        self.threshold = threshold
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[np.ndarray, Any]]" = OrderedDict()
+        self._lock = Lock()
+        # Stacked embeddings per scope, rebuilt lazily after the entries change
+        self._matrices: Dict[str, Tuple[List[Tuple[str, str]], np.ndarray]] = {}
+
+    @staticmethod
+    def make_scope(k: int, filter_dict: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the part of the key shared by searches that return comparable results.
+
+        Args:
+            k: Number of results requested
+            filter_dict: Optional metadata filter
+
+        Returns:
+            Scope string
+        """
+        return json.dumps({"k": k, "filter": filter_dict}, sort_keys=True, default=str)
+
+    def get(self, query: str, scope: str) -> Optional[Any]:
+        """Return the cached results for this exact query, or None on a miss."""
+        key = (query, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def get_similar(self, embedding: List[float], scope: str) -> Optional[Any]:
+        """
+        Return the results of the most similar cached query above the threshold.
+
+        Args:
+            embedding: Embedding of the new query
+            scope: Scope from make_scope
+
+        Returns:
+            Cached results, or None if no cached query is similar enough
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            keys, matrix = self._scope_matrix(scope)
+            if not keys:
+                return None
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self._entries.move_to_end(keys[best])
+            return self._entries[keys[best]][1]
+
+    def put(self, query: str, scope: str, embedding: List[float], results: Any):
+        """Store search results, evicting the least recently used query when full."""
+        key = (query, scope)
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._entries[key] = (vector, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrices.clear()
+
+    def clear(self):
+        """Drop all cached results, e.g. after new documents are indexed."""
+        with self._lock:
+            self._entries.clear()
+            self._matrices.clear()
+
+    def _scope_matrix(self, scope: str) -> Tuple[List[Tuple[str, str]], np.ndarray]:
+        """Get the keys and stacked embeddings of the entries in a scope."""
+        cached = self._matrices.get(scope)
+        if cached is None:
+            keys = [key for key in self._entries if key[1] == scope]
+            matrix = np.stack([self._entries[key][0] for key in keys]) if keys else np.empty((0, 0), dtype=np.float32)
+            cached = self._matrices[scope] = (keys, matrix)
+        return cached
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
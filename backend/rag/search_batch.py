@@ -0,0 +1,58 @@
+"""
+Column-oriented container for similarity search results.
+Scores live in one NumPy array so ranking and thresholding run vectorized;
+per-result dicts are only built for callers that need them.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+@dataclass
+class SearchBatch:
+    """Search results stored as parallel columns, best match first."""
+
+    contents: List[str] = field(default_factory=list)
+    metadatas: List[Dict[str, Any]] = field(default_factory=list)
+    scores: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    # Distinct sources in first-seen order, as written to the retrieval log
+    sources: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_scored_documents(cls, results: List[Tuple[Any, float]]) -> "SearchBatch":
+        """
+        Build a batch from LangChain (document, score) pairs.
+
+        Args:
+            results: Documents with their relevance scores
+
+        Returns:
+            SearchBatch with one entry per document
+        """
+        contents = []
+        metadatas = []
+        scores = np.empty(len(results), dtype=np.float64)
+        sources_seen = {}
+        for i, (doc, score) in enumerate(results):
+            contents.append(doc.page_content)
+            metadatas.append(doc.metadata)
+            scores[i] = score
+            sources_seen[doc.metadata.get("source", "unknown")] = None
+        return cls(contents, metadatas, scores, list(sources_seen))
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Convert to the row format returned by VectorStoreManager.similarity_search.
+
+        Returns:
+            List of {"content", "metadata", "score"} dicts
+        """
+        return [
+            {"content": content, "metadata": metadata, "score": score}
+            for content, metadata, score in zip(self.contents, self.metadatas, self.scores.tolist())
+        ]
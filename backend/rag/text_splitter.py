@@ -0,0 +1,60 @@
+"""
+Text splitter specialized for literal separators.
+Finds and splits on separators with plain string operations instead of
+building and running a regex per separator and recursion level.
+"""
+
+from typing import List
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+
+class LiteralTextSplitter(RecursiveCharacterTextSplitter):
+    """
+    RecursiveCharacterTextSplitter for plain-string separators.
+    Produces the same chunks as the parent class with is_separator_regex=False.
+    """
+
+    def _split_text(self, text: str, separators: List[str]) -> List[str]:
+        """Split incoming text and return chunks."""
+        final_chunks = []
+        # Use the first separator present in the text
+        separator = separators[-1]
+        new_separators = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if candidate in text:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        splits = self._split_on(text, separator)
+
+        # Merge small pieces, recursively splitting the ones still too long
+        good_splits = []
+        merge_separator = "" if self._keep_separator else separator
+        for piece in splits:
+            if self._length_function(piece) < self._chunk_size:
+                good_splits.append(piece)
+            else:
+                if good_splits:
+                    final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+                    good_splits = []
+                if not new_separators:
+                    final_chunks.append(piece)
+                else:
+                    final_chunks.extend(self._split_text(piece, new_separators))
+        if good_splits:
+            final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+        return final_chunks
+
+    def _split_on(self, text: str, separator: str) -> List[str]:
+        """Split on a literal separator, keeping it at the start of each following piece if configured."""
+        if not separator:
+            return list(text)
+        parts = text.split(separator)
+        if self._keep_separator:
+            parts = parts[:1] + [separator + part for part in parts[1:]]
+        return [part for part in parts if part != ""]
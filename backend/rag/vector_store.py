@@ -1,21 +1,56 @@
 """
 Vector store implementation for RAG using ChromaDB.
+The embedding backend (OpenAI or local) is chosen by settings.embedding_backend.
 """
 
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional
 from pathlib import Path
 import hashlib
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from threading import Lock
+from cachetools import TTLCache, cachedmethod
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_community.vectorstores import Chroma
 from langchain.docstore.document import Document
-from langchain_community.document_loaders import PyPDFLoader
 
+from .embedder import get_embedder
+from .pdf_text import iter_pdf_pages
+from .query_cache import SemanticQueryCache
+from .search_batch import SearchBatch
+from .text_splitter import LiteralTextSplitter
 from ..utils.logger import system_logger
-from ..config import settings
+from ..config import get_settings
+
+# HNSW graph settings for new collections: Chroma's default search_ef of 10
+# gives poor recall for top-5 lookups, and a lower construction_ef keeps
+# indexing fast at the same connectivity.
+HNSW_COLLECTION_METADATA = {
+    "hnsw:M": 16,
+    "hnsw:construction_ef": 64,
+    "hnsw:search_ef": 100
+}
+
+# Chunks embedded and written per Chroma add call (Chroma caps a batch at 5461)
+INDEX_BATCH_SIZE = 250
+INDEX_EMBEDDING_WORKERS = 8
+# Batches embedded but not yet written; bounds memory for large documents
+INDEX_MAX_PENDING_BATCHES = INDEX_EMBEDDING_WORKERS * 2
+# Files loaded and embedded at once by index_documents
+INDEX_FILE_WORKERS = 8
+
+# Applied to Chroma's SQLite connection: WAL with NORMAL sync commits each
+# ingest batch without a full fsync of a rollback journal.
+CHROMA_SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY"
+)
 
 
 class VectorStoreManager:
@@ -27,7 +62,8 @@ class VectorStoreManager:
     def __init__(
         self,
         persist_directory: str = "./data/vector_db",
-        collection_name: str = "nephrology_docs"
+        collection_name: str = "nephrology_docs",
+        embeddings: Optional[Embeddings] = None
     ):
         """
         Initialize vector store manager.
@@ -35,27 +71,37 @@ class VectorStoreManager:
         Args:
             persist_directory: Directory to persist vector database
             collection_name: Name of the collection
+            embeddings: Embedding model; defaults to the shared one for the configured backend
         """
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
         self.collection_name = collection_name
         
-        # Initialize embeddings
-        system_logger.info("Initializing embeddings model...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=settings.embedding_model,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
+        # Shared embeddings model for the configured backend
+        self.embeddings = embeddings or get_embedder()
         
         # Initialize text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        settings = get_settings()
+        self.text_splitter = LiteralTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
             length_function=len,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
         
+        # Document count is shown on every status check, so cache it briefly
+        self._count_lock = Lock()
+        self._count_cache = TTLCache(maxsize=1, ttl=30)
+        
+        # Repeated and near-identical questions reuse earlier search results
+        self._query_cache = SemanticQueryCache()
+        
+        # Retrievers built by get_retriever, keyed by k
+        self._retrievers = {}
+        
+        # Serializes writes to the Chroma collection during parallel ingest
+        self._write_lock = Lock()
+        
         # Initialize or load vector store
         self.vector_store = None
         self._initialize_vector_store()
@@ -69,8 +115,10 @@ class VectorStoreManager:
             self.vector_store = Chroma(
                 collection_name=self.collection_name,
                 embedding_function=self.embeddings,
-                persist_directory=str(self.persist_directory)
+                persist_directory=str(self.persist_directory),
+                collection_metadata=HNSW_COLLECTION_METADATA
             )
+            self._tune_sqlite()
             
             # Check if collection has documents
             collection = self.vector_store._collection
@@ -98,124 +146,246 @@ class VectorStoreManager:
         try:
             file_path_obj = Path(file_path)
             file_extension = file_path_obj.suffix.lower()
+            if file_extension not in ('.pdf', '.txt'):
+                raise ValueError(f"Unsupported file type: {file_extension}. Supported types: .pdf, .txt")
+            
+            # Hash the raw file so an unchanged document is never loaded or embedded twice
+            doc_hash = self._file_hash(file_path_obj)
+            if self._is_indexed(doc_hash):
+                system_logger.info(f"Skipping {file_path}: already indexed")
+                return
             
             # Load document based on file type
             if file_extension == '.pdf':
                 system_logger.info(f"Loading PDF document: {file_path}")
-                loader = PyPDFLoader(file_path)
-                pages = loader.load()
-                
-                # Extract text from all pages
-                text = "\n\n".join([page.page_content for page in pages])
-                system_logger.info(f"Loaded PDF with {len(pages)} pages")
-                
+                # Pages are extracted in worker processes and split as they arrive
+                texts = iter_pdf_pages(file_path)
             elif file_extension == '.txt':
                 system_logger.info(f"Loading text document: {file_path}")
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-            else:
-                raise ValueError(f"Unsupported file type: {file_extension}. Supported types: .pdf, .txt")
+                    texts = [f.read()]
             
-            # Create document hash for deduplication
-            doc_hash = hashlib.md5(text.encode()).hexdigest()
-            
-            # Split into chunks
-            chunks = self.text_splitter.split_text(text)
-            system_logger.info(f"Split document into {len(chunks)} chunks")
-            
-            # Create documents with metadata
-            documents = []
-            for i, chunk in enumerate(chunks):
-                doc_metadata = {
-                    "source": file_path,
-                    "chunk_id": i,
-                    "doc_hash": doc_hash,
-                    "file_type": file_extension,
-                    **(metadata or {})
-                }
-                documents.append(Document(page_content=chunk, metadata=doc_metadata))
-            
-            # Create or update vector store
-            if self.vector_store is None:
-                self.vector_store = Chroma.from_documents(
-                    documents=documents,
-                    embedding=self.embeddings,
-                    collection_name=self.collection_name,
-                    persist_directory=str(self.persist_directory)
+            # Create documents with metadata, lazily so embedding starts
+            # while later pages are still being extracted and split
+            chunks = (
+                chunk
+                for text in texts
+                for chunk in self.text_splitter.split_text(text)
+            )
+            documents = (
+                Document(
+                    page_content=chunk,
+                    metadata={
+                        "source": file_path,
+                        "chunk_id": i,
+                        "doc_hash": doc_hash,
+                        "file_type": file_extension,
+                        **(metadata or {})
+                    }
                 )
-            else:
-                self.vector_store.add_documents(documents)
+                for i, chunk in enumerate(chunks)
+            )
             
-            # Persist
-            self.vector_store.persist()
+            # Add the chunks in batches
+            chunk_count = self._add_documents(documents)
+            self._count_cache.clear()
+            self._query_cache.clear()
             
-            system_logger.info(f"Indexed {len(documents)} chunks from {file_path}")
+            system_logger.info(f"Indexed {chunk_count} chunks from {file_path}")
             
         except Exception as e:
             system_logger.log_error("VectorStoreError", f"Error indexing document: {str(e)}")
             raise
     
+    def flush(self):
+        """
+        Persist the collection once after a round of indexing.
+        
+        Call after index_document; index_documents flushes on its own.
+        """
+        if self.vector_store is not None:
+            with self._write_lock:
+                self.vector_store.persist()
+    
+    def _tune_sqlite(self):
+        """Apply CHROMA_SQLITE_PRAGMAS to this thread's Chroma SQLite connection."""
+        try:
+            conn = self.vector_store._client._server._sysdb._conn_pool.connect()
+            for pragma in CHROMA_SQLITE_PRAGMAS:
+                conn.execute(f"PRAGMA {pragma}")
+        except Exception as e:
+            system_logger.warning(f"Could not tune Chroma SQLite connection: {e}")
+    
+    @staticmethod
+    def _file_hash(file_path: Path) -> str:
+        """
+        Compute the MD5 of a file's bytes, reading it in 1 MB blocks.
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            Hex digest of the file contents
+        """
+        digest = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _is_indexed(self, doc_hash: str) -> bool:
+        """
+        Check whether chunks of a document with this hash are already stored.
+        
+        Args:
+            doc_hash: Hash from _file_hash
+            
+        Returns:
+            True if the document is already indexed
+        """
+        if self.vector_store is None:
+            return False
+        existing = self.vector_store._collection.get(where={"doc_hash": doc_hash}, limit=1, include=[])
+        return bool(existing["ids"])
+    
+    def _add_documents(self, documents: Iterable[Document]) -> int:
+        """
+        Embed documents in parallel batches and add them with their precomputed vectors.
+        
+        Each batch is sent for embedding as soon as it fills, so embedding
+        overlaps with producing the rest of the documents. At most
+        INDEX_MAX_PENDING_BATCHES are in flight; each is written as soon as its
+        embedding completes and then dropped, so memory stays bounded.
+        
+        Args:
+            documents: Chunks to add to the collection
+            
+        Returns:
+            Number of chunks added
+        """
+        added = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=INDEX_EMBEDDING_WORKERS) as pool:
+            documents = iter(documents)
+            while True:
+                batch = list(islice(documents, INDEX_BATCH_SIZE))
+                if not batch:
+                    break
+                pending.append((batch, pool.submit(
+                    self.embeddings.embed_documents,
+                    [doc.page_content for doc in batch]
+                )))
+                if len(pending) >= INDEX_MAX_PENDING_BATCHES:
+                    added += self._write_batch(*pending.popleft())
+            while pending:
+                added += self._write_batch(*pending.popleft())
+        return added
+    
+    def _write_batch(self, batch: List[Document], future) -> int:
+        """
+        Wait for a batch's embeddings and add it to the collection.
+        
+        Args:
+            batch: Chunks in the batch
+            future: Future resolving to the batch's vectors
+            
+        Returns:
+            Number of chunks added
+        """
+        vectors = future.result()
+        
+        # Embedding runs concurrently across files; Chroma writes do not
+        with self._write_lock:
+            # Create the vector store if loading it failed
+            if self.vector_store is None:
+                self.vector_store = Chroma(
+                    collection_name=self.collection_name,
+                    embedding_function=self.embeddings,
+                    persist_directory=str(self.persist_directory),
+                    collection_metadata=HNSW_COLLECTION_METADATA
+                )
+            
+            self._tune_sqlite()
+            self.vector_store._collection.add(
+                ids=[str(uuid.uuid4()) for _ in batch],
+                embeddings=vectors,
+                metadatas=[doc.metadata for doc in batch],
+                documents=[doc.page_content for doc in batch]
+            )
+        return len(batch)
+    
     def index_documents(self, file_paths: List[str]):
         """
-        Index multiple documents.
+        Index multiple documents, loading and embedding them in parallel.
         
         Args:
             file_paths: List of file paths to index
         """
-        for file_path in file_paths:
+        if not file_paths:
+            return
+        
+        def index_one(file_path: str):
             try:
                 self.index_document(file_path)
             except Exception as e:
                 system_logger.error(f"Failed to index {file_path}: {e}")
+        
+        with ThreadPoolExecutor(max_workers=min(INDEX_FILE_WORKERS, len(file_paths))) as pool:
+            list(pool.map(index_one, file_paths))
+        self.flush()
     
-    def similarity_search(
+    def search(
         self,
         query: str,
         k: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> SearchBatch:
         """
-        Perform similarity search.
+        Perform similarity search, reusing cached results where possible.
         
         Args:
             query: Search query
             k: Number of results to return
             filter_dict: Optional metadata filter
+            query_embedding: Precomputed embedding of the query, if available
             
         Returns:
-            List of relevant documents with metadata
+            SearchBatch of relevant chunks, best match first
         """
         if self.vector_store is None:
             system_logger.warning("Vector store not initialized")
-            return []
+            return SearchBatch()
         
         try:
+            scope = SemanticQueryCache.make_scope(k, filter_dict)
+            batch = self._query_cache.get(query, scope)
+            if batch is not None:
+                self._log_retrieval(query, batch)
+                return batch
+            
+            if query_embedding is None:
+                query_embedding = self.embeddings.embed_query(query)
+            
+            # A rephrasing of a cached question gets that question's results
+            batch = self._query_cache.get_similar(query_embedding, scope)
+            if batch is not None:
+                self._query_cache.put(query, scope, query_embedding, batch)
+                self._log_retrieval(query, batch)
+                return batch
+            
             # Perform search
-            results = self.vector_store.similarity_search_with_score(
-                query=query,
+            results = self.vector_store.similarity_search_by_vector_with_relevance_scores(
+                embedding=query_embedding,
                 k=k,
                 filter=filter_dict
             )
+            batch = SearchBatch.from_scored_documents(results)
             
-            # Format results
-            formatted_results = []
-            for doc, score in results:
-                formatted_results.append({
-                    "content": doc.page_content,
-                    "metadata": doc.metadata,
-                    "score": float(score)
-                })
+            self._query_cache.put(query, scope, query_embedding, batch)
+            self._log_retrieval(query, batch)
             
-            # Log retrieval
-            sources = [r["metadata"].get("source", "unknown") for r in formatted_results]
-            system_logger.log_rag_retrieval(
-                query=query,
-                num_results=len(formatted_results),
-                sources=list(set(sources)),
-                success=True
-            )
-            
-            return formatted_results
+            return batch
             
         except Exception as e:
             system_logger.log_error("VectorStoreError", f"Error in similarity search: {str(e)}")
@@ -225,11 +395,41 @@ class VectorStoreManager:
                 sources=[],
                 success=False
             )
-            return []
+            return SearchBatch()
+    
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform similarity search and return one dict per result.
+        
+        Args:
+            query: Search query
+            k: Number of results to return
+            filter_dict: Optional metadata filter
+            query_embedding: Precomputed embedding of the query, if available
+            
+        Returns:
+            List of relevant documents with metadata
+        """
+        return self.search(query, k, filter_dict, query_embedding).as_dicts()
+    
+    def _log_retrieval(self, query: str, batch: SearchBatch):
+        """Log a successful retrieval with its distinct sources."""
+        system_logger.log_rag_retrieval(
+            query=query,
+            num_results=len(batch),
+            sources=batch.sources,
+            success=True
+        )
     
     def get_retriever(self, k: int = 5):
         """
-        Get a LangChain retriever.
+        Get a LangChain retriever, reusing the one built earlier for the same k.
         
         Args:
             k: Number of documents to retrieve
@@ -240,20 +440,45 @@ class VectorStoreManager:
         if self.vector_store is None:
             raise ValueError("Vector store not initialized")
         
-        return self.vector_store.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": k}
-        )
+        # Reuse the retriever for this k unless the underlying store was replaced
+        retriever = self._retrievers.get(k)
+        if retriever is None or retriever.vectorstore is not self.vector_store:
+            retriever = self._retrievers[k] = self.vector_store.as_retriever(
+                search_type="similarity",
+                search_kwargs={"k": k}
+            )
+        return retriever
     
     def delete_collection(self):
         """Delete the entire collection."""
         try:
             if self.vector_store is not None:
-                self.vector_store.delete_collection()
+                with self._write_lock:
+                    self.vector_store.delete_collection()
+                    # The next index_document creates a fresh collection
+                    self.vector_store = None
+                self._count_cache.clear()
+                self._query_cache.clear()
                 system_logger.info(f"Deleted collection: {self.collection_name}")
         except Exception as e:
             system_logger.log_error("VectorStoreError", f"Error deleting collection: {str(e)}")
     
+    @cachedmethod(lambda self: self._count_cache, lock=lambda self: self._count_lock)
+    def count_documents(self) -> int:
+        """
+        Get the number of indexed chunks (cached for 30 seconds).
+        
+        Returns:
+            Number of chunks in the collection
+        """
+        if self.vector_store is None:
+            return 0
+        try:
+            return self.vector_store._collection.count()
+        except Exception as e:
+            system_logger.log_error("VectorStoreError", f"Error counting documents: {str(e)}")
+            return 0
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the collection.
@@ -279,14 +504,18 @@ class VectorStoreManager:
             return {"count": 0, "status": "error", "error": str(e)}
 
 
-# Global vector store instance
+# Global vector store instance (one Chroma client per process)
 vector_store_manager = None
+_vector_store_lock = Lock()
 
 def get_vector_store() -> VectorStoreManager:
     """Get or create vector store manager instance."""
     global vector_store_manager
     if vector_store_manager is None:
-        vector_store_manager = VectorStoreManager(
-            persist_directory=settings.vector_db_path
-        )
+        # Double-checked so concurrent first calls share one Chroma client
+        with _vector_store_lock:
+            if vector_store_manager is None:
+                vector_store_manager = VectorStoreManager(
+                    persist_directory=get_settings().vector_db_path
+                )
     return vector_store_manager
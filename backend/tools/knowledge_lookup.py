@@ -0,0 +1,136 @@
+"""
+Combined knowledge lookup tool for the Clinical Agent.
+Searches the nephrology reference materials and the web at the same time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from langchain.tools import Tool
+import asyncio
+
+from .rag_tool import RAGTool
+from .web_search import WebSearchTool
+from ..utils.logger import system_logger
+
+# Chunks at most this far from the query answer it well enough on their own
+CONFIDENT_DISTANCE = 0.5
+
+
+class KnowledgeLookupTool:
+    """
+    Tool that runs the knowledge base lookup and the web search concurrently,
+    returning both results in one agent step. When the reference materials
+    match the query closely, the web search is abandoned.
+    """
+    
+    def __init__(
+        self,
+        rag: RAGTool,
+        web_search: WebSearchTool,
+        confident_distance: float = CONFIDENT_DISTANCE
+    ):
+        """
+        Initialize the knowledge lookup tool.
+        
+        Args:
+            rag: RAG tool over the nephrology reference materials
+            web_search: Web search tool
+            confident_distance: Best-chunk distance below which web results are skipped
+        """
+        self.rag = rag
+        self.web_search = web_search
+        self.confident_distance = confident_distance
+        self.name = "knowledge_lookup"
+        self.description = """
+        Searches the nephrology reference materials and the web at the same time.
+        Use this tool instead of calling nephrology_knowledge_base and then web_search
+        when the question likely needs both, e.g. how current guidelines relate
+        to standard treatment.
+        
+        Input should be a clear medical question or query.
+        Returns the reference material results, followed by web results when the
+        reference materials do not cover the question well.
+        """
+    
+    def lookup(self, query: str) -> str:
+        """
+        Search both sources concurrently.
+        
+        Args:
+            query: Medical query
+        
+        Returns:
+            Combined formatted results
+        """
+        pool = ThreadPoolExecutor(max_workers=1)
+        try:
+            web_future = pool.submit(self.web_search.search, query)
+            rag_text, distance = self.rag.retrieve_scored(query)
+            if self._is_confident(query, distance):
+                # A search already in flight finishes in the background; its result is ignored
+                web_future.cancel()
+                return rag_text
+            return self._combine(rag_text, web_future.result())
+        finally:
+            pool.shutdown(wait=False)
+    
+    async def alookup(self, query: str) -> str:
+        """
+        Search both sources concurrently without blocking the event loop.
+        
+        Args:
+            query: Medical query
+        
+        Returns:
+            Combined formatted results
+        """
+        web_task = asyncio.create_task(self.web_search.asearch(query))
+        try:
+            rag_text, distance = await asyncio.to_thread(self.rag.retrieve_scored, query)
+        except BaseException:
+            web_task.cancel()
+            raise
+        if self._is_confident(query, distance):
+            web_task.cancel()
+            return rag_text
+        return self._combine(rag_text, await web_task)
+    
+    def _is_confident(self, query: str, distance: float) -> bool:
+        """Check whether the reference materials answer the query well enough on their own."""
+        confident = distance <= self.confident_distance
+        if confident:
+            system_logger.info("Knowledge lookup answered from reference materials (distance {:.3f}): {}", distance, query)
+        return confident
+    
+    @staticmethod
+    def _combine(rag_text: str, web_text: str) -> str:
+        """Join the results of both sources, reference materials first."""
+        return f"{rag_text}\n{web_text}"
+    
+    def as_langchain_tool(self) -> Tool:
+        """
+        Convert to LangChain Tool.
+        
+        Returns:
+            LangChain Tool instance
+        """
+        return Tool(
+            name=self.name,
+            description=self.description,
+            func=self.lookup,
+            coroutine=self.alookup
+        )
+
+
+def create_knowledge_lookup_tool(rag: RAGTool, web_search: WebSearchTool) -> Tool:
+    """
+    Create and return a combined knowledge lookup tool.
+    
+    Args:
+        rag: RAG tool over the nephrology reference materials
+        web_search: Web search tool
+    
+    Returns:
+        LangChain Tool for parallel knowledge base and web lookups
+    """
+    tool = KnowledgeLookupTool(rag, web_search)
+    return tool.as_langchain_tool()
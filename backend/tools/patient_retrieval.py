@@ -10,6 +10,31 @@ from ..database.database import get_db_manager
 from ..utils.logger import system_logger
 
 
+PATIENT_INFO_TEMPLATE = """Patient Discharge Report Retrieved:
+
+Patient Name: {patient_name}
+Discharge Date: {discharge_date}
+Primary Diagnosis: {primary_diagnosis}
+
+Medications:
+  - {medications}
+
+Dietary Restrictions: {dietary_restrictions}
+
+Follow-up: {follow_up}
+
+Warning Signs to Watch For: {warning_signs}
+
+Discharge Instructions: {discharge_instructions}"""
+
+
+class _PatientFields(dict):
+    """Patient fields for PATIENT_INFO_TEMPLATE; missing fields render as None."""
+    
+    def __missing__(self, key):
+        return None
+
+
 class PatientRetrievalInput(BaseModel):
     """Input schema for patient retrieval tool."""
     patient_name: str = Field(description="The name of the patient to retrieve")
@@ -43,24 +68,19 @@ class PatientRetrievalTool:
             Formatted patient information or error message
         """
         try:
-            system_logger.info(f"Retrieving patient data for: {patient_name}")
+            system_logger.info("Retrieving patient data for: {}", patient_name)
+            
+            # One indexed lookup: an exact name match, or every partial match
+            matches = self.db_manager.find_patients_by_name(patient_name)
             
-            # Get patient from database
-            patient_data = self.db_manager.get_patient_by_name(patient_name)
+            if len(matches) == 0:
+                return f"I couldn't find a patient named '{patient_name}' in our system. Please check the spelling or provide the full name."
+            elif len(matches) > 1:
+                # Multiple matches
+                names = [p['patient_name'] for p in matches]
+                return f"I found multiple patients with similar names: {', '.join(names)}. Please specify the full name."
             
-            if patient_data is None:
-                # Try searching for similar names
-                search_results = self.db_manager.search_patients(patient_name)
-                
-                if len(search_results) == 0:
-                    return f"I couldn't find a patient named '{patient_name}' in our system. Please check the spelling or provide the full name."
-                elif len(search_results) == 1:
-                    patient_data = search_results[0]
-                    system_logger.info(f"Found patient through search: {patient_data['patient_name']}")
-                else:
-                    # Multiple matches
-                    names = [p['patient_name'] for p in search_results]
-                    return f"I found multiple patients with similar names: {', '.join(names)}. Please specify the full name."
+            patient_data = matches[0]
             
             # Format patient information
             formatted_info = self._format_patient_info(patient_data)
@@ -90,27 +110,9 @@ class PatientRetrievalTool:
         Returns:
             Formatted patient information
         """
-        medications_list = "\n  - ".join(patient_data.get('medications', []))
-        
-        formatted = f"""
-Patient Discharge Report Retrieved:
-
-Patient Name: {patient_data.get('patient_name')}
-Discharge Date: {patient_data.get('discharge_date')}
-Primary Diagnosis: {patient_data.get('primary_diagnosis')}
-
-Medications:
-  - {medications_list}
-
-Dietary Restrictions: {patient_data.get('dietary_restrictions')}
-
-Follow-up: {patient_data.get('follow_up')}
-
-Warning Signs to Watch For: {patient_data.get('warning_signs')}
-
-Discharge Instructions: {patient_data.get('discharge_instructions')}
-"""
-        return formatted.strip()
+        data = _PatientFields(patient_data)
+        data['medications'] = "\n  - ".join(patient_data.get('medications', []))
+        return PATIENT_INFO_TEMPLATE.format_map(data)
     
     def as_langchain_tool(self) -> Tool:
         """
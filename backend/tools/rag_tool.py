@@ -2,11 +2,13 @@
 RAG tool for retrieving information from nephrology reference materials.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Tuple
+import math
 from langchain.tools import Tool
 from pydantic import BaseModel, Field
 
 from ..rag.vector_store_openai import get_vector_store
+from ..rag.search_batch import SearchBatch
 from ..utils.logger import system_logger
 
 
@@ -30,6 +32,10 @@ class RAGTool:
         """
         self.vector_store = get_vector_store()
         self.top_k = top_k
+        
+        # Query embeddings computed ahead of time in batches, keyed by query text
+        self._query_embeddings: Dict[str, List[float]] = {}
+        self._max_cached_embeddings = 256
         self.name = "nephrology_knowledge_base"
         self.description = """
         Searches the nephrology reference materials for relevant medical information.
@@ -63,34 +69,96 @@ class RAGTool:
         Returns:
             Formatted response with citations
         """
+        return self.retrieve_scored(query)[0]
+    
+    def retrieve_scored(self, query: str) -> Tuple[str, float]:
+        """
+        Retrieve relevant information along with how closely it matched.
+        
+        Args:
+            query: Medical query
+            
+        Returns:
+            Tuple of (formatted response, distance of the best chunk);
+            the distance is infinite when nothing was found
+        """
         try:
-            system_logger.info(f"RAG query: {query}")
+            system_logger.info("RAG query: {}", query)
             
             # Perform similarity search
-            results = self.vector_store.similarity_search(
+            results = self.vector_store.search(
                 query=query,
-                k=self.top_k
+                k=self.top_k,
+                query_embedding=self._query_embeddings.get(query)
             )
             
             if not results:
-                return "I couldn't find specific information about this in the nephrology reference materials. Would you like me to search the web for more current information?"
+                return "I couldn't find specific information about this in the nephrology reference materials. Would you like me to search the web for more current information?", math.inf
             
             # Format response with citations
             formatted_response = self._format_response(results, query)
             
-            return formatted_response
+            # Chroma scores are distances, so the best chunk has the lowest
+            return formatted_response, float(results.scores.min())
             
         except Exception as e:
             error_msg = f"Error retrieving from knowledge base: {str(e)}"
             system_logger.log_error("RAGError", error_msg, {"query": query})
-            return "I encountered an error while searching the nephrology reference materials. Please try rephrasing your question."
+            return "I encountered an error while searching the nephrology reference materials. Please try rephrasing your question.", math.inf
+    
+    def prime(self, queries: List[str]):
+        """
+        Embed likely queries in a single batched request.
+        
+        Later retrievals for any of these exact queries reuse the stored
+        embedding instead of making their own embedding call.
+        
+        Args:
+            queries: Candidate queries (e.g. the user's message, diagnosis, medications)
+        """
+        pending = self._pending_queries(queries)
+        if not pending:
+            return
+        try:
+            embeddings = self.vector_store.embeddings.embed_documents(pending)
+            self._store_embeddings(pending, embeddings)
+        except Exception as e:
+            system_logger.log_error("RAGError", f"Error embedding queries: {str(e)}")
+    
+    async def aprime(self, queries: List[str]):
+        """
+        Embed likely queries in a single batched request without blocking the event loop.
+        
+        Args:
+            queries: Candidate queries (e.g. the user's message, diagnosis, medications)
+        """
+        pending = self._pending_queries(queries)
+        if not pending:
+            return
+        try:
+            embeddings = await self.vector_store.embeddings.aembed_documents(pending)
+            self._store_embeddings(pending, embeddings)
+        except Exception as e:
+            system_logger.log_error("RAGError", f"Error embedding queries: {str(e)}")
+    
+    def _pending_queries(self, queries: List[str]) -> List[str]:
+        """Get the distinct, non-empty queries that are not embedded yet."""
+        return list(dict.fromkeys(
+            q for q in queries if q and q not in self._query_embeddings
+        ))
     
-    def _format_response(self, results: List[Dict[str, Any]], query: str) -> str:
+    def _store_embeddings(self, queries: List[str], embeddings: List[List[float]]):
+        """Store query embeddings, dropping the oldest ones when the cache is full."""
+        self._query_embeddings.update(zip(queries, embeddings))
+        while len(self._query_embeddings) > self._max_cached_embeddings:
+            self._query_embeddings.pop(next(iter(self._query_embeddings)))
+    
+    def _format_response(self, results: SearchBatch, query: str) -> str:
         """
         Format RAG results with citations.
         
         Args:
-            results: List of retrieved documents
+            results: Retrieved chunks
             query: Original query
             
         Returns:
@@ -99,21 +167,11 @@ class RAGTool:
         formatted = f"\n📚 Information from Nephrology Reference Materials:\n"
         formatted += "=" * 60 + "\n\n"
         
-        # Combine relevant chunks
-        combined_content = []
-        sources = set()
-        
-        for i, result in enumerate(results):
-            content = result['content']
-            metadata = result.get('metadata', {})
-            source = metadata.get('source', 'Unknown')
-            chunk_id = metadata.get('chunk_id', i)
-            
-            combined_content.append(content)
-            sources.add(source)
+        # Sources are deduplicated in first-seen order
+        sources = dict.fromkeys(m.get('source', 'Unknown') for m in results.metadatas)
         
         # Join content
-        formatted += "\n\n".join(combined_content)
+        formatted += "\n\n".join(results.contents)
         
         # Add citations
         formatted += "\n\n" + "=" * 60 + "\n"
@@ -136,11 +194,12 @@ class RAGTool:
             List of relevant text chunks
         """
         try:
-            results = self.vector_store.similarity_search(
+            results = self.vector_store.search(
                 query=query,
-                k=self.top_k
+                k=self.top_k,
+                query_embedding=self._query_embeddings.get(query)
             )
-            return [r['content'] for r in results]
+            return list(results.contents)
         except Exception as e:
             system_logger.log_error("RAGError", f"Error getting chunks: {str(e)}")
             return []
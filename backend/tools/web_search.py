@@ -3,12 +3,25 @@ Web search tool for the Clinical Agent.
 Provides fallback for queries outside reference materials.
 """
 
-from typing import Optional, List, Dict, Any
-from langchain.tools import Tool
+from typing import Optional, List, Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from langchain.tools import Tool, StructuredTool
+from langchain_core import pydantic_v1
 from pydantic import BaseModel, Field
-import os
+import asyncio
 
+from ..rag.embedder import get_embedder
+from ..rag.query_cache import SemanticQueryCache
 from ..utils.logger import system_logger
+from ..config import get_settings, shared_http_client, shared_async_http_client
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+BATCH_MAX_CONCURRENCY = 5  # Parallel searches per batch, to stay within provider rate limits
+CACHE_MAX_QUERIES = 512
+
+RESULTS_RULE = "=" * 60
+RESULTS_NOTE = "⚠️ Note: This information comes from web search and should be verified with healthcare professionals.\n\n"
+RESULTS_FOOTER = "⚕️ Always consult with your healthcare provider before making any medical decisions.\n"
 
 
 class WebSearchInput(BaseModel):
@@ -16,6 +29,12 @@ class WebSearchInput(BaseModel):
     query: str = Field(description="The search query")
 
 
+# LangChain validates tool arguments with pydantic v1 models
+class BatchWebSearchInput(pydantic_v1.BaseModel):
+    """Input schema for batch web search tool."""
+    queries: List[str] = pydantic_v1.Field(description="Independent search queries to run in parallel")
+
+
 class WebSearchTool:
     """
     Tool for performing web searches when information is not available
@@ -38,23 +57,29 @@ class WebSearchTool:
         
         # Try to use Tavily if API key is available, otherwise use DuckDuckGo
         self.search_engine = self._initialize_search_engine()
+        self.engine_name = "Tavily" if "Tavily" in str(type(self.search_engine)) else "DuckDuckGo"
+        
+        # Formatted results of earlier searches, found by query text or embedding
+        self._cache = SemanticQueryCache(max_size=CACHE_MAX_QUERIES)
     
     def _initialize_search_engine(self):
         """Initialize the appropriate search engine."""
-        tavily_api_key = os.getenv("TAVILY_API_KEY")
+        tavily_api_key = get_settings().tavily_api_key
         
         if tavily_api_key:
             try:
                 from langchain_community.tools.tavily_search import TavilySearchResults
+                from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
                 system_logger.info("Initializing Tavily search engine")
                 return TavilySearchResults(
+                    api_wrapper=TavilySearchAPIWrapper(tavily_api_key=tavily_api_key),
                     max_results=5,
                     search_depth="advanced",
                     include_answer=True,
                     include_raw_content=False
                 )
             except Exception as e:
-                system_logger.warning(f"Failed to initialize Tavily: {e}. Falling back to DuckDuckGo")
+                system_logger.warning("Failed to initialize Tavily: {}. Falling back to DuckDuckGo", e)
         
         # Fallback to DuckDuckGo
         try:
@@ -62,7 +87,7 @@ class WebSearchTool:
             system_logger.info("Initializing DuckDuckGo search engine")
             return DuckDuckGoSearchResults(max_results=5)
         except Exception as e:
-            system_logger.error(f"Failed to initialize DuckDuckGo: {e}")
+            system_logger.error("Failed to initialize DuckDuckGo: {}", e)
             return None
     
     def search(self, query: str) -> str:
@@ -76,41 +101,229 @@ class WebSearchTool:
             Formatted search results
         """
         try:
-            system_logger.info(f"Performing web search: {query}")
+            system_logger.info("Performing web search: {}", query)
             
             if self.search_engine is None:
                 return "Web search is currently unavailable. Please consult with your healthcare provider for the most current information."
             
+            key = self._cache_key(query)
+            cached = self._cache.get(key, self.engine_name)
+            embedding = None
+            if cached is None:
+                embedding = self._embed_query(query)
+                cached = self._find_similar(key, embedding)
+            if cached is not None:
+                return self._report_cached(cached, query)
+            
             # Perform search
-            if hasattr(self.search_engine, 'invoke'):
+            if self.engine_name == "Tavily":
+                results = self._tavily_search(query)
+            elif hasattr(self.search_engine, 'invoke'):
                 results = self.search_engine.invoke({"query": query})
             else:
                 results = self.search_engine.run(query)
             
-            # Format results
-            formatted_results = self._format_results(results, query)
+            return self._report_results(results, query, key, embedding)
+            
+        except Exception as e:
+            return self._report_failure(e, query)
+    
+    async def asearch(self, query: str) -> str:
+        """
+        Perform web search without blocking the event loop.
+        
+        Tavily is called over the shared async connection pool and DuckDuckGo
+        through its async client, so other requests are served during the
+        network round-trip.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            Formatted search results
+        """
+        try:
+            system_logger.info("Performing web search: {}", query)
+            
+            if self.search_engine is None:
+                return "Web search is currently unavailable. Please consult with your healthcare provider for the most current information."
+            
+            key = self._cache_key(query)
+            cached = self._cache.get(key, self.engine_name)
+            embedding = None
+            if cached is None:
+                embedding = await self._aembed_query(query)
+                cached = self._find_similar(key, embedding)
+            if cached is not None:
+                return self._report_cached(cached, query)
+            
+            if self.engine_name == "Tavily":
+                results = await self._atavily_search(query)
+            else:
+                results = await self._aduckduckgo_search(query)
             
-            # Log search
-            engine_name = "Tavily" if "Tavily" in str(type(self.search_engine)) else "DuckDuckGo"
-            system_logger.log_web_search(
-                query=query,
-                search_engine=engine_name,
-                num_results=len(results) if isinstance(results, list) else 1,
-                success=True
-            )
+            return self._report_results(results, query, key, embedding)
+            
+        except Exception as e:
+            return self._report_failure(e, query)
+    
+    def search_batch(self, queries: List[str]) -> str:
+        """
+        Perform several web searches in parallel.
+        
+        Args:
+            queries: Independent search queries
             
-            return formatted_results
+        Returns:
+            Formatted results of every query, in order
+        """
+        if not queries:
+            return "No search queries were provided."
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_CONCURRENCY, len(queries))) as pool:
+            return "\n".join(pool.map(self.search, queries))
+    
+    async def asearch_batch(self, queries: List[str]) -> str:
+        """
+        Perform several web searches concurrently on the event loop.
+        
+        Args:
+            queries: Independent search queries
             
+        Returns:
+            Formatted results of every query, in order
+        """
+        if not queries:
+            return "No search queries were provided."
+        semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+        
+        async def search_one(query: str) -> str:
+            async with semaphore:
+                return await self.asearch(query)
+        
+        return "\n".join(await asyncio.gather(*(search_one(q) for q in queries)))
+    
+    def _tavily_search(self, query: str) -> List[Dict[str, Any]]:
+        """Query the Tavily REST API over the shared keep-alive connection pool."""
+        response = shared_http_client.post(TAVILY_SEARCH_URL, json=self._tavily_request(query), timeout=10)
+        response.raise_for_status()
+        return self.search_engine.api_wrapper.clean_results(response.json()["results"])
+    
+    async def _atavily_search(self, query: str) -> List[Dict[str, Any]]:
+        """Query the Tavily REST API over the shared async connection pool."""
+        response = await shared_async_http_client.post(TAVILY_SEARCH_URL, json=self._tavily_request(query), timeout=10)
+        response.raise_for_status()
+        return self.search_engine.api_wrapper.clean_results(response.json()["results"])
+    
+    def _tavily_request(self, query: str) -> Dict[str, Any]:
+        """Build a Tavily search request with the same parameters as TavilySearchResults."""
+        return {
+            "api_key": self.search_engine.api_wrapper.tavily_api_key,
+            "query": query,
+            "max_results": self.search_engine.max_results,
+            "search_depth": "advanced",
+            "include_answer": False,
+            "include_raw_content": False,
+            "include_images": False
+        }
+    
+    async def _aduckduckgo_search(self, query: str) -> str:
+        """Query DuckDuckGo asynchronously, formatted like DuckDuckGoSearchResults."""
+        from duckduckgo_search import AsyncDDGS
+        
+        wrapper = self.search_engine.api_wrapper
+        async with AsyncDDGS() as ddgs:
+            hits = [
+                hit async for hit in ddgs.text(
+                    query,
+                    region=wrapper.region,
+                    safesearch=wrapper.safesearch,
+                    timelimit=wrapper.time,
+                    max_results=self.search_engine.max_results,
+                    backend=wrapper.backend
+                )
+            ]
+        return ", ".join(
+            f"[snippet: {hit['body']}, title: {hit['title']}, link: {hit['href']}]"
+            for hit in hits
+        )
+    
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        """Normalize a query so trivially different spellings share a cache entry."""
+        return " ".join(query.lower().split())
+    
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a query with the RAG embedding model, or return None if that fails."""
+        try:
+            return get_embedder().embed_query(query)
+        except Exception as e:
+            system_logger.warning("Could not embed web search query: {}", e)
+            return None
+    
+    async def _aembed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a query asynchronously, or return None if that fails."""
+        try:
+            return await get_embedder().aembed_query(query)
         except Exception as e:
-            error_msg = f"Error performing web search: {str(e)}"
-            system_logger.log_error("WebSearchError", error_msg, {"query": query})
-            system_logger.log_web_search(
-                query=query,
-                search_engine="unknown",
-                num_results=0,
-                success=False
-            )
-            return "I encountered an error while searching the web. Please consult with your healthcare provider."
+            system_logger.warning("Could not embed web search query: {}", e)
+            return None
+    
+    def _find_similar(self, key: str, embedding: Optional[List[float]]) -> Optional[Tuple[str, int]]:
+        """Get the cached results of a paraphrase of this query, storing them under its key too."""
+        if embedding is None:
+            return None
+        cached = self._cache.get_similar(embedding, self.engine_name)
+        if cached is not None:
+            self._cache.put(key, self.engine_name, embedding, cached)
+        return cached
+    
+    def _report_cached(self, cached: Tuple[str, int], query: str) -> str:
+        """Log a search answered from the cache and return its formatted results."""
+        formatted_results, num_results = cached
+        system_logger.log_web_search(
+            query=query,
+            search_engine=self.engine_name,
+            num_results=num_results,
+            success=True,
+            cache_hit=True
+        )
+        return formatted_results
+    
+    def _report_results(
+        self,
+        results: Any,
+        query: str,
+        cache_key: Optional[str] = None,
+        embedding: Optional[List[float]] = None
+    ) -> str:
+        """Format search results, log the successful search and cache it."""
+        formatted_results = self._format_results(results, query)
+        num_results = len(results) if isinstance(results, list) else 1
+        
+        system_logger.log_web_search(
+            query=query,
+            search_engine=self.engine_name,
+            num_results=num_results,
+            success=True
+        )
+        
+        # Queries that could not be embedded are not cached, so every entry is findable by similarity
+        if cache_key is not None and embedding is not None:
+            self._cache.put(cache_key, self.engine_name, embedding, (formatted_results, num_results))
+        
+        return formatted_results
+    
+    def _report_failure(self, error: Exception, query: str) -> str:
+        """Log a failed search and return the fallback message."""
+        error_msg = f"Error performing web search: {str(error)}"
+        system_logger.log_error("WebSearchError", error_msg, {"query": query})
+        system_logger.log_web_search(
+            query=query,
+            search_engine="unknown",
+            num_results=0,
+            success=False
+        )
+        return "I encountered an error while searching the web. Please consult with your healthcare provider."
     
     def _format_results(self, results: Any, query: str) -> str:
         """
@@ -124,13 +337,12 @@ class WebSearchTool:
             Formatted results string
         """
         try:
-            formatted = f"\n🔍 Web Search Results for: '{query}'\n"
-            formatted += "=" * 60 + "\n\n"
-            formatted += "⚠️ Note: This information comes from web search and should be verified with healthcare professionals.\n\n"
+            # Collected in a list and joined once, instead of growing a string
+            parts = [f"\n🔍 Web Search Results for: '{query}'\n", RESULTS_RULE, "\n\n", RESULTS_NOTE]
             
             if isinstance(results, str):
                 # DuckDuckGo returns a string
-                formatted += results
+                parts.append(results)
             elif isinstance(results, list):
                 # Tavily returns a list of dictionaries
                 for i, result in enumerate(results, 1):
@@ -139,21 +351,19 @@ class WebSearchTool:
                         content = result.get('content', result.get('snippet', 'No content'))
                         url = result.get('url', result.get('link', ''))
                         
-                        formatted += f"{i}. {title}\n"
-                        formatted += f"   {content}\n"
+                        parts.append(f"{i}. {title}\n   {content}\n")
                         if url:
-                            formatted += f"   Source: {url}\n"
-                        formatted += "\n"
+                            parts.append(f"   Source: {url}\n")
+                        parts.append("\n")
             else:
-                formatted += str(results)
+                parts.append(str(results))
             
-            formatted += "\n" + "=" * 60 + "\n"
-            formatted += "⚕️ Always consult with your healthcare provider before making any medical decisions.\n"
+            parts.extend(("\n", RESULTS_RULE, "\n", RESULTS_FOOTER))
             
-            return formatted
+            return "".join(parts)
             
         except Exception as e:
-            system_logger.error(f"Error formatting search results: {e}")
+            system_logger.error("Error formatting search results: {}", e)
             return f"Found information about '{query}', but encountered formatting issues. Please consult your healthcare provider."
     
     def as_langchain_tool(self) -> Tool:
@@ -166,7 +376,27 @@ class WebSearchTool:
         return Tool(
             name=self.name,
             description=self.description,
-            func=self.search
+            func=self.search,
+            coroutine=self.asearch
+        )
+    
+    def as_batch_langchain_tool(self) -> StructuredTool:
+        """
+        Convert the batch search to a LangChain tool.
+        
+        Returns:
+            LangChain StructuredTool taking a list of queries
+        """
+        return StructuredTool.from_function(
+            func=self.search_batch,
+            coroutine=self.asearch_batch,
+            name="web_search_batch",
+            description=(
+                "Runs several independent web searches in parallel. Use this instead of "
+                "calling web_search repeatedly when you need multiple facts at once "
+                "(e.g. a drug interaction, a recent guideline and a dosage)."
+            ),
+            args_schema=BatchWebSearchInput
         )
 
 
@@ -179,3 +409,14 @@ def create_web_search_tool() -> Tool:
     """
     tool = WebSearchTool()
     return tool.as_langchain_tool()
+
+
+def create_web_search_batch_tool() -> StructuredTool:
+    """
+    Create and return a batch web search tool.
+    
+    Returns:
+        LangChain StructuredTool for parallel web searches
+    """
+    tool = WebSearchTool()
+    return tool.as_batch_langchain_tool()
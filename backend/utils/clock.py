@@ -0,0 +1,39 @@
+"""
+Cached wall-clock strings for API responses.
+Timestamps are formatted at most once per second instead of on every request.
+"""
+
+from datetime import datetime
+import time
+
+_now_second = -1
+_now_iso = ""
+_today_key = ""
+
+
+def now_iso() -> str:
+    """
+    Return the current local time as an ISO-8601 string with second resolution.
+
+    Returns:
+        Timestamp string, reformatted only when the wall-clock second changes
+    """
+    global _now_second, _now_iso, _today_key
+    second = int(time.time())
+    if second != _now_second:
+        now = datetime.fromtimestamp(second)
+        _now_iso = now.isoformat()
+        _today_key = now.strftime("%Y%m%d")
+        _now_second = second
+    return _now_iso
+
+
+def today_stamp() -> str:
+    """
+    Return today's date as YYYYMMDD, e.g. for report filenames.
+
+    Returns:
+        Date string for the current local day
+    """
+    now_iso()
+    return _today_key
@@ -4,11 +4,76 @@ Tracks all interactions, agent handoffs, and system decisions.
 """
 
 from loguru import logger
+import atexit
+import queue
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
-import json
-from typing import Dict, Any, Optional
+import orjson
+from typing import Dict, Any, List, Optional
+
+_STOP = object()  # Queued by _BatchedLineWriter.close to end the writer thread
+
+
+class _BatchedLineWriter:
+    """
+    Appends encoded lines to a file from a daemon thread.
+    Lines queued while a write is in progress go out together in the next
+    write, followed by a single flush.
+    """
+    
+    def __init__(self, path: Path, max_batch: int = 64):
+        """
+        Initialize the writer and start its thread.
+        
+        Args:
+            path: File to append to (opened on the first write)
+            max_batch: Maximum number of lines per write
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._file = None
+        self._thread = threading.Thread(target=self._drain, name="interaction-log-writer", daemon=True)
+        self._thread.start()
+    
+    def write(self, line: bytes):
+        """Queue a newline-terminated line; returns immediately."""
+        self._queue.put(line)
+    
+    def close(self):
+        """Write all queued lines, then stop the thread and close the file."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout=5)
+    
+    def _drain(self):
+        """Writer thread: block for one line, then take whatever else is already queued."""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:
+                batch.pop()
+                stopping = True
+            if batch:
+                self._write(batch)
+        if self._file is not None:
+            self._file.close()
+    
+    def _write(self, lines: List[bytes]):
+        """Append a batch of lines to the file."""
+        try:
+            if self._file is None:
+                self._file = open(self.path, "ab", buffering=1 << 16)
+            self._file.write(b"".join(lines))
+            self._file.flush()
+        except OSError as e:
+            logger.error(f"Failed to write {len(lines)} interaction records: {e}")
 
 
 class SystemLogger:
@@ -35,7 +100,8 @@ class SystemLogger:
             sys.stdout,
             format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
             level="INFO",
-            colorize=True
+            colorize=True,
+            enqueue=True  # Write from a background thread, off the request path
         )
         
         # Add file logger with rotation
@@ -45,12 +111,22 @@ class SystemLogger:
             level="DEBUG",
             rotation="10 MB",
             retention="30 days",
-            compression="zip"
+            compression="zip",
+            enqueue=True
         )
         
         # Create interaction log file
         self.interaction_log_path = self.log_file_path.parent / "interactions.jsonl"
         
+        # Interaction records are queued by callers and appended to the file
+        # in batches by a writer thread, so request paths never wait on disk I/O
+        self._record_writer = _BatchedLineWriter(self.interaction_log_path)
+        atexit.register(self._record_writer.close)
+    
+    def _write_record(self, data: Dict[str, Any]):
+        """Queue a structured record for the interaction log file."""
+        self._record_writer.write(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE))
+        
     def log_interaction(
         self,
         interaction_type: str,
@@ -68,7 +144,7 @@ class SystemLogger:
             metadata: Additional metadata
         """
         interaction_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": interaction_type,
             "agent": agent,
             "message": message,
@@ -79,8 +155,43 @@ class SystemLogger:
         logger.info(f"[{interaction_type}] {agent}: {message}")
         
         # Log to interaction file
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(interaction_data) + "\n")
+        self._write_record(interaction_data)
+    
+    def log_chat_turn(
+        self,
+        session_id: str,
+        user_message: str,
+        agent: str,
+        response: str,
+        events: Optional[list] = None
+    ):
+        """
+        Log a complete chat turn as a single structured record.
+        
+        Args:
+            session_id: Session identifier
+            user_message: The user's message
+            agent: Name of the agent that answered
+            response: The agent's response
+            events: Handoffs, lookups and tool calls made during the turn
+        """
+        events = events or []
+        turn_data = {
+            "timestamp": datetime.now(),
+            "type": "chat_turn",
+            "session_id": session_id,
+            "user_message": user_message,
+            "agent": agent,
+            "response": response,
+            "events": events
+        }
+        
+        logger.info(
+            "CHAT TURN [{}] {}: {} event(s), {} chars",
+            session_id[:8], agent, len(events), len(response)
+        )
+        
+        self._write_record(turn_data)
     
     def log_agent_handoff(
         self,
@@ -99,7 +210,7 @@ class SystemLogger:
             context: Additional context
         """
         handoff_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "agent_handoff",
             "from_agent": from_agent,
             "to_agent": to_agent,
@@ -109,8 +220,7 @@ class SystemLogger:
         
         logger.warning(f"AGENT HANDOFF: {from_agent} -> {to_agent} | Reason: {reason}")
         
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(handoff_data) + "\n")
+        self._write_record(handoff_data)
     
     def log_database_access(
         self,
@@ -131,7 +241,7 @@ class SystemLogger:
             success: Whether operation succeeded
         """
         db_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "database_access",
             "operation": operation,
             "table": table,
@@ -143,8 +253,7 @@ class SystemLogger:
         status = "SUCCESS" if success else "FAILED"
         logger.info(f"DB ACCESS [{status}]: {operation} on {table} - Query: {query}")
         
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(db_data) + "\n")
+        self._write_record(db_data)
     
     def log_rag_retrieval(
         self,
@@ -163,7 +272,7 @@ class SystemLogger:
             success: Whether retrieval succeeded
         """
         rag_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "rag_retrieval",
             "query": query,
             "num_results": num_results,
@@ -173,15 +282,15 @@ class SystemLogger:
         
         logger.info(f"RAG RETRIEVAL: Query='{query}' | Results={num_results} | Sources={len(sources)}")
         
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(rag_data) + "\n")
+        self._write_record(rag_data)
     
     def log_web_search(
         self,
         query: str,
         search_engine: str,
         num_results: int,
-        success: bool = True
+        success: bool = True,
+        cache_hit: bool = False
     ):
         """
         Log web search attempts.
@@ -191,20 +300,22 @@ class SystemLogger:
             search_engine: Search engine used
             num_results: Number of results
             success: Whether search succeeded
+            cache_hit: Whether the results were served from the search cache
         """
         search_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "web_search",
             "query": query,
             "search_engine": search_engine,
             "num_results": num_results,
-            "success": success
+            "success": success,
+            "cache_hit": cache_hit
         }
         
-        logger.info(f"WEB SEARCH [{search_engine}]: Query='{query}' | Results={num_results}")
+        cached = " (cached)" if cache_hit else ""
+        logger.info(f"WEB SEARCH [{search_engine}]{cached}: Query='{query}' | Results={num_results}")
         
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(search_data) + "\n")
+        self._write_record(search_data)
     
     def log_error(
         self,
@@ -221,7 +332,7 @@ class SystemLogger:
             context: Additional context
         """
         error_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "type": "error",
             "error_type": error_type,
             "error_message": error_message,
@@ -230,24 +341,23 @@ class SystemLogger:
         
         logger.error(f"ERROR [{error_type}]: {error_message}")
         
-        with open(self.interaction_log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(error_data) + "\n")
+        self._write_record(error_data)
     
-    def info(self, message: str):
-        """Log info message."""
-        logger.info(message)
+    def info(self, message: str, *args):
+        """Log info message, filling `{}` placeholders from args only if the level is enabled."""
+        logger.info(message, *args)
     
-    def debug(self, message: str):
-        """Log debug message."""
-        logger.debug(message)
+    def debug(self, message: str, *args):
+        """Log debug message, filling `{}` placeholders from args only if the level is enabled."""
+        logger.debug(message, *args)
     
-    def warning(self, message: str):
-        """Log warning message."""
-        logger.warning(message)
+    def warning(self, message: str, *args):
+        """Log warning message, filling `{}` placeholders from args only if the level is enabled."""
+        logger.warning(message, *args)
     
-    def error(self, message: str):
-        """Log error message."""
-        logger.error(message)
+    def error(self, message: str, *args):
+        """Log error message, filling `{}` placeholders from args only if the level is enabled."""
+        logger.error(message, *args)
 
 
 # Global logger instance
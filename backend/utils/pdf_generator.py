@@ -8,9 +8,101 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from datetime import datetime
-from typing import Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, List
+import asyncio
+import copy
+import hashlib
 import io
+import json
+import multiprocessing
+import os
+import time
+import uuid
+
+from ..config import DATA_DIR
+
+# Generated reports are cached here and reused for the rest of the day
+PDF_CACHE_DIR = DATA_DIR / "pdf_cache"
+PDF_CACHE_MAX_AGE = 24 * 60 * 60
+# Report downloads are occasional; each worker imports reportlab and the backend
+PDF_POOL_WORKERS = 2
+
+
+@lru_cache(maxsize=1)
+def _get_styles():
+    """Get the report stylesheet, built once and shared by every generator."""
+    styles = getSampleStyleSheet()
+    _add_custom_styles(styles)
+    return styles
+
+
+def _add_custom_styles(styles):
+    """Add the custom paragraph styles used by the report."""
+    # Only add styles if they don't exist
+    if 'CustomTitle' not in styles:
+        styles.add(ParagraphStyle(
+            name='CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#1f77b4'),
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            fontName='Helvetica-Bold'
+        ))
+    
+    if 'SectionHeader' not in styles:
+        styles.add(ParagraphStyle(
+            name='SectionHeader',
+            parent=styles['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#2c3e50'),
+            spaceAfter=12,
+            spaceBefore=12,
+            fontName='Helvetica-Bold'
+        ))
+    
+    if 'CustomBodyText' not in styles:
+        styles.add(ParagraphStyle(
+            name='CustomBodyText',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=10,
+            alignment=TA_JUSTIFY
+        ))
+    
+    if 'Disclaimer' not in styles:
+        styles.add(ParagraphStyle(
+            name='Disclaimer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.red,
+            spaceAfter=20,
+            borderColor=colors.red,
+            borderWidth=1,
+            borderPadding=10,
+            backColor=colors.HexColor('#fff3cd')
+        ))
+    
+    if 'WarningStyle' not in styles:
+        styles.add(ParagraphStyle(
+            name='WarningStyle',
+            parent=styles['CustomBodyText'],
+            textColor=colors.HexColor('#d32f2f'),
+            fontName='Helvetica-Bold'
+        ))
+    
+    if 'Footer' not in styles:
+        styles.add(ParagraphStyle(
+            name='Footer',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ))
 
 
 class PatientReportGenerator:
@@ -18,42 +110,22 @@ class PatientReportGenerator:
     
     def __init__(self):
         """Initialize the PDF generator."""
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles."""
-        # Only add styles if they don't exist
-        if 'CustomTitle' not in self.styles:
-            self.styles.add(ParagraphStyle(
-                name='CustomTitle',
-                parent=self.styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#1f77b4'),
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                fontName='Helvetica-Bold'
-            ))
+        self.styles = _get_styles()
         
-        if 'SectionHeader' not in self.styles:
-            self.styles.add(ParagraphStyle(
-                name='SectionHeader',
-                parent=self.styles['Heading2'],
-                fontSize=14,
-                textColor=colors.HexColor('#2c3e50'),
-                spaceAfter=12,
-                spaceBefore=12,
-                fontName='Helvetica-Bold'
-            ))
+        # Static table styling, shared by every report
+        self._patient_info_tablestyle = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e3f2fd')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
+        ])
         
-        if 'CustomBodyText' not in self.styles:
-            self.styles.add(ParagraphStyle(
-                name='CustomBodyText',
-                parent=self.styles['Normal'],
-                fontSize=11,
-                spaceAfter=10,
-                alignment=TA_JUSTIFY
-            ))
+        # Fixed flowables of every report, with placeholders for patient details
+        self._template = self._build_template()
     
     def generate_patient_report(self, patient_data: Dict[str, Any]) -> bytes:
         """
@@ -65,12 +137,21 @@ class PatientReportGenerator:
         Returns:
             PDF file as bytes
         """
-        # Create a BytesIO buffer
-        buffer = io.BytesIO()
+        with io.BytesIO() as buffer:
+            self.write_patient_report(patient_data, buffer)
+            return buffer.getvalue()
+    
+    def write_patient_report(self, patient_data: Dict[str, Any], output: BinaryIO):
+        """
+        Write a PDF report for a patient to a binary stream.
         
+        Args:
+            patient_data: Dictionary containing patient information
+            output: Writable binary file object the PDF is written to
+        """
         # Create the PDF document
         doc = SimpleDocTemplate(
-            buffer,
+            output,
             pagesize=letter,
             rightMargin=72,
             leftMargin=72,
@@ -78,142 +159,122 @@ class PatientReportGenerator:
             bottomMargin=18,
         )
         
-        # Container for the 'Flowable' objects
+        # Fill the report template: static flowables are copied, since layout
+        # stores per-document state on them, and placeholders are replaced
+        # with the patient's details
         elements = []
+        for entry in self._template:
+            if isinstance(entry, str):
+                elements.extend(self._patient_flowables(entry, patient_data))
+            else:
+                elements.append(copy.copy(entry))
         
-        # Add title
-        title = Paragraph("Post-Discharge Medical Report", self.styles['CustomTitle'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Add medical disclaimer
-        disclaimer = Paragraph(
-            "<b>⚠️ MEDICAL DISCLAIMER:</b> This report is for informational purposes only. "
-            "Always consult with healthcare professionals for medical advice. "
-            "In case of emergency, call 911 or go to the nearest emergency room.",
-            ParagraphStyle(
-                name='Disclaimer',
-                parent=self.styles['Normal'],
-                fontSize=9,
-                textColor=colors.red,
-                spaceAfter=20,
-                borderColor=colors.red,
-                borderWidth=1,
-                borderPadding=10,
-                backColor=colors.HexColor('#fff3cd')
-            )
-        )
-        elements.append(disclaimer)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Patient Information Section
-        elements.append(Paragraph("Patient Information", self.styles['SectionHeader']))
+        # Build PDF
+        doc.build(elements)
+    
+    def _build_template(self) -> List[Any]:
+        """
+        Build the fixed part of the report once.
         
-        patient_info_data = [
-            ['Patient Name:', patient_data.get('patient_name', 'N/A')],
-            ['Patient ID:', str(patient_data.get('patient_id', 'N/A'))],
-            ['Discharge Date:', patient_data.get('discharge_date', 'N/A')],
-            ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+        Returns:
+            Flowables in report order, with the names of patient-specific
+            sections as placeholders
+        """
+        styles = self.styles
+        return [
+            # Title
+            Paragraph("Post-Discharge Medical Report", styles['CustomTitle']),
+            Spacer(1, 0.2*inch),
+            
+            # Medical disclaimer
+            Paragraph(
+                "<b>⚠️ MEDICAL DISCLAIMER:</b> This report is for informational purposes only. "
+                "Always consult with healthcare professionals for medical advice. "
+                "In case of emergency, call 911 or go to the nearest emergency room.",
+                styles['Disclaimer']
+            ),
+            Spacer(1, 0.3*inch),
+            
+            Paragraph("Patient Information", styles['SectionHeader']),
+            "patient_info",
+            Spacer(1, 0.3*inch),
+            
+            Paragraph("Primary Diagnosis", styles['SectionHeader']),
+            "primary_diagnosis",
+            Spacer(1, 0.2*inch),
+            
+            Paragraph("Prescribed Medications", styles['SectionHeader']),
+            "medications",
+            Spacer(1, 0.2*inch),
+            
+            Paragraph("Dietary Restrictions", styles['SectionHeader']),
+            "dietary_restrictions",
+            Spacer(1, 0.2*inch),
+            
+            Paragraph("Follow-up Appointment", styles['SectionHeader']),
+            "follow_up",
+            Spacer(1, 0.2*inch),
+            
+            Paragraph("⚠️ Warning Signs to Watch For", styles['SectionHeader']),
+            "warning_signs",
+            Spacer(1, 0.2*inch),
+            
+            Paragraph("Discharge Instructions", styles['SectionHeader']),
+            "discharge_instructions",
+            Spacer(1, 0.3*inch),
+            
+            # Footer
+            Spacer(1, 0.5*inch),
+            Paragraph(
+                "This report was generated by the Post Discharge Medical AI Assistant. "
+                "For questions or concerns, please contact your healthcare provider.",
+                styles['Footer']
+            ),
         ]
+    
+    def _patient_flowables(self, section: str, patient_data: Dict[str, Any]) -> List[Any]:
+        """
+        Build the flowables of a patient-specific report section.
         
-        patient_info_table = Table(patient_info_data, colWidths=[2*inch, 4*inch])
-        patient_info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e3f2fd')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey)
-        ]))
-        elements.append(patient_info_table)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Primary Diagnosis
-        elements.append(Paragraph("Primary Diagnosis", self.styles['SectionHeader']))
-        diagnosis_text = Paragraph(
-            patient_data.get('primary_diagnosis', 'N/A'),
-            self.styles['CustomBodyText']
-        )
-        elements.append(diagnosis_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Medications
-        elements.append(Paragraph("Prescribed Medications", self.styles['SectionHeader']))
-        medications = patient_data.get('medications', [])
-        if medications:
-            for i, med in enumerate(medications, 1):
-                med_text = Paragraph(f"{i}. {med}", self.styles['CustomBodyText'])
-                elements.append(med_text)
-        else:
-            elements.append(Paragraph("No medications listed", self.styles['CustomBodyText']))
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Dietary Restrictions
-        elements.append(Paragraph("Dietary Restrictions", self.styles['SectionHeader']))
-        dietary_text = Paragraph(
-            patient_data.get('dietary_restrictions', 'No specific restrictions'),
-            self.styles['CustomBodyText']
-        )
-        elements.append(dietary_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Follow-up Instructions
-        elements.append(Paragraph("Follow-up Appointment", self.styles['SectionHeader']))
-        followup_text = Paragraph(
-            patient_data.get('follow_up', 'No follow-up scheduled'),
-            self.styles['CustomBodyText']
-        )
-        elements.append(followup_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Warning Signs
-        elements.append(Paragraph("⚠️ Warning Signs to Watch For", self.styles['SectionHeader']))
-        warning_text = Paragraph(
-            patient_data.get('warning_signs', 'No specific warnings'),
-            ParagraphStyle(
-                name='WarningStyle',
-                parent=self.styles['CustomBodyText'],
-                textColor=colors.HexColor('#d32f2f'),
-                fontName='Helvetica-Bold'
-            )
-        )
-        elements.append(warning_text)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Discharge Instructions
-        elements.append(Paragraph("Discharge Instructions", self.styles['SectionHeader']))
-        instructions_text = Paragraph(
-            patient_data.get('discharge_instructions', 'Follow standard post-discharge care'),
-            self.styles['CustomBodyText']
-        )
-        elements.append(instructions_text)
-        elements.append(Spacer(1, 0.3*inch))
-        
-        # Footer
-        elements.append(Spacer(1, 0.5*inch))
-        footer = Paragraph(
-            "This report was generated by the Post Discharge Medical AI Assistant. "
-            "For questions or concerns, please contact your healthcare provider.",
-            ParagraphStyle(
-                name='Footer',
-                parent=self.styles['Normal'],
-                fontSize=9,
-                textColor=colors.grey,
-                alignment=TA_CENTER
-            )
-        )
-        elements.append(footer)
-        
-        # Build PDF
-        doc.build(elements)
+        Args:
+            section: Placeholder name from the report template
+            patient_data: Dictionary containing patient information
+            
+        Returns:
+            Flowables to insert in place of the placeholder
+        """
+        if section == "patient_info":
+            patient_info_data = [
+                ['Patient Name:', patient_data.get('patient_name', 'N/A')],
+                ['Patient ID:', str(patient_data.get('patient_id', 'N/A'))],
+                ['Discharge Date:', patient_data.get('discharge_date', 'N/A')],
+                ['Report Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
+            ]
+            patient_info_table = Table(patient_info_data, colWidths=[2*inch, 4*inch])
+            patient_info_table.setStyle(self._patient_info_tablestyle)
+            return [patient_info_table]
         
-        # Get the value of the BytesIO buffer
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
+        if section == "medications":
+            medications = patient_data.get('medications', [])
+            if not medications:
+                return [Paragraph("No medications listed", self.styles['CustomBodyText'])]
+            return [
+                Paragraph(f"{i}. {med}", self.styles['CustomBodyText'])
+                for i, med in enumerate(medications, 1)
+            ]
         
-        return pdf_bytes
+        default, style_name = _TEXT_SECTIONS[section]
+        return [Paragraph(patient_data.get(section, default), self.styles[style_name])]
+
+
+# Text sections of the report: patient field -> (default text, paragraph style)
+_TEXT_SECTIONS = {
+    'primary_diagnosis': ('N/A', 'CustomBodyText'),
+    'dietary_restrictions': ('No specific restrictions', 'CustomBodyText'),
+    'follow_up': ('No follow-up scheduled', 'CustomBodyText'),
+    'warning_signs': ('No specific warnings', 'WarningStyle'),
+    'discharge_instructions': ('Follow standard post-discharge care', 'CustomBodyText'),
+}
 
 
 # Global instance
@@ -230,3 +291,127 @@ def generate_patient_pdf(patient_data: Dict[str, Any]) -> bytes:
         PDF file as bytes
     """
     return pdf_generator.generate_patient_report(patient_data)
+
+
+def write_patient_pdf(patient_data: Dict[str, Any], output: BinaryIO):
+    """
+    Write a PDF report for a patient to a binary stream.
+    
+    Args:
+        patient_data: Patient information dictionary
+        output: Writable binary file object
+    """
+    pdf_generator.write_patient_report(patient_data, output)
+
+
+def get_patient_pdf_path(patient_data: Dict[str, Any]) -> Path:
+    """
+    Get a cached PDF report for a patient, generating it if needed.
+    
+    Reports are keyed by the patient record and the current date, so a
+    changed record or a new day produces a fresh report.
+    
+    Args:
+        patient_data: Patient information dictionary
+        
+    Returns:
+        Path of the PDF file
+    """
+    path = _pdf_cache_path(patient_data)
+    if path.exists():
+        return path
+    
+    tmp_path = _prepare_pdf_cache(path)
+    try:
+        write_patient_pdf_file(patient_data, str(tmp_path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+async def aget_patient_pdf_path(patient_data: Dict[str, Any]) -> Path:
+    """
+    Get a cached PDF report for a patient, rendering it in a worker process if needed.
+    
+    Rendering is CPU-bound, so it runs in the PDF process pool where it
+    neither blocks the event loop nor holds the GIL of the API process.
+    
+    Args:
+        patient_data: Patient information dictionary
+        
+    Returns:
+        Path of the PDF file
+    """
+    path = _pdf_cache_path(patient_data)
+    if path.exists():
+        return path
+    
+    tmp_path = _prepare_pdf_cache(path)
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            _get_pdf_pool(), write_patient_pdf_file, patient_data, str(tmp_path)
+        )
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def write_patient_pdf_file(patient_data: Dict[str, Any], file_path: str):
+    """
+    Write a PDF report for a patient to a file.
+    
+    Module-level so it can run in the PDF process pool; workers build their
+    own generator on import, and only the patient dict is sent to them.
+    
+    Args:
+        patient_data: Patient information dictionary
+        file_path: Path of the file to create
+    """
+    with open(file_path, "wb") as output:
+        write_patient_pdf(patient_data, output)
+
+
+@lru_cache(maxsize=1)
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Get the shared PDF rendering process pool, created on first use."""
+    # Spawned rather than forked: the API process runs logger and HTTP pool
+    # threads whose locks a forked child could inherit in a held state
+    return ProcessPoolExecutor(
+        max_workers=PDF_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def _pdf_cache_path(patient_data: Dict[str, Any]) -> Path:
+    """Get the cache file of a patient's report for today."""
+    record = json.dumps(patient_data, sort_keys=True, default=str)
+    key = hashlib.sha1(f"{record}|{date.today().isoformat()}".encode("utf-8")).hexdigest()
+    return PDF_CACHE_DIR / f"{key}.pdf"
+
+
+def _prepare_pdf_cache(path: Path) -> Path:
+    """
+    Make room in the cache and pick a temporary file to render a report into.
+    
+    The report is renamed to its final path once complete, so readers never
+    see a partial PDF; the name is unique so concurrent renders never share it.
+    """
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    _prune_pdf_cache()
+    return path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def _prune_pdf_cache():
+    """Delete cached reports, and temporary files left by failed renders, older than PDF_CACHE_MAX_AGE."""
+    cutoff = time.time() - PDF_CACHE_MAX_AGE
+    for pattern in ("*.pdf", "*.tmp"):
+        for cached in PDF_CACHE_DIR.glob(pattern):
+            try:
+                if cached.stat().st_mtime < cutoff:
+                    cached.unlink()
+            except OSError:
+                pass
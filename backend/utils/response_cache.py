@@ -0,0 +1,90 @@
+"""
+In-process cache for agent responses.
+Lets repeated patient questions skip the agent executor and its LLM round-trips.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Optional
+import hashlib
+import json
+
+
+class ResponseCache:
+    """
+    LRU cache of raw agent outputs.
+    Keys combine the agent, the normalized message, the patient context
+    and the tail of the conversation so personalized answers never collide.
+    """
+
+    def __init__(self, max_size: int = 512, history_tail: int = 4):
+        """
+        Initialize the response cache.
+
+        Args:
+            max_size: Maximum number of cached responses
+            history_tail: Number of trailing chat messages included in the key
+        """
+        self.max_size = max_size
+        self.history_tail = history_tail
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = Lock()
+
+    def make_key(
+        self,
+        agent: str,
+        message: str,
+        context: Optional[Dict[str, Any]] = None,
+        chat_history: list = None
+    ) -> str:
+        """
+        Build a cache key for an agent call.
+
+        Args:
+            agent: Name of the agent
+            message: User's message
+            context: Context that personalizes the answer (e.g. diagnosis, medications)
+            chat_history: Previous conversation history
+
+        Returns:
+            Cache key string
+        """
+        history = (chat_history or [])[-self.history_tail:] if self.history_tail else []
+        payload = json.dumps(
+            {
+                "agent": agent,
+                "msg": " ".join(message.lower().split()),
+                "ctx": context,
+                "history_tail": [getattr(m, "content", str(m)) for m in history]
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entry when full."""
+        if not response:
+            return
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,104 @@
+"""
+Per-session conversation state storage.
+Uses Redis when configured so any worker can serve any session, and a
+bounded in-process TTL cache otherwise.
+"""
+
+from typing import Optional
+from threading import Lock
+from cachetools import TTLCache
+import msgpack
+
+from .logger import system_logger
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class InMemorySessionStore:
+    """Session store kept in this process; sessions expire after `ttl` seconds."""
+
+    def __init__(self, ttl: int = 1800, max_sessions: int = 10000):
+        """
+        Initialize the in-memory session store.
+
+        Args:
+            ttl: Seconds a session is kept after its last update
+            max_sessions: Maximum number of sessions kept at once
+        """
+        self._sessions = TTLCache(maxsize=max_sessions, ttl=ttl)
+        self._lock = Lock()
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        """Return the state of a session, or None if unknown or expired."""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    async def set(self, session_id: str, state: dict):
+        """Store the state of a session and refresh its expiry."""
+        with self._lock:
+            self._sessions[session_id] = state
+
+    async def delete(self, session_id: str):
+        """Forget a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    async def close(self):
+        """Release resources (nothing to do in memory)."""
+
+
+class RedisSessionStore:
+    """Session store backed by Redis; states are msgpack-encoded with an expiry."""
+
+    def __init__(self, redis_url: str, ttl: int = 1800, prefix: str = "sess:"):
+        """
+        Initialize the Redis session store.
+
+        Args:
+            redis_url: Redis connection URL
+            ttl: Seconds a session is kept after its last update
+            prefix: Key prefix for session entries
+        """
+        self.redis = aioredis.from_url(redis_url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        """Return the state of a session, or None if unknown or expired."""
+        data = await self.redis.get(self.prefix + session_id)
+        return msgpack.unpackb(data, raw=False) if data is not None else None
+
+    async def set(self, session_id: str, state: dict):
+        """Store the state of a session and refresh its expiry."""
+        await self.redis.set(self.prefix + session_id, msgpack.packb(state, use_bin_type=True), ex=self.ttl)
+
+    async def delete(self, session_id: str):
+        """Forget a session."""
+        await self.redis.delete(self.prefix + session_id)
+
+    async def close(self):
+        """Close the Redis connection pool."""
+        await self.redis.close()
+
+
+def create_session_store(redis_url: Optional[str] = None, ttl: int = 1800):
+    """
+    Create the session store for the configured backend.
+
+    Args:
+        redis_url: Redis connection URL; in-memory storage is used when unset
+        ttl: Seconds a session is kept after its last update
+
+    Returns:
+        Session store instance
+    """
+    if redis_url:
+        if REDIS_AVAILABLE:
+            system_logger.info("Using Redis session store")
+            return RedisSessionStore(redis_url, ttl=ttl)
+        system_logger.warning("REDIS_URL is set but the redis package is not installed; using in-memory sessions")
+    return InMemorySessionStore(ttl=ttl)
@@ -4,8 +4,16 @@ Streamlit frontend for Post Discharge Medical AI Assistant.
 
 import streamlit as st
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
+import orjson
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
 
 # Page configuration
 st.set_page_config(
@@ -17,6 +25,22 @@ st.set_page_config(
 
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Streamed replies are redrawn at most this often (seconds)
+STREAM_RENDER_INTERVAL = 0.05
+
+# Only the most recent messages are kept in session state and redrawn on
+# every rerun; older ones are appended to a per-session archive file
+MAX_CHAT_MESSAGES = 40
+CHAT_ARCHIVE_DIR = Path(tempfile.gettempdir()) / "post_discharge_chat"
+# Archives of abandoned sessions are deleted after this long (seconds)
+CHAT_ARCHIVE_MAX_AGE = 24 * 60 * 60
+
+# The status stream sends a keep-alive at least every 30 s; a longer silence
+# means the connection is gone
+STATUS_STREAM_READ_TIMEOUT = 60
+STATUS_STREAM_RETRY_DELAY = 5
 
 # Custom CSS
 st.markdown("""
@@ -35,43 +59,26 @@ st.markdown("""
         margin: 1rem 0;
         border-radius: 4px;
     }
-    .chat-message {
-        padding: 1rem;
-        margin: 0.5rem 0;
-        border-radius: 8px;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        border-left: 4px solid #2196f3;
-    }
-    .assistant-message {
-        background-color: #f5f5f5;
-        border-left: 4px solid #4caf50;
-    }
-    .agent-badge {
-        display: inline-block;
-        padding: 0.25rem 0.5rem;
-        border-radius: 4px;
-        font-size: 0.8rem;
-        font-weight: bold;
-        margin-bottom: 0.5rem;
-    }
-    .receptionist-badge {
-        background-color: #2196f3;
-        color: white;
-    }
-    .clinical-badge {
-        background-color: #4caf50;
-        color: white;
-    }
 </style>
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Get the HTTP session shared by all API calls, reusing keep-alive connections."""
+    return requests.Session()
+
+
+@st.cache_resource
+def get_request_pool() -> ThreadPoolExecutor:
+    """Get the thread pool used to make independent API calls concurrently."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
 def check_api_health():
     """Check if API is running."""
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
+        response = get_http_session().get(f"{API_BASE_URL}/health", timeout=5)
         return response.status_code == 200
     except:
         return False
@@ -80,7 +87,7 @@ def check_api_health():
 def get_system_status():
     """Get system status from API."""
     try:
-        response = requests.get(f"{API_BASE_URL}/status", timeout=5)
+        response = get_http_session().get(f"{API_BASE_URL}/status", timeout=5)
         if response.status_code == 200:
             return response.json()
         return None
@@ -88,6 +95,99 @@ def get_system_status():
         return None
 
 
+# Cached briefly, since Streamlit reruns the whole script on every interaction
+@st.cache_data(ttl=10, show_spinner=False)
+def get_api_state():
+    """
+    Check API health and get system status at the same time.
+    
+    Returns:
+        Tuple of (API is running, system status or None)
+    """
+    # Create the shared session from the script thread before workers use it
+    get_http_session()
+    
+    pool = get_request_pool()
+    health = pool.submit(check_api_health)
+    status = pool.submit(get_system_status)
+    return health.result(), status.result()
+
+
+def iter_sse_events(response: requests.Response):
+    """
+    Parse a Server-Sent Events stream.
+    
+    Lines are read as bytes and event data is decoded with orjson directly,
+    without decoding the stream to text first.
+    
+    Yields:
+        (event name, parsed JSON data) for each event carrying data
+    """
+    event = b"message"
+    data = []
+    for line in response.iter_lines(chunk_size=None):
+        if not line:
+            # A blank line ends the event; its data lines are joined by newlines
+            if data:
+                yield event.decode(), orjson.loads(b"\n".join(data))
+            event = b"message"
+            data = []
+        elif line.startswith(b"data:"):
+            data.append(line[5:])
+        elif line.startswith(b"event:"):
+            event = line[6:].strip()
+
+
+class StatusFeed:
+    """
+    Follows the API's /status/stream from a background thread.
+    The latest pushed status is kept in memory, so reruns read it without
+    any network call.
+    """
+    
+    def __init__(self, url: str):
+        """
+        Initialize the feed and start its thread.
+        
+        Args:
+            url: Status stream endpoint
+        """
+        self.url = url
+        self._status = None
+        self._thread = threading.Thread(target=self._follow, name="status-feed", daemon=True)
+        self._thread.start()
+    
+    def snapshot(self):
+        """Get the latest status, or None while the stream is not connected."""
+        return self._status
+    
+    def _follow(self):
+        """Feed thread: read status events, reconnecting after errors."""
+        while True:
+            try:
+                with requests.get(
+                    self.url,
+                    stream=True,
+                    timeout=(5, STATUS_STREAM_READ_TIMEOUT)
+                ) as response:
+                    if response.status_code == 404:
+                        # This backend has no status stream; callers poll instead
+                        return
+                    if response.status_code == 200:
+                        for _, status in iter_sse_events(response):
+                            self._status = status
+            except (requests.RequestException, ValueError):
+                pass
+            self._status = None
+            time.sleep(STATUS_STREAM_RETRY_DELAY)
+
+
+@st.cache_resource
+def get_status_feed() -> StatusFeed:
+    """Get the status feed shared by all sessions of this Streamlit server."""
+    return StatusFeed(f"{API_BASE_URL}/status/stream")
+
+
 def send_message(message: str, session_id: str = None):
     """Send message to API."""
     try:
@@ -95,7 +195,7 @@ def send_message(message: str, session_id: str = None):
         if session_id:
             payload["session_id"] = session_id
         
-        response = requests.post(
+        response = get_http_session().post(
             f"{API_BASE_URL}/chat",
             json=payload,
             timeout=30
@@ -108,18 +208,181 @@ def send_message(message: str, session_id: str = None):
         return None
 
 
+def stream_message(message: str, session_id: str = None):
+    """
+    Send message to the streaming chat API.
+    
+    Falls back to the blocking /chat endpoint on backends without streaming.
+    
+    Yields:
+        ("token", text) for each chunk of the response as it is generated,
+        then ("done", response) with the response in the same shape as /chat
+    """
+    try:
+        payload = {"message": message}
+        if session_id:
+            payload["session_id"] = session_id
+        
+        with get_http_session().post(
+            f"{API_BASE_URL}/chat/stream",
+            json=payload,
+            stream=True,
+            timeout=(5, 30)  # connect, and longest wait between chunks
+        ) as response:
+            if response.status_code == 404:
+                result = send_message(message, session_id)
+                if result:
+                    yield "token", result.get("response", "")
+                    yield "done", result
+                return
+            if response.status_code != 200:
+                return
+            
+            for event, data in iter_sse_events(response):
+                if event == "done":
+                    yield "done", data
+                else:
+                    yield "token", data["token"]
+    except Exception as e:
+        st.error(f"Error communicating with API: {str(e)}")
+
+
+def download_to_temp_file(response: requests.Response, suffix: str = "") -> str:
+    """
+    Save a streamed response body to a temporary file in 1 MB chunks.
+    
+    The body is decoded as it is read, since the API may gzip it.
+    
+    Returns:
+        Path of the temporary file; the caller deletes it
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            tmp.write(chunk)
+    return tmp.name
+
+
 def reset_session():
     """Reset the chat session."""
     try:
-        response = requests.post(f"{API_BASE_URL}/reset", timeout=5)
+        response = get_http_session().post(f"{API_BASE_URL}/reset", timeout=5)
         return response.status_code == 200
     except:
         return False
 
 
+def agent_label(agent: str) -> str:
+    """Get the badge shown above a reply from the given agent."""
+    is_receptionist = "receptionist" in agent.lower()
+    return "👋 Receptionist Agent" if is_receptionist else "⚕️ Clinical AI Agent"
+
+
+def as_markdown(content: str) -> str:
+    """Keep the line breaks of a message when rendered as Markdown."""
+    return content.replace("\n", "  \n")
+
+
+def new_message(role: str, content: str, agent: str = None, timestamp: str = None) -> dict:
+    """
+    Create a chat message for the session history.
+    
+    The Markdown body and agent badge are computed here, once, so rerenders
+    on later reruns do no string work.
+    
+    Args:
+        role: "user" or "assistant"
+        content: Message text
+        agent: Agent that wrote an assistant message
+        timestamp: ISO timestamp (defaults to now)
+        
+    Returns:
+        Message dictionary
+    """
+    message = {
+        "role": role,
+        "content": content,
+        "timestamp": timestamp or datetime.now().isoformat(),
+        "markdown": as_markdown(content)
+    }
+    if role == "assistant":
+        message["agent"] = agent or "receptionist"
+        message["label"] = agent_label(message["agent"])
+    return message
+
+
+@st.cache_resource
+def prune_chat_archives():
+    """Delete archive files older than CHAT_ARCHIVE_MAX_AGE, once per app process."""
+    cutoff = time.time() - CHAT_ARCHIVE_MAX_AGE
+    for archive in CHAT_ARCHIVE_DIR.glob("*.jsonl"):
+        try:
+            if archive.stat().st_mtime < cutoff:
+                archive.unlink()
+        except OSError:
+            pass
+
+
+def chat_archive_path() -> Path:
+    """Get the archive file of this browser session's older messages."""
+    return CHAT_ARCHIVE_DIR / f"{st.session_state.archive_id}.jsonl"
+
+
+def archive_old_messages():
+    """Move messages beyond the most recent MAX_CHAT_MESSAGES to the archive file."""
+    messages = st.session_state.messages
+    overflow = len(messages) - MAX_CHAT_MESSAGES
+    if overflow <= 0:
+        return
+    
+    CHAT_ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(chat_archive_path(), "ab") as archive:
+        archive.write(b"".join(
+            orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
+            for message in messages[:overflow]
+        ))
+    del messages[:overflow]
+    st.session_state.archived_count += overflow
+
+
+def load_archived_messages() -> list:
+    """
+    Read this session's archived messages.
+    
+    Returns:
+        Archived messages, oldest first
+    """
+    try:
+        with open(chat_archive_path(), "rb") as archive:
+            return [orjson.loads(line) for line in archive]
+    except FileNotFoundError:
+        return []
+
+
+def clear_chat_archive():
+    """Delete this session's archived messages."""
+    chat_archive_path().unlink(missing_ok=True)
+    st.session_state.archived_count = 0
+    st.session_state.show_archived = False
+
+
+def render_message(message: dict):
+    """Render a chat message as a native chat bubble."""
+    if message["role"] == "user":
+        with st.chat_message("user", avatar="👤"):
+            st.markdown(message["markdown"])
+        return
+    
+    with st.chat_message("assistant"):
+        st.caption(message["label"])
+        st.markdown(message["markdown"])
+
+
 def main():
     """Main application."""
     
+    # Archives left by sessions that never reset are cleaned up on startup
+    prune_chat_archives()
+    
     # Header
     st.markdown('<div class="main-header">🏥 Post Discharge Medical AI Assistant</div>', unsafe_allow_html=True)
     
@@ -136,14 +399,20 @@ def main():
     with st.sidebar:
         st.header("ℹ️ System Information")
         
-        # Check API health
-        api_healthy = check_api_health()
+        if st.button("🔄 Refresh Status", use_container_width=True):
+            get_api_state.clear()
+        
+        # Use the pushed status while the stream is connected; otherwise
+        # check API health and get system status directly
+        status = get_status_feed().snapshot()
+        if status is not None:
+            api_healthy = True
+        else:
+            api_healthy, status = get_api_state()
         
         if api_healthy:
             st.success("✅ API Connected")
             
-            # Get system status
-            status = get_system_status()
             if status:
                 st.metric("Patients in Database", status.get("database_patients", 0))
                 st.metric("Reference Documents", status.get("vector_store_documents", 0))
@@ -158,6 +427,7 @@ def main():
         st.header("🔄 Session Controls")
         if st.button("Reset Conversation", use_container_width=True):
             st.session_state.messages = []
+            clear_chat_archive()
             st.session_state.session_id = None
             st.session_state.current_patient = None
             st.success("Session reset successfully!")
@@ -176,28 +446,34 @@ def main():
             if patient_name_input:
                 with st.spinner("Generating PDF..."):
                     try:
-                        response = requests.post(
+                        with get_http_session().post(
                             f"{API_BASE_URL}/patient/report/pdf",
                             json={"patient_name": patient_name_input},
+                            stream=True,
                             timeout=30
-                        )
-                        if response.status_code == 200:
-                            # Get filename from headers or create default
-                            filename = f"discharge_report_{patient_name_input.replace(' ', '_')}.pdf"
-                            
-                            # Offer download
-                            st.download_button(
-                                label="💾 Save PDF",
-                                data=response.content,
-                                file_name=filename,
-                                mime="application/pdf",
-                                use_container_width=True
-                            )
-                            st.success(f"✅ Report generated for {patient_name_input}!")
-                        elif response.status_code == 404:
-                            st.error(f"❌ Patient '{patient_name_input}' not found")
-                        else:
-                            st.error("❌ Error generating report")
+                        ) as response:
+                            if response.status_code == 200:
+                                # Get filename from headers or create default
+                                filename = f"discharge_report_{patient_name_input.replace(' ', '_')}.pdf"
+                                
+                                # Offer download; Streamlit reads the saved file once here
+                                pdf_file = download_to_temp_file(response, suffix=".pdf")
+                                try:
+                                    with open(pdf_file, "rb") as data:
+                                        st.download_button(
+                                            label="💾 Save PDF",
+                                            data=data,
+                                            file_name=filename,
+                                            mime="application/pdf",
+                                            use_container_width=True
+                                        )
+                                finally:
+                                    os.remove(pdf_file)
+                                st.success(f"✅ Report generated for {patient_name_input}!")
+                            elif response.status_code == 404:
+                                st.error(f"❌ Patient '{patient_name_input}' not found")
+                            else:
+                                st.error("❌ Error generating report")
                     except Exception as e:
                         st.error(f"❌ Error: {str(e)}")
             else:
@@ -242,78 +518,70 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = []
         # Add initial greeting from Receptionist Agent
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": "👋 Hello! I'm your post-discharge care assistant. I'm here to help you with your recovery. What's your name?",
-            "agent": "Receptionist Agent",
-            "timestamp": datetime.now().isoformat()
-        })
+        st.session_state.messages.append(new_message(
+            "assistant",
+            "👋 Hello! I'm your post-discharge care assistant. I'm here to help you with your recovery. What's your name?",
+            agent="Receptionist Agent"
+        ))
     if "session_id" not in st.session_state:
         st.session_state.session_id = None
     if "current_patient" not in st.session_state:
         st.session_state.current_patient = None
+    if "archive_id" not in st.session_state:
+        st.session_state.archive_id = uuid.uuid4().hex
+        st.session_state.archived_count = 0
+        st.session_state.show_archived = False
     
     # Main chat interface
     st.header("💬 Chat Interface")
     
+    # Older messages are read from the archive only when asked for
+    archived_count = st.session_state.archived_count
+    if archived_count:
+        if not st.session_state.show_archived:
+            st.session_state.show_archived = st.button(
+                f"⬆️ Load {archived_count} earlier messages",
+                use_container_width=True
+            )
+        if st.session_state.show_archived:
+            for message in load_archived_messages():
+                render_message(message)
+    
     # Display chat messages
-    chat_container = st.container()
-    with chat_container:
-        for message in st.session_state.messages:
-            role = message["role"]
-            content = message["content"]
-            agent = message.get("agent", "receptionist")
-            
-            if role == "user":
-                st.markdown(f"""
-                <div class="chat-message user-message">
-                    <strong>👤 You:</strong><br>
-                    {content}
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                # Normalize agent name
-                agent_lower = agent.lower()
-                is_receptionist = "receptionist" in agent_lower
-                
-                agent_badge_class = "receptionist-badge" if is_receptionist else "clinical-badge"
-                agent_name = "Receptionist Agent" if is_receptionist else "Clinical AI Agent"
-                agent_icon = "👋" if is_receptionist else "⚕️"
-                
-                st.markdown(f"""
-                <div class="chat-message assistant-message">
-                    <span class="agent-badge {agent_badge_class}">{agent_icon} {agent_name}</span><br>
-                    {content.replace(chr(10), '<br>')}
-                </div>
-                """, unsafe_allow_html=True)
+    for message in st.session_state.messages:
+        render_message(message)
     
     # Chat input
     if api_healthy:
-        # Use a form to handle message submission
-        with st.form(key="chat_form", clear_on_submit=True):
-            col1, col2 = st.columns([6, 1])
-            with col1:
-                user_input = st.text_input(
-                    "Type your message here...",
-                    key="user_input",
-                    label_visibility="collapsed",
-                    placeholder="Type your message and press Enter or click Send..."
-                )
-            with col2:
-                submit_button = st.form_submit_button("Send", use_container_width=True)
+        user_input = st.chat_input("Type your message and press Enter...")
         
-        if submit_button and user_input:
+        if user_input:
             # Add user message to chat
-            st.session_state.messages.append({
-                "role": "user",
-                "content": user_input,
-                "timestamp": datetime.now().isoformat()
-            })
+            user_message = new_message("user", user_input)
+            st.session_state.messages.append(user_message)
+            
+            # Append the new turn below the history, streaming the reply in
+            render_message(user_message)
+            with st.chat_message("assistant"):
+                reply_label = st.empty()
+                reply_placeholder = st.empty()
+            reply_placeholder.markdown("🤔 Processing...")
             
-            # Show thinking message
-            with st.spinner("🤔 Processing..."):
-                # Send to API with session_id
-                response = send_message(user_input, st.session_state.session_id)
+            # Send to API with session_id, rendering the reply as it is generated
+            # Redraws are coalesced: tokens arriving within STREAM_RENDER_INTERVAL
+            # of the last redraw are shown with the next one
+            response = None
+            reply_text = ""
+            last_render = 0.0
+            for event, data in stream_message(user_input, st.session_state.session_id):
+                if event == "token":
+                    reply_text += data
+                    now = time.monotonic()
+                    if now - last_render >= STREAM_RENDER_INTERVAL:
+                        reply_placeholder.markdown(as_markdown(reply_text))
+                        last_render = now
+                else:
+                    response = data
             
             if response:
                 # Store session_id for subsequent messages
@@ -321,17 +589,23 @@ def main():
                     st.session_state.session_id = response.get("session_id")
                 
                 # Add assistant response to chat
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": response.get("response", ""),
-                    "agent": response.get("agent", "receptionist"),
-                    "timestamp": response.get("timestamp", datetime.now().isoformat())
-                })
+                assistant_message = new_message(
+                    "assistant",
+                    response.get("response", ""),
+                    agent=response.get("agent", "receptionist"),
+                    timestamp=response.get("timestamp")
+                )
+                st.session_state.messages.append(assistant_message)
                 
-                # Rerun to update chat display
-                st.rerun()
+                # Show the final reply and its agent; no rerun is needed
+                reply_label.caption(assistant_message["label"])
+                reply_placeholder.markdown(assistant_message["markdown"])
             else:
+                reply_placeholder.empty()
                 st.error("Failed to get response from the assistant. Please try again.")
+            
+            # Keep the history redrawn on each rerun bounded
+            archive_old_messages()
     else:
         st.warning("⚠️ Please start the backend server to begin chatting.")
         st.code("cd backend\nuvicorn main:app --reload --port 8000", language="bash")
@@ -78,6 +78,7 @@ def main():
             print(f"   - {txt_file}")
             return
         
+        vector_store.flush()
         print()
         
         # Verify indexing
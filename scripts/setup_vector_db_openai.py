@@ -55,6 +55,7 @@ def main():
                 "format": "txt"
             }
         )
+        vector_store.flush()
         print("✅ Reference materials indexed")
         print()
         
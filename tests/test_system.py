@@ -2,17 +2,22 @@
 Comprehensive system tests for Post Discharge Medical AI Assistant.
 """
 
+import asyncio
+import json
 import sys
 from pathlib import Path
+from typing import List
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
-from backend.database.database import get_db_manager
-from backend.rag.vector_store import get_vector_store
+from langchain_community.chat_models.fake import FakeListChatModel
+from backend.database.database import DatabaseManager, get_db_manager
 from backend.tools.patient_retrieval import PatientRetrievalTool
-from backend.tools.rag_tool import RAGTool
+
+# Vector store modules (Chroma, embeddings) are imported inside the tests
+# that use them, so database and patient tool tests start without them
 
 
 class TestDatabase:
@@ -50,16 +55,149 @@ class TestDatabase:
         assert all('patient_name' in p for p in patients)
 
 
+def make_patient(patient_id: int, patient_name: str) -> dict:
+    """Build a minimal patient record."""
+    return {
+        "patient_id": patient_id,
+        "patient_name": patient_name,
+        "discharge_date": "2024-01-15",
+        "primary_diagnosis": "Chronic Kidney Disease Stage 3",
+        "medications": ["Lisinopril 10mg daily"],
+        "dietary_restrictions": "Low sodium",
+        "follow_up": "Nephrology clinic in 2 weeks",
+        "warning_signs": "Swelling",
+        "discharge_instructions": "Monitor blood pressure daily"
+    }
+
+
+@pytest.fixture
+def name_db(tmp_path):
+    """In-memory database with names that exercise each matching rule."""
+    patients = [
+        make_patient(1, "John Smith"),
+        make_patient(2, "Johnny Appleseed"),
+        make_patient(3, "José  García"),
+        make_patient(4, "Mary Johnson"),
+        make_patient(5, "Maria Lopez"),
+        make_patient(6, "Ann Leeds"),
+        make_patient(7, "Ann Lee")
+    ]
+    data_file = tmp_path / "patients.json"
+    data_file.write_text(json.dumps(patients), encoding="utf-8")
+    db_manager = DatabaseManager("sqlite://")
+    db_manager.load_patient_data(str(data_file))
+    return db_manager
+
+
+class TestPatientNameMatching:
+    """Test how typed names resolve to patients."""
+    
+    def test_exact_match_beats_prefix(self, name_db):
+        """Test an exact name wins over a longer name starting with it."""
+        assert name_db.get_patient_by_name("Ann Lee")["patient_id"] == 7
+        assert [p["patient_id"] for p in name_db.find_patients_by_name("Ann Lee")] == [7]
+    
+    def test_prefix_match(self, name_db):
+        """Test names starting with the query match, lowest patient_id first."""
+        assert name_db.get_patient_by_name("johnny")["patient_name"] == "Johnny Appleseed"
+        assert name_db.get_patient_by_name("john")["patient_id"] == 1
+        assert [p["patient_id"] for p in name_db.find_patients_by_name("john")] == [1, 2]
+    
+    def test_substring_fallback(self, name_db):
+        """Test names containing the query match when none start with it."""
+        assert name_db.get_patient_by_name("lopez")["patient_name"] == "Maria Lopez"
+        assert [p["patient_id"] for p in name_db.find_patients_by_name("son")] == [4]
+        assert name_db.get_patient_by_name("zzz") is None
+        assert name_db.find_patients_by_name("zzz") == []
+    
+    def test_accent_and_whitespace_normalization(self, name_db):
+        """Test case, accents and extra whitespace are ignored."""
+        assert name_db.get_patient_by_name("  JOSE   garcía ")["patient_id"] == 3
+        assert name_db.get_patient_by_name("Jose Garcia")["patient_id"] == 3
+    
+    def test_multiple_matches_message(self, name_db):
+        """Test the retrieval tool asks for the full name on ambiguous input."""
+        tool = PatientRetrievalTool()
+        tool.db_manager = name_db
+        
+        result = tool.retrieve_patient("ann")
+        assert "multiple patients" in result
+        assert "Ann Leeds" in result and "Ann Lee" in result
+        
+        result = tool.retrieve_patient("Ann Lee")
+        assert "multiple patients" not in result
+        assert "Ann Lee" in result
+
+
+class TestDatabaseMigration:
+    """Test upgrades of databases written by older versions."""
+    
+    def test_json_columns_reencoded(self, tmp_path):
+        """Test JSON text medications are rewritten as msgpack on startup."""
+        from sqlalchemy import text
+        database_url = f"sqlite:///{tmp_path / 'patients.db'}"
+        
+        # Row as written by a version that stored JSON text
+        medications = ["Lisinopril 10mg daily", "Furosemide 20mg twice daily"]
+        engine = DatabaseManager(database_url).engine
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO patients (patient_id, patient_name, medications) VALUES (1, 'John Smith', :meds)"),
+                {"meds": json.dumps(medications)}
+            )
+        engine.dispose()
+        
+        db_manager = DatabaseManager(database_url)
+        with db_manager.engine.connect() as conn:
+            stored_type = conn.execute(text("SELECT typeof(medications) FROM patients")).scalar()
+        assert stored_type == "blob"
+        assert db_manager.get_patient_by_name("John Smith")["medications"] == medications
+        db_manager.engine.dispose()
+
+
+class TestSetupVerification:
+    """Test the setup verification script."""
+    
+    def test_count_array_objects(self, tmp_path):
+        """Test top-level objects are counted, ignoring nesting and string contents."""
+        from verify_setup import _count_array_objects
+        patients = [
+            {"name": "x{[\"]}\\", "nested": [{"a": 1}], "info": {"note": "é{"}}
+            for _ in range(30)
+        ]
+        data_file = tmp_path / "patients.json"
+        
+        for count in (0, 1, 7):
+            data_file.write_text(json.dumps(patients[:count], ensure_ascii=False), encoding="utf-8")
+            assert _count_array_objects(data_file, limit=25) == count
+        
+        # Stops at the limit, and chunk boundaries don't affect the count
+        data_file.write_text(json.dumps(patients, ensure_ascii=False, indent=2), encoding="utf-8")
+        assert _count_array_objects(data_file, limit=25) == 25
+        assert _count_array_objects(data_file, limit=100, chunk_size=3) == 30
+    
+    def test_count_array_objects_rejects_non_array(self, tmp_path):
+        """Test a file whose top level is not an array is an error."""
+        from verify_setup import _count_array_objects
+        data_file = tmp_path / "patients.json"
+        data_file.write_text('{"patient_id": 1}', encoding="utf-8")
+        
+        with pytest.raises(ValueError):
+            _count_array_objects(data_file, limit=25)
+
+
 class TestVectorStore:
     """Test vector store functionality."""
     
     def test_vector_store_initialization(self):
         """Test vector store can be initialized."""
+        from backend.rag.vector_store import get_vector_store
         vector_store = get_vector_store()
         assert vector_store is not None
     
     def test_vector_store_stats(self):
         """Test vector store statistics."""
+        from backend.rag.vector_store import get_vector_store
         vector_store = get_vector_store()
         stats = vector_store.get_collection_stats()
         
@@ -68,6 +206,7 @@ class TestVectorStore:
     
     def test_similarity_search(self):
         """Test similarity search functionality."""
+        from backend.rag.vector_store import get_vector_store
         vector_store = get_vector_store()
         results = vector_store.similarity_search(
             "What is chronic kidney disease?",
@@ -100,6 +239,8 @@ class TestTools:
     
     def test_rag_tool(self):
         """Test RAG tool."""
+        from backend.rag.vector_store import get_vector_store
+        from backend.tools.rag_tool import RAGTool
         tool = RAGTool()
         
         # Test if vector store is initialized
@@ -111,6 +252,164 @@ class TestTools:
             assert len(result) > 0
 
 
+class TokenStreamLLM(FakeListChatModel):
+    """Fake chat model that streams its response as the given tokens."""
+    
+    tokens: List[str]
+    
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+        from langchain_core.outputs import ChatGenerationChunk
+        for token in self.tokens:
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+async def stream_tokens(tokens: List[str], tag: str) -> str:
+    """Stream tokens through a fake chat model tagged like the agent LLMs."""
+    llm = TokenStreamLLM(tokens=tokens, responses=["".join(tokens)], tags=[tag])
+    return "".join([chunk.content async for chunk in llm.astream("")])
+
+
+class FakeReceptionist:
+    """Receptionist that streams a scripted reply, routing on the marker."""
+    
+    name = "Receptionist Agent"
+    
+    def __init__(self, tokens: List[str]):
+        self.tokens = tokens
+    
+    def should_route_to_clinical(self, message):
+        return "swelling" in message.lower()
+    
+    async def aprocess_message(self, message, chat_history=None):
+        from backend.agents.agent_graph import ROUTE_MARKER
+        text = await stream_tokens(self.tokens, "receptionist")
+        reply, marker, query = text.partition(ROUTE_MARKER)
+        return {
+            "response": reply.strip(),
+            "should_route_to_clinical": bool(marker),
+            "clinical_query": query.strip() or None,
+            "agent": "receptionist"
+        }
+
+
+class FakeClinical:
+    """Clinical agent that streams an answer naming the question it was asked."""
+    
+    name = "Clinical AI Agent"
+    disclaimer = "\n\n⚕️ Always consult healthcare professionals for medical advice."
+    
+    def __init__(self):
+        self.queries = []
+    
+    def set_patient_context(self, patient_context):
+        pass
+    
+    def log_exchange(self, message, result, patient_context=None):
+        pass
+    
+    async def aprocess_message(self, message, patient_context=None, chat_history=None, log=True):
+        self.queries.append(message)
+        text = await stream_tokens(["Answer", " to: ", message], "clinical")
+        # Appended after streaming, like the real agent's disclaimer
+        return {"response": text + self.disclaimer, "agent": "clinical"}
+
+
+class TestStreaming:
+    """Test streamed responses of the multi-agent system."""
+    
+    def run_turn(self, monkeypatch, receptionist_tokens: List[str], message: str):
+        """Stream one turn and return the chunks, final state and clinical fake."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        from backend.agents import agent_graph
+        clinical = FakeClinical()
+        monkeypatch.setattr(agent_graph, "create_receptionist_agent", lambda: FakeReceptionist(receptionist_tokens))
+        monkeypatch.setattr(agent_graph, "create_clinical_agent", lambda: clinical)
+        system = agent_graph.MultiAgentSystem()
+        
+        async def collect():
+            return [chunk async for chunk in system.stream_message(message)]
+        
+        chunks = asyncio.run(collect())
+        return chunks, system.get_state(), clinical
+    
+    def test_unrouted_turn(self, monkeypatch):
+        """Test a receptionist reply streams in full, including text resembling the marker."""
+        chunks, state, clinical = self.run_turn(
+            monkeypatch, ["Take ", "ROUTE", "_TO 66", " home."], "How do I get to the clinic?"
+        )
+        
+        assert state["current_agent"] == "receptionist"
+        assert "".join(chunks) == state["response"] == "Take ROUTE_TO 66 home."
+        assert clinical.queries == []
+    
+    def test_routed_turn(self, monkeypatch):
+        """Test a routed turn streams the speculative clinical answer after the reply."""
+        chunks, state, clinical = self.run_turn(
+            monkeypatch,
+            ["Let me check. ", "ROUTE_", "TO_CLIN", "ICAL: is swelling ", "normal"],
+            "Is swelling normal?"
+        )
+        
+        assert state["current_agent"] == "clinical"
+        assert "".join(chunks) == "Let me check.\n\n" + state["response"]
+        assert state["response"].startswith("Answer to: Is swelling normal?")
+        assert clinical.queries == ["Is swelling normal?"]
+    
+    def test_routed_turn_with_new_query(self, monkeypatch):
+        """Test the speculative answer is dropped when the routed query differs."""
+        chunks, state, clinical = self.run_turn(
+            monkeypatch,
+            ["ROUTE_TO_", "CLINICAL: ", "leg swelling after dialysis"],
+            "Is swelling normal?"
+        )
+        
+        assert state["current_agent"] == "clinical"
+        assert "".join(chunks) == state["response"]
+        assert state["response"].startswith("Answer to: leg swelling after dialysis")
+        assert clinical.queries == ["Is swelling normal?", "leg swelling after dialysis"]
+
+
+class TestConversationWindow:
+    """Test which earlier messages reach the agents."""
+    
+    def test_unsummarized_messages_kept(self, monkeypatch):
+        """Test messages past the window stay verbatim until they are summarized."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        from langchain_core.messages import AIMessage, HumanMessage
+        from backend.agents import agent_graph
+        
+        histories = []
+        
+        class RecordingReceptionist(FakeReceptionist):
+            async def aprocess_message(self, message, chat_history=None):
+                histories.append([m.content for m in chat_history])
+                return await super().aprocess_message(message, chat_history)
+        
+        monkeypatch.setattr(agent_graph, "create_receptionist_agent", lambda: RecordingReceptionist(["Noted."]))
+        monkeypatch.setattr(agent_graph, "create_clinical_agent", FakeClinical)
+        system = agent_graph.MultiAgentSystem()
+        system.window_turns = 2
+        
+        # 2K+2 messages: the first is past the window but not yet summarized
+        messages = [
+            HumanMessage(content="I'm John Smith") if i == 0
+            else (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i}")
+            for i in range(2 * system.window_turns + 2)
+        ]
+        history = system._chat_history({"messages": messages, "summarized_count": 0})
+        assert history[0].content == "I'm John Smith"
+        assert history == messages[:-1]
+        
+        # Through the graph: the fourth turn is past the window, before any summary
+        for message in ["I'm John Smith", "hello", "thanks", "one more thing"]:
+            asyncio.run(system.process_message(message))
+        assert histories[-1][0] == "I'm John Smith"
+        assert not system.get_state().get("summary")
+
+
 def run_tests():
     """Run all tests and print results."""
     print("=" * 60)